@@ -1,28 +1,116 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 import asyncio
-import os
+from loguru import logger
 
 app = FastAPI()
 
-# Import the bot
-from dhan_algo_suite.telegram_bot import build_and_start_bot
+# Only FastAPI and the metrics registry load with the app. The Telegram bot,
+# the trading loop and its data stack come up as subsystems (src/startup.py):
+# in the background by default, so /, /healthz and webhooks answer during a
+# cold start, or before serving with STARTUP_MODE=eager.
+from dhan_algo_suite.src.config import settings
+from dhan_algo_suite.src import metrics
+from dhan_algo_suite.src.startup import Subsystems, import_modules
 
-bot_task = None
+WEBHOOK_WAIT_S = 20.0   # a webhook during startup waits this long for the bot, then 503 (Telegram retries)
+
+engine_task = None
+loop_lag = metrics.LoopLagMonitor()
+subsystems = Subsystems()
+
+async def run_engine(mode: str):
+    # the trading loop runs in this process so the bot reads its snapshots directly
+    if settings.STRATEGIES_FILE:
+        from dhan_algo_suite.src.runtime.runner import load_specs, run_strategies
+        await run_strategies(load_specs(settings.STRATEGIES_FILE), mode)
+    elif mode == "live":
+        from dhan_algo_suite.src.live.trader import LiveTrader
+        await LiveTrader().loop()
+    else:
+        from dhan_algo_suite.src.simulator.paper_engine import paper_trade
+        await paper_trade()
+
+def engine_module(mode: str) -> str:
+    if settings.STRATEGIES_FILE:
+        return "dhan_algo_suite.src.runtime.runner"
+    return "dhan_algo_suite.src.live.trader" if mode == "live" else "dhan_algo_suite.src.simulator.paper_engine"
+
+async def load_config():
+    return await asyncio.to_thread(settings.load)
+
+async def load_telegram():
+    bot, = await import_modules("dhan_algo_suite.telegram_bot")
+    await bot.start_bot()
+    print("✅ Telegram bot started")
+    return bot
+
+async def load_trading():
+    global engine_task
+    if settings.RUN_MODE not in ("live", "paper"):
+        return None
+    await import_modules(engine_module(settings.RUN_MODE))
+    engine_task = asyncio.create_task(run_engine(settings.RUN_MODE))
+    return engine_task
+
+subsystems.add("config", load_config)
+subsystems.add("telegram", load_telegram, after=("config",), retry_s=5.0)
+subsystems.add("trading", load_trading, after=("config",))
 
 @app.on_event("startup")
 async def startup_event():
-    global bot_task
-    loop = asyncio.get_event_loop()
-    bot_task = loop.create_task(build_and_start_bot())
-    print("✅ Telegram bot polling started")
+    loop_lag.start()
+    try:
+        eager = settings.STARTUP_MODE == "eager"
+    except Exception:
+        eager = False   # invalid config: the "config" subsystem reports the error at /healthz
+    if eager:
+        await subsystems.load_all(retry=False)
+    else:
+        subsystems.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global bot_task
-    if bot_task:
-        bot_task.cancel()
-    print("🛑 Telegram bot stopped")
+    global engine_task
+    await subsystems.stop()
+    if engine_task:
+        engine_task.cancel()
+        try:
+            await engine_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"trading loop failed: {e!r}")
+        engine_task = None
+    if subsystems.ready("telegram"):
+        await (await subsystems.wait("telegram")).stop_bot()
+        print("🛑 Telegram bot stopped")
+    await loop_lag.stop()
 
 @app.get("/")
 async def root():
     return {"status": "running"}
+
+@app.get("/healthz")
+async def healthz():
+    # answers from the first request on; subsystem states and load times. "degraded"
+    # once a subsystem failed, including a trading loop that died after starting
+    return {"status": "ok" if subsystems.healthy() else "degraded", **subsystems.report()}
+
+# --- Webhook endpoint for Telegram (handled by telegram_bot once it is up) ---
+@app.post("/{token}")
+async def telegram_webhook(token: str, request: Request):
+    try:
+        bot = await subsystems.wait("telegram", WEBHOOK_WAIT_S)
+    except (asyncio.TimeoutError, RuntimeError):
+        raise HTTPException(status_code=503)
+    return await bot.telegram_webhook(token, request)
+
+# stage latency histograms and queue/loop gauges (see src/metrics.py)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics.json")
+async def metrics_json():
+    return metrics.report()
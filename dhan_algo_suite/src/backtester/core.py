@@ -0,0 +1,211 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+import numpy as np
+import pandas as pd
+from ..session_calendar import SessionCalendar, get_calendar
+from ..strategy.nifty_atm_option import Params
+
+# Array-backed backtest core. Works on contiguous float64/int64 arrays so the
+# per-bar work is vectorized; the only Python-level loop is one iteration per
+# trade (entry -> exit), not per bar.
+
+@dataclass
+class TradeLog:
+    ts_entry: datetime
+    ts_exit: datetime | None
+    symbol: str
+    security_id: str
+    side: str
+    qty: int
+    entry_price: float
+    exit_price: float | None
+    pnl: float | None
+    sl_hits_today: int
+    notes: str
+
+@dataclass
+class CoreTrades:
+    # Positions index into the bar arrays passed to simulate()
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    direction: np.ndarray      # +1 CALL, -1 PUT
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    sl_hits_today: np.ndarray
+    leg: np.ndarray            # traded contract id from the pricer, -1 when priced off the bars themselves
+
+    def __len__(self) -> int:
+        return len(self.entry_idx)
+
+NS_PER_SEC = 1_000_000_000
+
+def parse_tod(hhmm: str) -> int:
+    # "09:15" / "09:15:30" -> nanoseconds since local midnight
+    t = pd.to_datetime(hhmm).time()
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * NS_PER_SEC + t.microsecond * 1000
+
+def time_of_day_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    # Local wall-clock time of day (index is expected in settings.TIMEZONE)
+    secs = (index.hour * 60 + index.minute) * 60 + index.second
+    return (np.asarray(secs, dtype=np.int64) * NS_PER_SEC
+            + np.asarray(index.microsecond, dtype=np.int64) * 1000
+            + np.asarray(index.nanosecond, dtype=np.int64))
+
+def session_tod(index: pd.DatetimeIndex, calendar: SessionCalendar | None = None) -> np.ndarray:
+    # time_of_day_ns, with bars outside an exchange session (holidays, weekends,
+    # outside special-session hours) set to -1 so simulate() never trades them
+    cal = calendar or get_calendar()
+    return np.where(cal.session_mask(index), time_of_day_ns(index), -1)
+
+SESSION_ANCHOR = "09:15"
+
+def resample_session(df: pd.DataFrame, minutes: int, anchor: str = SESSION_ANCHOR) -> pd.DataFrame:
+    # Session-aligned OHLC(V) aggregation of sorted, ts-indexed bars: buckets are
+    # counted from `anchor` each local day and labelled by their start time.
+    idx = df.index
+    local = idx.tz_localize(None) if idx.tz is not None else idx
+    day_ns = np.asarray(local.normalize().asi8)
+    anchor_ns = parse_tod(anchor)
+    width = minutes * 60 * NS_PER_SEC
+    label = day_ns + anchor_ns + ((time_of_day_ns(idx) - anchor_ns) // width) * width
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(label)) + 1)) if len(label) else np.empty(0, np.int64)
+    ends = np.append(starts[1:], len(label)) - 1
+    out = {
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts) if len(starts) else np.empty(0),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts) if len(starts) else np.empty(0),
+        "close": df["close"].to_numpy()[ends],
+    }
+    if "volume" in df:
+        out["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts) if len(starts) else np.empty(0)
+    new_idx = pd.DatetimeIndex(label[starts], name=idx.name)
+    if idx.tz is not None:
+        new_idx = new_idx.tz_localize(idx.tz)
+    return pd.DataFrame(out, index=new_idx)
+
+def tsl_ladder(p: Params) -> tuple[np.ndarray, np.ndarray]:
+    # step_tsl() as a lookup table: levels[k] is the SL offset above the initial
+    # stop once the k smallest step gains have been reached.
+    steps = sorted(p.tsl_steps, key=lambda s: s[0])
+    gains = np.array([g for g, _ in steps], dtype=np.float64)
+    offs = np.array([0.0] + [o for _, o in steps], dtype=np.float64)
+    return gains, np.maximum.accumulate(offs)
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    # out[i] = first j >= i with mask[j], or len(mask); has len(mask)+1 entries
+    n = len(mask)
+    pos = np.append(np.flatnonzero(mask), n)
+    return pos[np.searchsorted(pos, np.arange(n + 1))]
+
+def empty_trades() -> CoreTrades:
+    i = np.empty(0, dtype=np.int64)
+    f = np.empty(0, dtype=np.float64)
+    return CoreTrades(i, i, i, f, f, f, i, i)
+
+# pricer(signal_bar, bars, direction) -> (leg_id, entry_price, prices at `bars`) or
+# None to skip the signal. Bar positions index the arrays given to simulate().
+Pricer = Callable[[int, np.ndarray, int], "tuple[int, float, np.ndarray] | None"]
+
+def simulate(tod: np.ndarray, open_: np.ndarray, close: np.ndarray, p: Params,
+             pricer: Pricer | None = None) -> CoreTrades:
+    """Run the momentum/SL/TSL state machine over sorted bar arrays.
+
+    Mirrors the per-bar loop in engine.simulate_iterrows exactly: session bounds
+    are inclusive, state resets on the bar stamped at start_time, entries fill at
+    the signal bar's close and exits are checked from the next in-session bar.
+    With a pricer, signals still come from these bars but the traded price series
+    (entry, trailing, exit) is the one the pricer returns, e.g. the option leg.
+    """
+    start, end = parse_tod(p.start_time), parse_tod(p.end_time)
+    sess = np.flatnonzero((tod >= start) & (tod <= end))
+    n = len(sess)
+    if n == 0:
+        return empty_trades()
+    o = np.ascontiguousarray(open_[sess], dtype=np.float64)
+    c = np.ascontiguousarray(close[sess], dtype=np.float64)
+    body = c - o
+    next_sig = _next_true(np.abs(body) >= p.big_candle_points)
+    next_reset = _next_true(tod[sess] == start)
+    gains, levels = tsl_ladder(p)
+    sl = p.sl_per_unit
+
+    entries, exits, dirs, hits, legs, epx, xpx = [], [], [], [], [], [], []
+    i, daily_sl = 0, 0
+    while i < n:
+        r = next_reset[i]
+        if daily_sl >= p.max_daily_sls:
+            # sit out until the next session start
+            if r >= n:
+                break
+            i, daily_sl = r, 0
+            r = i
+        s = next_sig[i]
+        if s >= n:
+            break
+        if r <= s:
+            daily_sl = 0
+        lo = s + 1
+        hi = next_reset[lo]
+        d = 1 if body[s] > 0 else -1
+        if pricer is None:
+            leg, entry, seg = -1, c[s], c[lo:hi]
+        else:
+            priced = pricer(int(sess[s]), sess[lo:hi], d)
+            if priced is None:
+                # no tradable contract for this signal; stay flat
+                i = lo
+                continue
+            leg, entry, seg = priced
+        hw = np.maximum(np.maximum.accumulate(seg), entry)
+        stop = (entry - sl) + levels[np.searchsorted(gains, hw - entry, side="right")]
+        hit = np.flatnonzero(seg <= stop)
+        if len(hit) == 0:
+            # open position is discarded by the next session reset (or end of data)
+            i = hi
+            continue
+        e = lo + int(hit[0])
+        x = seg[e - lo]
+        entries.append(s); exits.append(e)
+        dirs.append(d); legs.append(leg)
+        epx.append(entry); xpx.append(x)
+        hits.append(daily_sl)
+        if x - entry <= -sl + 1e-6:
+            daily_sl += 1
+        i = e + 1
+
+    if not entries:
+        return empty_trades()
+    ei = np.array(entries, dtype=np.int64)
+    xi = np.array(exits, dtype=np.int64)
+    ep, xp = np.array(epx, dtype=np.float64), np.array(xpx, dtype=np.float64)
+    return CoreTrades(
+        entry_idx=sess[ei], exit_idx=sess[xi], direction=np.array(dirs, dtype=np.int64),
+        entry_price=ep, exit_price=xp, pnl=(xp - ep) * p.lot_qty,
+        sl_hits_today=np.array(hits, dtype=np.int64), leg=np.array(legs, dtype=np.int64),
+    )
+
+def to_trade_logs(res: CoreTrades, index: pd.DatetimeIndex, p: Params,
+                  symbol: str = "NIFTY_OPTION_ATM", security_id: str = "ATM_DERIVED",
+                  symbols: dict[int, str] | None = None) -> list[TradeLog]:
+    # symbols: leg id -> trading symbol for pricer-backed runs (leg id is the security id)
+    symbols = symbols or {}
+    return [
+        TradeLog(
+            ts_entry=index[res.entry_idx[k]], ts_exit=index[res.exit_idx[k]],
+            symbol=symbols.get(int(res.leg[k]), symbol) if res.leg[k] >= 0 else symbol,
+            security_id=str(int(res.leg[k])) if res.leg[k] >= 0 else security_id,
+            side="BUY_CALL" if res.direction[k] > 0 else "BUY_PUT",
+            qty=p.lot_qty, entry_price=float(res.entry_price[k]), exit_price=float(res.exit_price[k]),
+            pnl=float(res.pnl[k]), sl_hits_today=int(res.sl_hits_today[k]), notes="SL/TSL exit",
+        )
+        for k in range(len(res))
+    ]
+
+def simulate_frame(df: pd.DataFrame, p: Params) -> list[TradeLog]:
+    # df: OHLC indexed by tz-aware ts, sorted ascending
+    res = simulate(session_tod(df.index), df["open"].to_numpy(np.float64),
+                   df["close"].to_numpy(np.float64), p)
+    return to_trade_logs(res, df.index, p)
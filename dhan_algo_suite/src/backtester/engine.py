@@ -1,6 +1,5 @@
 from __future__ import annotations
-import argparse, asyncio, math
-from dataclasses import dataclass
+import argparse, asyncio, json, math
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -8,20 +7,15 @@ from loguru import logger
 from ..config import settings
 from ..dhan_client import DhanClient
 from ..strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
-
-@dataclass
-class TradeLog:
-    ts_entry: datetime
-    ts_exit: datetime | None
-    symbol: str
-    security_id: str
-    side: str
-    qty: int
-    entry_price: float
-    exit_price: float | None
-    pnl: float | None
-    sl_hits_today: int
-    notes: str
+from ..storage.bar_pyramid import API_INTERVALS, BarPyramid
+from ..storage.bar_store import BarStore
+from ..storage.trade_store import TradeStore
+from ..utils import now_local
+from .core import TradeLog, parse_tod, resample_session, session_tod, simulate_frame
+from .options import run_option_backtest
+from .parallel import simulate_frame_sharded
+from ..runtime.engine import replay_bars
+from ..runtime.sim import SimExecutor
 
 async def fetch_spot_intraday(client: DhanClient, from_dt: str, to_dt: str, interval=5) -> pd.DataFrame:
     # Using NIFTY spot or futures continuous chosen by user; assume index instrument meta known
@@ -42,24 +36,21 @@ async def fetch_spot_intraday(client: DhanClient, from_dt: str, to_dt: str, inte
     })
     return df
 
+async def load_spot_bars(client: DhanClient | None, start: datetime, end: datetime, interval=5,
+                         store: BarStore | None = None) -> pd.DataFrame:
+    # Cached variant of fetch_spot_intraday: only base-interval days missing from the
+    # BarStore hit the API; any multiple of the base is derived once and cached next to it
+    pyramid = BarPyramid(store)
+    df = await pyramid.get_frame(client, settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT, interval,
+                                 start.date(), end.date(), instrument="INDEX")
+    return df[["open", "high", "low", "close", "ts"]]
+
 def month_ago(dt: datetime, months: int) -> datetime:
     # Rough month delta: 30 days * months
     return dt - timedelta(days=30*months)
 
-async def run_backtest(months: int, lot_qty: int = 75, out_csv: str = "backtest_trades.csv"):
-    now = datetime.utcnow()
-    start = month_ago(now, months)
-    client = DhanClient()
-    strat = NiftyATMOptionStrategy(Params(lot_qty=lot_qty))
-    try:
-        df = await fetch_spot_intraday(client, start.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y-%m-%d %H:%M:%S"))
-    finally:
-        await client.close()
-
-    df = df.set_index("ts").sort_index()
-    # Resample to 5-min if needed
-    # df = df
-
+def simulate_iterrows(df: pd.DataFrame, strat: NiftyATMOptionStrategy) -> list[TradeLog]:
+    # Reference per-bar loop; core.simulate must produce identical TradeLogs.
     trades: list[TradeLog] = []
     in_trade = False
     entry_price = None
@@ -70,14 +61,19 @@ async def run_backtest(months: int, lot_qty: int = 75, out_csv: str = "backtest_
 
     sl_per_unit = strat.p.sl_per_unit
     daily_sl = 0
+    # window checks precomputed once from the session calendar (holidays excluded)
+    tod = session_tod(df.index)
+    start, end = parse_tod(strat.p.start_time), parse_tod(strat.p.end_time)
+    in_window = ((tod >= start) & (tod <= end)).tolist()
+    at_start = (tod == start).tolist()
 
-    for ts, row in df.iterrows():
+    for k, (ts, row) in enumerate(df.iterrows()):
         # skip outside time window
-        if not (ts.time() >= pd.to_datetime(strat.p.start_time).time() and ts.time() <= pd.to_datetime(strat.p.end_time).time()):
+        if not in_window[k]:
             continue
 
         # reset daily counters at session start
-        if ts.time() == pd.to_datetime(strat.p.start_time).time():
+        if at_start[k]:
             daily_sl = 0
             in_trade = False
             entry_price = None
@@ -121,31 +117,72 @@ async def run_backtest(months: int, lot_qty: int = 75, out_csv: str = "backtest_
                 high_water = None
                 entry_ts = None
                 side = None
+    return trades
+
+async def run_backtest(months: int, lot_qty: int = 75, out_csv: str = "backtest_trades.csv",
+                       engine: str = "core", cache: str = "on", workers: int = 1, premium: str = "spot",
+                       strategy: str = "nifty_atm_option", timeframe: int = 5):
+    now = now_local(settings.TIMEZONE)
+    start = month_ago(now, months)
+    strat = NiftyATMOptionStrategy(Params(lot_qty=lot_qty, timeframe_min=timeframe))
+    client = None if cache == "offline" else DhanClient()
+    try:
+        if client is None:
+            df = await load_spot_bars(None, start, now, timeframe)
+        elif cache == "off":
+            # one direct fetch at the timeframe if Dhan serves it, else at the base interval
+            interval = timeframe if timeframe in API_INTERVALS else settings.BAR_BASE_INTERVAL
+            df = await fetch_spot_intraday(client, start.strftime("%Y-%m-%d %H:%M:%S"),
+                                           now.strftime("%Y-%m-%d %H:%M:%S"), interval)
+        else:
+            df = await load_spot_bars(client, start, now, timeframe)
+        df = df.set_index("ts").sort_index()
+        if cache == "off" and interval != timeframe:
+            df = resample_session(df, timeframe)
+        if premium == "option":
+            # option legs always go through the bar cache, even with --cache off
+            trades = await run_option_backtest(client, df, strat.p, interval=timeframe if timeframe in API_INTERVALS
+                                                else settings.BAR_BASE_INTERVAL)
+        elif engine == "iterrows":
+            trades = simulate_iterrows(df, strat)
+        elif engine == "runtime":
+            # event-driven paper runtime over the same bars (also flattens at end_time)
+            trades = await replay_bars(df, strat, timeframe, executor=SimExecutor(strat, tick=None))
+        elif workers > 1:
+            trades = simulate_frame_sharded(df, strat.p, workers)
+        else:
+            trades = simulate_frame(df, strat.p)
+    finally:
+        if client is not None:
+            await client.close()
+    save_results(trades, now, out_csv, strategy)
 
-    # Save trades
-    tdf = pd.DataFrame([t.__dict__ for t in trades])
-    if not tdf.empty:
-        tdf["month"] = tdf["ts_entry"].dt.to_period("M").astype(str)
-        # Rolling windows
-        summary = {
-            "1m": tdf[tdf["ts_entry"] >= now - timedelta(days=30)]["pnl"].sum() if not tdf.empty else 0.0,
-            "2m": tdf[tdf["ts_entry"] >= now - timedelta(days=60)]["pnl"].sum() if not tdf.empty else 0.0,
-            "3m": tdf[tdf["ts_entry"] >= now - timedelta(days=90)]["pnl"].sum() if not tdf.empty else 0.0,
-            "6m": tdf[tdf["ts_entry"] >= now - timedelta(days=180)]["pnl"].sum() if not tdf.empty else 0.0,
-            "12m": tdf[tdf["ts_entry"] >= now - timedelta(days=360)]["pnl"].sum() if not tdf.empty else 0.0,
-        }
-        by_month = tdf.groupby("month").agg(trades=("pnl","count"), pnl=("pnl","sum")).reset_index()
-        tdf.to_csv(out_csv, index=False)
-        by_month.to_csv("backtest_monthly.csv", index=False)
+def save_results(trades: list[TradeLog], now: datetime, out_csv: str = "backtest_trades.csv",
+                 strategy: str = "nifty_atm_option", store: TradeStore | None = None):
+    # Trades replace this strategy's previous backtest in the trade store; the
+    # monthly table and rolling windows are read back from its aggregates.
+    store = store or TradeStore()
+    store.replace(trades, strategy, "backtest")
+    if trades:
+        pd.DataFrame([t.__dict__ for t in trades]).to_csv(out_csv, index=False)
+        store.monthly(strategy, "backtest").to_csv("backtest_monthly.csv", index=False)
         with open("backtest_summary.json","w") as f:
-            json.dump(summary, f, indent=2, default=str)
+            json.dump(store.window_pnl(strategy, "backtest", now), f, indent=2, default=str)
 
-    print(f"Saved: {out_csv}, backtest_monthly.csv, backtest_summary.json")
+    print(f"Saved: {out_csv}, backtest_monthly.csv, backtest_summary.json, {store.url} [{strategy}/backtest]")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--months", type=int, default=6)
     ap.add_argument("--strategy", type=str, default="nifty_atm_option")
     ap.add_argument("--lot", type=int, default=75)
+    ap.add_argument("--timeframe", type=int, default=5, help="candle minutes; derived from the cached base bars")
+    ap.add_argument("--engine", choices=["core", "iterrows", "runtime"], default="core")
+    ap.add_argument("--cache", choices=["on", "off", "offline"], default="on",
+                    help="on: fill missing days into BarStore; off: single direct fetch; offline: cache only")
+    ap.add_argument("--workers", type=int, default=1, help="core engine: shard trading days across N processes")
+    ap.add_argument("--premium", choices=["spot", "option"], default="spot",
+                    help="spot: spot close as option price; option: replay the resolved contract's own bars")
     args = ap.parse_args()
-    asyncio.run(run_backtest(args.months, args.lot))
+    asyncio.run(run_backtest(args.months, args.lot, engine=args.engine, cache=args.cache, workers=args.workers,
+                             premium=args.premium, strategy=args.strategy, timeframe=args.timeframe))
@@ -0,0 +1,212 @@
+from __future__ import annotations
+import asyncio
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..config import settings
+from ..dhan_client import DhanClient
+from ..instruments import InstrumentIndex
+from ..session_calendar import SessionCalendar, day_id, get_calendar
+from ..storage.bar_store import BarKey, BarStore
+from ..strategy.nifty_atm_option import Params
+from .core import NS_PER_SEC, TradeLog, parse_tod, session_tod, simulate, time_of_day_ns, to_trade_logs
+
+# Option-premium backtest. Signals still come from the spot bars, but every trade
+# is priced on the contract the strategy would have bought: nearest expiry on or
+# after the signal day, ATM (or one step ITM) for the signal bar's spot close.
+# The instrument master only lists live contracts, so a listed expiry more than
+# max_gap_days past the calendar's weekly expiry for the day is not the contract
+# that traded then: such signals get no leg (counted and logged) rather than
+# being priced on a far-dated one.
+#   pass 1  plan_legs(): resolve every in-session signal bar to its contract. This
+#           is a superset of the trades actually taken (which depend on exits), so
+#           the union of (contract, day) pairs covers anything pass 2 can touch.
+#   fetch   prefetch(): missing days go into BarStore, contracts in parallel
+#           under one semaphore; the transport's historical rate limit still applies.
+#   pass 2  simulate_options(): core.simulate with a pricer over in-memory arrays.
+
+@dataclass(frozen=True)
+class Leg:
+    security_id: int
+    symbol: str
+    expiry: str
+    strike: float
+    option_type: str
+
+def signal_bars(tod: np.ndarray, open_: np.ndarray, close: np.ndarray, p: Params) -> np.ndarray:
+    # positions of in-session bars momentum_from_bar would enter on
+    start, end = parse_tod(p.start_time), parse_tod(p.end_time)
+    return np.flatnonzero((tod >= start) & (tod <= end) & (np.abs(close - open_) >= p.big_candle_points))
+
+class LegResolver:
+    def __init__(self, index: InstrumentIndex, exchange_segment: str | None = None, underlying: str | None = None,
+                 tick: int = 50, itm_steps: int = 0, calendar: SessionCalendar | None = None,
+                 max_gap_days: int | None = 8):
+        self.index = index
+        self.segment = exchange_segment or settings.EXCHANGE_SEGMENT
+        self.underlying = settings.OPTION_UNDERLYING if underlying is None else underlying
+        self.tick = tick
+        self.itm_steps = itm_steps
+        self.calendar = calendar or get_calendar()
+        self.max_gap_days = max_gap_days    # None: any listed expiry (e.g. monthly-only underlyings)
+        self._expiries = index.expiries(self.segment, self.underlying)
+        self._legs: dict[tuple, Leg | None] = {}
+        self.unresolved = 0     # signals without a tradable contract
+
+    def expiry_for(self, day: date) -> str | None:
+        i = bisect_left(self._expiries, day.isoformat())
+        if i == len(self._expiries):
+            return None
+        expiry = self._expiries[i]
+        if self.max_gap_days is not None:
+            due = self.calendar.next_expiry(day_id(day))
+            if day_id(date.fromisoformat(expiry)) - due > self.max_gap_days:
+                return None
+        return expiry
+
+    def resolve(self, day: date, spot: float, option_type: str) -> Leg | None:
+        expiry = self.expiry_for(day)
+        if expiry is None:
+            self.unresolved += 1
+            return None
+        # many signals share a strike: memoise on the rounded spot
+        key = (expiry, option_type, round(spot / self.tick))
+        if key not in self._legs:
+            try:
+                r = self.index.find_atm(spot, expiry, option_type, self.segment, self.tick,
+                                        self.itm_steps, self.underlying)
+            except ValueError:
+                r = None
+            self._legs[key] = None if r is None else Leg(
+                int(r["securityId"]), str(r.get("tradingSymbol", r["securityId"])), expiry,
+                float(r["drvStrikePrice"]), option_type)
+        if self._legs[key] is None:
+            self.unresolved += 1
+        return self._legs[key]
+
+    def selector(self, tz: str | None = None, exchange_segment: str | None = None):
+        # runtime.engine.SelectLeg over this resolver, for event-driven replays
+        tz = tz or settings.TIMEZONE
+        seg = exchange_segment or settings.OPTION_EXCHANGE_SEGMENT
+
+        def select(direction: str, spot: float, ts: float) -> dict | None:
+            leg = self.resolve(pd.Timestamp(ts, unit="s", tz="UTC").tz_convert(tz).date(), spot, direction)
+            if leg is None:
+                return None
+            return {"security_id": leg.security_id, "exchange_segment": seg, "symbol": leg.symbol,
+                    "strike": leg.strike, "expiry": leg.expiry}
+        return select
+
+def plan_legs(df: pd.DataFrame, p: Params, resolver: LegResolver) -> dict[int, Leg]:
+    # signal bar position -> contract
+    o = df["open"].to_numpy(np.float64)
+    c = df["close"].to_numpy(np.float64)
+    sig = signal_bars(session_tod(df.index), o, c, p)
+    days = df.index[sig].date
+    plan = {}
+    missed = resolver.unresolved
+    for k, d in zip(sig, days):
+        leg = resolver.resolve(d, c[k], "CALL" if c[k] > o[k] else "PUT")
+        if leg is not None:
+            plan[int(k)] = leg
+    missed = resolver.unresolved - missed
+    if missed:
+        listed = f"{resolver._expiries[0]}..{resolver._expiries[-1]}" if resolver._expiries else "none"
+        logger.warning(f"options: {missed} of {len(sig)} signal bar(s) have no tradable contract "
+                       f"(listed expiries: {listed}); they are skipped")
+    return plan
+
+def needed_days(df: pd.DataFrame, plan: dict[int, Leg]) -> dict[Leg, tuple[date, date]]:
+    # per contract, the day span its signals fall in (trades never outlive the session)
+    spans: dict[Leg, tuple[date, date]] = {}
+    days = df.index.date
+    for k, leg in plan.items():
+        d = days[k]
+        lo, hi = spans.get(leg, (d, d))
+        spans[leg] = (min(lo, d), max(hi, d))
+    return spans
+
+async def prefetch(client: DhanClient | None, store: BarStore, spans: dict[Leg, tuple[date, date]],
+                   interval: int, exchange_segment: str | None = None,
+                   max_concurrency: int = 8) -> dict[int, dict[str, np.ndarray]]:
+    # Fill the cache for every contract, then load (ts, close) per contract into memory.
+    # client=None -> offline: whatever is cached is used, uncovered signals are skipped.
+    seg = exchange_segment or settings.OPTION_EXCHANGE_SEGMENT
+    sem = asyncio.Semaphore(max_concurrency)
+    series: dict[int, dict[str, np.ndarray]] = {}
+
+    async def one(leg: Leg, lo: date, hi: date):
+        key = BarKey(leg.security_id, seg, interval)
+        live = {}
+        if client is not None:
+            async with sem:
+                try:
+                    live = await store.fill(client, key, lo, hi, instrument="OPTIDX")
+                except Exception as e:
+                    logger.warning(f"options: fetch failed for {leg.symbol} {lo}..{hi}: {e!r}")
+        parts = [store.load(key, lo, hi), *live.values()]
+        ts = np.concatenate([np.asarray(x["ts"], dtype=np.int64) for x in parts])
+        close = np.concatenate([np.asarray(x["close"], dtype=np.float64) for x in parts])
+        order = np.argsort(ts, kind="stable")
+        series[leg.security_id] = {"ts": ts[order], "close": close[order]}
+
+    logger.info(f"options: {len(spans)} contract(s) to prefetch")
+    await asyncio.gather(*(one(leg, lo, hi) for leg, (lo, hi) in spans.items()))
+    return series
+
+class OptionPricer:
+    # core.Pricer over in-memory contract series aligned to the spot bar timestamps
+    def __init__(self, index: pd.DatetimeIndex, plan: dict[int, Leg], series: dict[int, dict[str, np.ndarray]]):
+        self.ts = np.asarray(index.asi8 // NS_PER_SEC, dtype=np.int64)
+        self.day_start = self.ts - time_of_day_ns(index) // NS_PER_SEC
+        self.plan = plan
+        self.series = series
+        self.skipped = 0
+
+    def _at(self, ser: dict[str, np.ndarray], bars: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # last contract bar at or before each spot bar, same local day only
+        pos = np.searchsorted(ser["ts"], self.ts[bars], side="right") - 1
+        ok = pos >= 0
+        ok[ok] = ser["ts"][pos[ok]] >= self.day_start[bars[ok]]
+        return pos, ok
+
+    def __call__(self, s: int, bars: np.ndarray, direction: int):
+        leg = self.plan.get(s)
+        ser = self.series.get(leg.security_id) if leg is not None else None
+        if ser is None or len(ser["ts"]) == 0:
+            self.skipped += 1
+            return None
+        pos, ok = self._at(ser, np.array([s]))
+        if not ok[0]:
+            self.skipped += 1
+            return None
+        entry = float(ser["close"][pos[0]])
+        pos, ok = self._at(ser, bars)
+        # bars without a contract print hold the previous price (entry at first)
+        carry = np.maximum.accumulate(np.where(ok, np.arange(len(bars)), -1))
+        prices = np.where(carry >= 0, ser["close"][pos[np.maximum(carry, 0)]], entry) if len(bars) else np.empty(0)
+        return leg.security_id, entry, prices
+
+def simulate_options(df: pd.DataFrame, p: Params, plan: dict[int, Leg],
+                     series: dict[int, dict[str, np.ndarray]]) -> list[TradeLog]:
+    pricer = OptionPricer(df.index, plan, series)
+    res = simulate(session_tod(df.index), df["open"].to_numpy(np.float64),
+                   df["close"].to_numpy(np.float64), p, pricer)
+    if pricer.skipped:
+        logger.warning(f"options: {pricer.skipped} signal(s) skipped without contract bars")
+    symbols = {leg.security_id: leg.symbol for leg in plan.values()}
+    return to_trade_logs(res, df.index, p, symbols=symbols)
+
+async def run_option_backtest(client: DhanClient | None, df: pd.DataFrame, p: Params, interval: int = 5,
+                              index: InstrumentIndex | None = None, store: BarStore | None = None,
+                              max_concurrency: int = 8) -> list[TradeLog]:
+    # df: spot OHLC indexed by tz-aware ts, sorted ascending
+    index = index or InstrumentIndex.load(settings.INSTRUMENTS_CSV)
+    store = store or BarStore()
+    resolver = LegResolver(index, itm_steps=1 if p.slightly_itm else 0)
+    plan = plan_legs(df, p, resolver)
+    series = await prefetch(client, store, needed_days(df, plan), interval, max_concurrency=max_concurrency)
+    return simulate_options(df, p, plan, series)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from ..strategy.nifty_atm_option import Params
+from .core import CoreTrades, TradeLog, empty_trades, parse_tod, session_tod, simulate, to_trade_logs
+from .shm import SharedBars, attach_shared, shared_bars
+
+# Day-sharded execution of one long backtest. simulate() fully resets its state
+# on every bar stamped at start_time, so the bar ranges between two such bars are
+# independent. Shards are cut only at those reset bars (never at calendar
+# midnight), which keeps the output identical to the serial run even for days
+# whose start_time bar is missing and state carries over.
+
+_SHARD_TF = 0  # key of the single array set in shared memory
+
+def shard_bounds(tod: np.ndarray, p: Params, shards: int) -> list[tuple[int, int]]:
+    n = len(tod)
+    cuts = np.flatnonzero(tod == parse_tod(p.start_time))
+    if n == 0 or shards <= 1 or len(cuts) < 2:
+        return [(0, n)]
+    # cut positions balanced by bar count
+    want = np.linspace(0, n, shards + 1)[1:-1]
+    picks = np.unique(cuts[np.clip(np.searchsorted(cuts, want), 0, len(cuts) - 1)])
+    edges = [0] + [int(x) for x in picks if 0 < x < n] + [n]
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+def _run_shard(args: tuple[int, int, Params]) -> CoreTrades:
+    lo, hi, p = args
+    bars = shared_bars(_SHARD_TF)
+    res = simulate(bars["tod"][lo:hi], bars["open"][lo:hi], bars["close"][lo:hi], p)
+    res.entry_idx += lo
+    res.exit_idx += lo
+    return res
+
+def merge(parts: list[CoreTrades]) -> CoreTrades:
+    # shards are contiguous in time, so ordering by entry bar == timestamp order
+    parts = [r for r in parts if len(r)]
+    if not parts:
+        return empty_trades()
+    fields = CoreTrades.__dataclass_fields__
+    merged = CoreTrades(**{f: np.concatenate([getattr(r, f) for r in parts]) for f in fields})
+    order = np.argsort(merged.entry_idx, kind="stable")
+    return CoreTrades(**{f: getattr(merged, f)[order] for f in fields})
+
+def simulate_sharded(tod: np.ndarray, open_: np.ndarray, close: np.ndarray, p: Params,
+                     workers: int | None = None, shards_per_worker: int = 4) -> CoreTrades:
+    workers = workers or os.cpu_count() or 1
+    bounds = shard_bounds(tod, p, workers * shards_per_worker)
+    if workers <= 1 or len(bounds) <= 1:
+        return simulate(tod, open_, close, p)
+    shared = SharedBars({_SHARD_TF: {"tod": tod, "open": open_, "close": close}})
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_shared, initargs=(shared.layout,)) as ex:
+            parts = list(ex.map(_run_shard, [(a, b, p) for a, b in bounds]))
+    finally:
+        shared.close()
+    return merge(parts)
+
+def simulate_frame_sharded(df: pd.DataFrame, p: Params, workers: int | None = None) -> list[TradeLog]:
+    res = simulate_sharded(session_tod(df.index), df["open"].to_numpy(np.float64),
+                           df["close"].to_numpy(np.float64), p, workers)
+    return to_trade_logs(res, df.index, p)
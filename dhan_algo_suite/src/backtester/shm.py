@@ -0,0 +1,52 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+import numpy as np
+
+# One read-only copy of bar arrays shared by every worker of a process pool.
+# The parent packs {timeframe: {column: array}} into a single SharedMemory block;
+# workers call attach_shared(layout) from the pool initializer and then read
+# zero-copy views through shared_bars().
+
+@dataclass
+class SharedArraySpec:
+    name: str
+    dtype: str
+    offset: int
+    length: int
+
+class SharedBars:
+    def __init__(self, frames: dict[int, dict[str, np.ndarray]]):
+        total = sum(a.nbytes for cols in frames.values() for a in cols.values())
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        self.layout: dict[int, dict[str, SharedArraySpec]] = {}
+        off = 0
+        for tf, cols in frames.items():
+            self.layout[tf] = {}
+            for k, a in cols.items():
+                a = np.ascontiguousarray(a)
+                np.ndarray(a.shape, a.dtype, buffer=self.shm.buf, offset=off)[:] = a
+                self.layout[tf][k] = SharedArraySpec(self.shm.name, a.dtype.str, off, len(a))
+                off += a.nbytes
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+_SHM: shared_memory.SharedMemory | None = None
+_BARS: dict[int, dict[str, np.ndarray]] = {}
+
+def attach_shared(layout: dict[int, dict[str, SharedArraySpec]]):
+    global _SHM, _BARS
+    name = next(iter(next(iter(layout.values())).values())).name
+    _SHM = shared_memory.SharedMemory(name=name)
+    _BARS = {}
+    for tf, cols in layout.items():
+        _BARS[tf] = {}
+        for k, s in cols.items():
+            a = np.ndarray((s.length,), np.dtype(s.dtype), buffer=_SHM.buf, offset=s.offset)
+            a.flags.writeable = False
+            _BARS[tf][k] = a
+
+def shared_bars(timeframe: int) -> dict[str, np.ndarray]:
+    return _BARS[timeframe]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import argparse, asyncio, csv, itertools, os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..config import settings
+from ..dhan_client import DhanClient
+from ..strategy.nifty_atm_option import Params
+from .core import CoreTrades, resample_session, session_tod, simulate
+from .engine import load_spot_bars, month_ago
+from .shm import SharedBars, attach_shared, shared_bars
+from ..utils import now_local
+
+# Parameter sweep over NiftyATMOptionStrategy Params. The parent loads bars once,
+# derives one (tod, open, close) set per timeframe and places them all in a single
+# shared-memory block; workers attach read-only views instead of receiving pickles.
+
+RESULT_FIELDS = ["sl_per_unit", "big_candle_points", "tsl_steps", "max_daily_sls", "timeframe_min",
+                 "start_time", "end_time", "net_pnl", "max_drawdown", "trades", "sl_hits", "win_rate"]
+
+def metrics(res: CoreTrades, p: Params) -> dict:
+    n = len(res)
+    if n == 0:
+        return {"net_pnl": 0.0, "max_drawdown": 0.0, "trades": 0, "sl_hits": 0, "win_rate": 0.0}
+    equity = np.cumsum(res.pnl)
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    unit = res.exit_price - res.entry_price
+    return {
+        "net_pnl": float(equity[-1]),
+        "max_drawdown": float((peak - equity).max()),
+        "trades": n,
+        "sl_hits": int((unit <= -p.sl_per_unit + 1e-6).sum()),
+        "win_rate": float((res.pnl > 0).mean()),
+    }
+
+def _evaluate(combo: dict) -> dict:
+    p = Params(**combo)
+    bars = shared_bars(p.timeframe_min)
+    res = simulate(bars["tod"], bars["open"], bars["close"], p)
+    row = dict(combo)
+    row["tsl_steps"] = format_tsl(p.tsl_steps)
+    row.update(metrics(res, p))
+    return row
+
+def format_tsl(steps: list[tuple[float, float]]) -> str:
+    return ",".join(f"{g:g}/{o:g}" for g, o in steps)
+
+def parse_values(spec: str, cast=float) -> list:
+    # "15,20,25" or inclusive range "10:30:5"
+    if ":" in spec and cast is not str:
+        lo, hi, step = (float(x) for x in spec.split(":"))
+        vals = np.arange(lo, hi + step / 2, step)
+        return [cast(v) for v in vals]
+    return [cast(v) for v in spec.split(",")]
+
+def parse_tsl_sets(spec: str) -> list[list[tuple[float, float]]]:
+    # "5/10,13/20,20/30;5/10,10/20" -> two ladders
+    return [[tuple(float(x) for x in step.split("/")) for step in ladder.split(",")]
+            for ladder in spec.split(";")]
+
+def build_grid(sl: list[float], big: list[float], tsl: list[list[tuple[float, float]]], max_sls: list[int],
+               timeframes: list[int], starts: list[str], ends: list[str], lot_qty: int = 75) -> list[dict]:
+    return [
+        dict(lot_qty=lot_qty, sl_per_unit=a, big_candle_points=b, tsl_steps=c, max_daily_sls=d,
+             timeframe_min=e, start_time=f, end_time=g)
+        for a, b, c, d, e, f, g in itertools.product(sl, big, tsl, max_sls, timeframes, starts, ends)
+    ]
+
+def _sim_arrays(bars: pd.DataFrame) -> dict[str, np.ndarray]:
+    return {"tod": session_tod(bars.index), "open": bars["open"].to_numpy(np.float64),
+            "close": bars["close"].to_numpy(np.float64)}
+
+def frames_for(df: pd.DataFrame, timeframes: list[int], base_interval: int) -> dict[int, dict[str, np.ndarray]]:
+    # df: sorted, ts-indexed base bars
+    out = {}
+    for tf in sorted(set(timeframes)):
+        if tf % base_interval:
+            raise ValueError(f"timeframe {tf}m is not a multiple of base interval {base_interval}m")
+        out[tf] = _sim_arrays(df if tf == base_interval else resample_session(df, tf))
+    return out
+
+def run_sweep(df: pd.DataFrame | None, grid: list[dict], base_interval: int | None = None, workers: int | None = None,
+              out_csv: str = "sweep_results.csv", rank_by: str = "net_pnl",
+              frames: dict[int, dict[str, np.ndarray]] | None = None) -> pd.DataFrame:
+    # frames (timeframe -> arrays, e.g. from load_frames) replace resampling df in-process
+    if frames is None:
+        frames = frames_for(df, [g["timeframe_min"] for g in grid], base_interval)
+    shared = SharedBars(frames)
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(grid) // (workers * 8))
+    root, ext = os.path.splitext(out_csv)
+    stream_csv = f"{root}_stream{ext or '.csv'}"
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_shared, initargs=(shared.layout,)) as ex, \
+                open(stream_csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            w.writeheader()
+            for k, row in enumerate(ex.map(_evaluate, grid, chunksize=chunk), 1):
+                rows.append(row)
+                w.writerow(row)
+                if k % 500 == 0:
+                    f.flush()
+                    logger.info(f"sweep: {k}/{len(grid)} done")
+    finally:
+        shared.close()
+    # best rank_by first (lowest drawdown when ranking by it), ties on lower drawdown
+    keys = [rank_by] if rank_by == "max_drawdown" else [rank_by, "max_drawdown"]
+    ranked = pd.DataFrame(rows, columns=RESULT_FIELDS).sort_values(
+        keys, ascending=[k == "max_drawdown" for k in keys]).reset_index(drop=True)
+    ranked.to_csv(out_csv, index=False)
+    return ranked
+
+async def load_bars(months: int, interval: int, offline: bool) -> pd.DataFrame:
+    now = now_local(settings.peek("TIMEZONE"))
+    start = month_ago(now, months)
+    if offline:
+        df = await load_spot_bars(None, start, now, interval)
+    else:
+        client = DhanClient()
+        try:
+            df = await load_spot_bars(client, start, now, interval)
+        finally:
+            await client.close()
+    return df.set_index("ts").sort_index()
+
+async def load_frames(months: int, timeframes: list[int], offline: bool) -> dict[int, dict[str, np.ndarray]]:
+    # every timeframe straight from the bar pyramid: derived levels are cached, so
+    # a later sweep over the same timeframes only memory-maps them
+    now = now_local(settings.peek("TIMEZONE"))
+    start = month_ago(now, months)
+    client = None if offline else DhanClient()
+    try:
+        return {tf: _sim_arrays((await load_spot_bars(client, start, now, tf)).set_index("ts").sort_index())
+                for tf in sorted(set(timeframes))}
+    finally:
+        if client is not None:
+            await client.close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--months", type=int, default=12)
+    ap.add_argument("--interval", type=int, default=None,
+                    help="load one interval and resample in-process (default: per-timeframe bars from the cache)")
+    ap.add_argument("--lot", type=int, default=75)
+    ap.add_argument("--sl", default="20", help="sl_per_unit values, e.g. 15,20,25 or 10:30:5")
+    ap.add_argument("--big", default="15", help="big_candle_points values")
+    ap.add_argument("--tsl", default="5/10,13/20,20/30", help="tsl ladders: gain/offset,...;gain/offset,...")
+    ap.add_argument("--max-sls", default="3")
+    ap.add_argument("--timeframes", default="5", help="timeframe_min values (multiples of --interval if given)")
+    ap.add_argument("--start-time", default="09:15")
+    ap.add_argument("--end-time", default="15:15")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--rank-by", default="net_pnl", choices=["net_pnl", "max_drawdown", "trades", "win_rate"])
+    ap.add_argument("--offline", action="store_true", help="use cached bars only")
+    ap.add_argument("--out", default="sweep_results.csv")
+    args = ap.parse_args()
+    grid = build_grid(parse_values(args.sl), parse_values(args.big), parse_tsl_sets(args.tsl),
+                      parse_values(args.max_sls, int), parse_values(args.timeframes, int),
+                      parse_values(args.start_time, str), parse_values(args.end_time, str), args.lot)
+    if args.interval is not None:
+        bars, frames = asyncio.run(load_bars(args.months, args.interval, args.offline)), None
+        logger.info(f"sweep: {len(grid)} combinations over {len(bars)} bars")
+    else:
+        bars, frames = None, asyncio.run(load_frames(args.months, [g["timeframe_min"] for g in grid], args.offline))
+        sizes = ", ".join(f"{tf}m: {len(f['tod'])}" for tf, f in frames.items())
+        logger.info(f"sweep: {len(grid)} combinations over {sizes} bars")
+    print(run_sweep(bars, grid, args.interval, args.workers, args.out, args.rank_by, frames).head(20).to_string())
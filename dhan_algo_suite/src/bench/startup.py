@@ -0,0 +1,112 @@
+from __future__ import annotations
+import argparse, json, os, subprocess, sys
+from pathlib import Path
+
+# Cold start benchmark. Every subsystem is imported in a fresh interpreter (best
+# of --repeat) and checked against its budget; "app_ready" is import of the web
+# app plus startup until the first /healthz answer. Importing the app must not
+# pull in any of LAZY_MODULES -- those belong to the subsystems it loads later.
+#   python -m bench.startup                    # fails (exit 1) over budget
+#   python -m bench.startup --scale 2          # slower machine: budgets x2
+
+ROOT = Path(__file__).resolve().parents[3]   # directory holding the dhan_algo_suite package
+PKG = "dhan_algo_suite.src"
+
+SUBSYSTEMS: dict[str, tuple[str, ...]] = {
+    "app": ("dhan_algo_suite.app",),
+    "config": (f"{PKG}.config",),
+    "telegram": ("dhan_algo_suite.telegram_bot",),
+    "trading": (f"{PKG}.runtime.runner", f"{PKG}.live.trader", f"{PKG}.simulator.paper_engine"),
+    "data": (f"{PKG}.storage.bar_store", f"{PKG}.storage.trade_store", f"{PKG}.storage.tick_journal",
+             f"{PKG}.instruments"),
+    "reporting": (f"{PKG}.reporting.report", f"{PKG}.reporting.risk"),
+    "backtest": (f"{PKG}.backtester.engine", f"{PKG}.backtester.sweep"),
+}
+
+# milliseconds, fresh interpreter, 1 CPU container
+BUDGETS_MS = {"app": 1500, "app_ready": 2000, "config": 400, "telegram": 2000, "trading": 2000, "data": 1500,
+              "reporting": 1500, "backtest": 2000}
+
+LAZY_MODULES = ("pandas", "numpy", "sqlalchemy", "telegram", "httpx", "websockets")
+
+_IMPORT = """
+import sys, time, json
+t = time.perf_counter()
+for m in {mods!r}:
+    __import__(m)
+print(json.dumps({{"ms": (time.perf_counter() - t) * 1000,
+                  "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+_READY = """
+import sys, time, json, asyncio
+import httpx   # the test client's own import is not part of the app's start
+t = time.perf_counter()
+import dhan_algo_suite.app as A
+
+async def main():
+    await A.startup_event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=A.app), base_url="http://bench") as c:
+        r = await c.get("/healthz")
+    ms = (time.perf_counter() - t) * 1000
+    await A.shutdown_event()
+    return r.status_code, ms
+
+code, ms = asyncio.run(main())
+print(json.dumps({"ms": ms, "status": code}))
+"""
+
+def _env() -> dict:
+    # placeholders for required settings; the Bot API points nowhere so nothing leaves the machine
+    env = dict(os.environ)
+    for k, v in (("DHAN_ACCESS_TOKEN", "bench"), ("TELEGRAM_BOT_TOKEN", "1:bench"), ("TELEGRAM_CHAT_ID", "1")):
+        env.setdefault(k, v)
+    env.update(TELEGRAM_API_URL="http://127.0.0.1:9", RUN_MODE="backtest", STARTUP_MODE="background")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(ROOT), env.get("PYTHONPATH")) if p)
+    return env
+
+def _run(code: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_env(), cwd=ROOT)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def measure(name: str, repeat: int = 3) -> dict:
+    code = _READY if name == "app_ready" else _IMPORT.format(mods=SUBSYSTEMS[name], lazy=LAZY_MODULES)
+    runs = [_run(code) for _ in range(max(repeat, 1))]
+    best = min(runs, key=lambda r: r["ms"])
+    return {**best, "ms": round(best["ms"], 1)}
+
+def check(results: dict[str, dict], scale: float = 1.0) -> list[str]:
+    failures = []
+    for name, r in results.items():
+        budget = BUDGETS_MS.get(name)
+        if budget is not None and r["ms"] > budget * scale:
+            failures.append(f"{name}: {r['ms']:.0f} ms over budget {budget * scale:.0f} ms")
+    leaked = results.get("app", {}).get("loaded")
+    if leaked:
+        failures.append(f"app: importing the app loaded {', '.join(leaked)}")
+    if results.get("app_ready", {}).get("status", 200) != 200:
+        failures.append(f"app_ready: /healthz answered {results['app_ready']['status']}")
+    return failures
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subsystems", default=None, help="comma-separated subset (default: all + app_ready)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    names = args.subsystems.split(",") if args.subsystems else [*SUBSYSTEMS, "app_ready"]
+    results = {n: measure(n, args.repeat) for n in names}
+    failures = check(results, args.scale)
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    else:
+        for n, r in results.items():
+            budget = BUDGETS_MS.get(n)
+            print(f"{n:<12} {r['ms']:>8.0f} ms  budget {budget * args.scale if budget else float('nan'):>6.0f} ms"
+                  + (f"  loaded {','.join(r['loaded'])}" if r.get("loaded") else ""))
+        for f in failures:
+            print(f"OVER BUDGET {f}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+import argparse, asyncio, contextlib, gc, io, json, os, platform, shutil, sys, tempfile, time, tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cached_property
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..backtester.core import simulate_frame
+from ..backtester.engine import run_backtest
+from ..config import settings
+from ..feed.candles import CandleAggregator, quote_ticks
+from ..feed.live_feed import LiveFeed, decode, serve_replay
+from ..feed.quotes import QuoteBatcher
+from ..instruments import InstrumentIndex, find_atm_option
+from ..reporting.report import summarize
+from ..reporting.risk import monte_carlo, risk_metrics, trade_arrays
+from ..runtime.engine import StrategyRuntime, spot_leg
+from ..runtime.sim import SimExecutor
+from ..runtime.sources import FrameReplaySource
+from ..session_calendar import get_calendar
+from ..storage.bar_pyramid import BarPyramid
+from ..storage.bar_store import BarKey, BarStore
+from ..storage.trade_store import TradeStore
+from ..strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
+from . import synthetic
+
+# Offline benchmark suite. Every case builds its inputs from the deterministic
+# synthetic generator inside a throwaway workspace (bar cache, trade store,
+# tick journal and cwd all point into a temp dir), then times a runner that
+# returns the number of items it processed. Throughput is best-of-N wall time;
+# peak memory comes from one extra tracemalloc run. Results are compared
+# against baselines.json and the run fails when a case gets slower or uses
+# more memory than the tolerance allows.
+#   python -m bench.suite                      # compare against baselines
+#   python -m bench.suite --update             # record new baselines
+#   python -m bench.suite --cases backtest,find_atm_option
+
+BASELINES = Path(__file__).with_name("baselines.json")
+MEM_SLACK_MB = 1.0   # absolute headroom so tiny cases don't fail on allocator noise
+
+Runner = Callable[[], int]
+
+@dataclass
+class Case:
+    name: str
+    unit: str
+    setup: Callable[["Workspace"], Runner]
+
+CASES: dict[str, Case] = {}
+
+def case(name: str, unit: str):
+    def register(fn: Callable[["Workspace"], Runner]):
+        CASES[name] = Case(name, unit, fn)
+        return fn
+    return register
+
+class Workspace:
+    # temp dir the settings and cwd point at while cases run; synthetic data is built once
+    def __init__(self, root: Path, years: float = 2.0, seed: int = 0):
+        self.root = root
+        self.years = years
+        self.seed = seed
+        self.end = date.today() - timedelta(days=1)
+        self.calendar = get_calendar()
+        self._saved: dict = {}
+
+    def __enter__(self) -> "Workspace":
+        self._saved = {k: getattr(settings, k) for k in ("BAR_CACHE_DIR", "DB_URL", "TICK_JOURNAL_DIR",
+                                                          "INSTRUMENTS_CSV")}
+        self._saved["cwd"] = os.getcwd()
+        settings.BAR_CACHE_DIR = str(self.root / "bars")
+        settings.DB_URL = f"sqlite:///{self.root / 'bench.db'}"
+        settings.TICK_JOURNAL_DIR = str(self.root / "ticks")
+        settings.INSTRUMENTS_CSV = str(self.root / "instruments.csv")
+        os.chdir(self.root)
+        return self
+
+    def __exit__(self, *exc):
+        os.chdir(self._saved.pop("cwd"))
+        for k, v in self._saved.items():
+            setattr(settings, k, v)
+
+    @cached_property
+    def bars(self) -> pd.DataFrame:
+        return synthetic.minute_bars(self.years, self.end, self.seed, calendar=self.calendar)
+
+    @cached_property
+    def instruments(self) -> pd.DataFrame:
+        return synthetic.instrument_master(self.end - timedelta(weeks=26), weeks=52, calendar=self.calendar)
+
+    @cached_property
+    def bar_cache(self) -> int:
+        # 5-minute underlying bars in the BarStore, as run_backtest --cache offline reads them
+        key = BarKey(settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT, 5)
+        return synthetic.fill_store(BarStore(), key, self.bars)
+
+    def session_day(self) -> date:
+        return self.calendar.trading_days_between(self.end - timedelta(days=10), self.end)[-1]
+
+# --- cases ---
+@case("backtest", "bars/s")
+def _backtest(ws: Workspace) -> Runner:
+    ws.bar_cache
+    months = 12
+    start = pd.Timestamp(ws.end - timedelta(days=30 * months), tz=settings.TIMEZONE)
+    n = int((ws.bars.index >= start).sum()) // 5
+
+    def run() -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(run_backtest(months, cache="offline"))
+        return n
+    return run
+
+@case("bar_pyramid", "bars/s")
+def _bar_pyramid(ws: Workspace) -> Runner:
+    # derive 15m from cached 1m base days, then load the derived level back
+    store = BarStore(ws.root / "pyramid")
+    key = BarKey(settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT, 1)
+    n = synthetic.fill_store(store, key, ws.bars)
+    pyramid = BarPyramid(store, base=1)
+    lo, hi = ws.bars.index[0].date(), ws.end
+
+    def run() -> int:
+        shutil.rmtree(BarKey(key.security_id, key.exchange_segment, 15).path(store.root), ignore_errors=True)
+        pyramid.derive(key.security_id, key.exchange_segment, 15, lo, hi)
+        store.load(BarKey(key.security_id, key.exchange_segment, 15), lo, hi)
+        return n
+    return run
+
+@case("core_simulate_1m", "bars/s")
+def _core_simulate(ws: Workspace) -> Runner:
+    df, p = ws.bars, Params()
+    return lambda: (simulate_frame(df, p), len(df))[1]
+
+@case("find_atm_option", "lookups/s")
+def _find_atm_option(ws: Workspace) -> Runner:
+    df = ws.instruments
+    rng = np.random.default_rng(ws.seed)
+    expiries = df["drvExpiryDate"].unique()
+    queries = list(zip((22000 + rng.normal(0, 400, 300)).tolist(), expiries[rng.integers(0, len(expiries), 300)],
+                       np.where(rng.random(300) < 0.5, "CALL", "PUT")))
+
+    def run() -> int:
+        for ltp, exp, opt in queries:
+            find_atm_option(df, ltp, exp, opt, exchange_segment="NSE_FNO")
+        return len(queries)
+    return run
+
+@case("instrument_index", "lookups/s")
+def _instrument_index(ws: Workspace) -> Runner:
+    idx = InstrumentIndex.build(ws.instruments)
+    rng = np.random.default_rng(ws.seed)
+    expiries = ws.instruments["drvExpiryDate"].unique()
+    queries = list(zip((22000 + rng.normal(0, 400, 100_000)).tolist(),
+                       expiries[rng.integers(0, len(expiries), 100_000)].tolist(),
+                       np.where(rng.random(100_000) < 0.5, "CALL", "PUT").tolist()))
+
+    def run() -> int:
+        find = idx.find_atm
+        for ltp, exp, opt in queries:
+            find(ltp, exp, opt, "NSE_FNO")
+        return len(queries)
+    return run
+
+@case("step_tsl", "calls/s")
+def _step_tsl(ws: Workspace) -> Runner:
+    strat = NiftyATMOptionStrategy(Params())
+    rng = np.random.default_rng(ws.seed)
+    entry = (200 + rng.normal(0, 20, 200_000)).tolist()
+    hw = [e + g for e, g in zip(entry, rng.uniform(0, 40, 200_000).tolist())]
+
+    def run() -> int:
+        f = strat.step_tsl
+        for e, h in zip(entry, hw):
+            f(e, h)
+        return len(entry)
+    return run
+
+@case("momentum_from_bar", "calls/s")
+def _momentum_from_bar(ws: Workspace) -> Runner:
+    strat = NiftyATMOptionStrategy(Params())
+    o = ws.bars["open"].to_numpy()[:200_000].tolist()
+    c = ws.bars["close"].to_numpy()[:200_000].tolist()
+
+    def run() -> int:
+        f = strat.momentum_from_bar
+        for a, b in zip(o, c):
+            f(a, b)
+        return len(o)
+    return run
+
+@case("momentum_trigger", "calls/s")
+def _momentum_trigger(ws: Workspace) -> Runner:
+    # DataFrame form, as the iterrows reference engine calls it (one-row slice per bar)
+    strat = NiftyATMOptionStrategy(Params())
+    df = ws.bars.iloc[:5_000]
+
+    def run() -> int:
+        f = strat.momentum_trigger
+        for k in range(len(df)):
+            f(df.iloc[k:k + 1])
+        return len(df)
+    return run
+
+@case("quote_batcher", "quotes/s")
+def _quote_batcher(ws: Workspace) -> Runner:
+    ids = list(range(50_000, 50_500))
+
+    async def rounds(n: int) -> int:
+        q = QuoteBatcher(synthetic.QuoteSource(ws.seed), window=0.0, ttl=0.0)
+        for _ in range(n):
+            await asyncio.gather(*(q.get(sid, "NSE_FNO") for sid in ids))
+        return q.quotes_served
+    return lambda: asyncio.run(rounds(40))
+
+@case("quote_candles", "ticks/s")
+def _quote_candles(ws: Workspace) -> Runner:
+    # polled quote responses -> quote_ticks -> 1/5-minute candles, as QuotePollSource feeds the runtime
+    rng = np.random.default_rng(ws.seed)
+    ids = list(range(50_000, 50_200))
+    t0 = ws.calendar.session(ws.calendar.day_of(pd.Timestamp(ws.session_day(), tz=settings.TIMEZONE).timestamp()))[0]
+    resps = [(t0 + 3 * k, synthetic.quote_response("NSE_FNO", ids, 200 + rng.normal(0, 5, len(ids)),
+                                                   rng.integers(0, 10**6, len(ids))))
+             for k in range(500)]
+
+    def run() -> int:
+        agg = CandleAggregator([1, 5], settings.TIMEZONE)
+        n = 0
+        for ts, resp in resps:
+            for seg, sid, ltp, vol in quote_ticks(resp):
+                agg.on_tick((seg, sid), ltp, ts, vol)
+                n += 1
+        return n
+    return run
+
+@case("feed_decode", "packets/s")
+def _feed_decode(ws: Workspace) -> Runner:
+    frames = synthetic.tick_frames(ws.session_day(), 200_000, (13, 25, 51), ws.seed, calendar=ws.calendar)
+
+    def run() -> int:
+        n = 0
+        for fr in frames:
+            for _ in decode(fr):
+                n += 1
+        return n
+    return run
+
+@case("feed_websocket", "packets/s")
+def _feed_websocket(ws: Workspace) -> Runner:
+    # recorded frames from the local websocket stand-in through LiveFeed's receive path (decode -> queue)
+    frames = synthetic.tick_frames(ws.session_day(), 50_000, (13, 25, 51), ws.seed, calendar=ws.calendar)
+
+    async def replay() -> int:
+        server = await serve_replay(frames, port=0)
+        feed = LiveFeed(url=f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}", queue_size=len(frames))
+        task = asyncio.create_task(feed.run())
+        try:
+            for _ in frames:
+                await feed.queue.get()
+        finally:
+            feed.stop()
+            task.cancel()
+            server.close()
+            await server.wait_closed()
+        return feed.stats["packets"]
+    return lambda: asyncio.run(replay())
+
+@case("feed_replay", "ticks/s")
+def _feed_replay(ws: Workspace) -> Runner:
+    # recorded-style frames through the paper runtime (decode -> candles -> signals -> sim fills)
+    sid, seg = settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT
+    frames = synthetic.tick_frames(ws.session_day(), 100_000, (sid,), ws.seed, calendar=ws.calendar)
+
+    async def replay() -> int:
+        strat = NiftyATMOptionStrategy(Params())
+        rt = StrategyRuntime(strat, SimExecutor(strat), spot_leg(sid, seg), calendar=ws.calendar)
+        await rt.run(FrameReplaySource(frames))
+        return rt.events
+    return lambda: asyncio.run(replay())
+
+@case("summarize", "trades/s")
+def _summarize(ws: Workspace) -> Runner:
+    store = TradeStore()
+    trades = synthetic.trade_logs(20_000, ws.years, ws.end, ws.seed, calendar=ws.calendar)
+    store.replace(trades, "bench", "backtest")
+
+    def run() -> int:
+        for _ in range(20):
+            summarize("bench", "backtest", store)
+        return 20 * len(trades)
+    return run
+
+@case("monte_carlo", "paths/s")
+def _monte_carlo(ws: Workspace) -> Runner:
+    # risk metrics plus bootstrap and shuffle paths over a multi-year trade log
+    a = trade_arrays(synthetic.trade_logs(1500, ws.years, ws.end, ws.seed, calendar=ws.calendar))
+    sims = 5_000
+
+    def run() -> int:
+        risk_metrics(a)
+        for method in ("bootstrap", "shuffle"):
+            monte_carlo(a.pnl, sims, method, seed=ws.seed)
+        return 2 * sims
+    return run
+
+# --- measurement ---
+def measure(run: Runner, repeat: int = 5) -> dict:
+    best, items = float("inf"), 0
+    for _ in range(max(repeat, 1)):
+        gc.collect()
+        t0 = time.perf_counter()
+        items = run()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"items": items, "seconds": round(best, 6), "rate": items / best if best > 0 else float("inf"),
+            "peak_mb": round(peak / 2**20, 3)}
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__}
+
+def compare(results: dict[str, dict], baselines: dict[str, dict], tolerance: float = 0.25,
+            mem_tolerance: float = 0.25) -> list[str]:
+    # regressions: throughput below (1 - tolerance) x baseline or peak memory above (1 + mem_tolerance) x baseline
+    failures = []
+    for name, r in results.items():
+        b = baselines.get(name)
+        if b is None:
+            continue
+        if r["rate"] < b["rate"] * (1 - tolerance):
+            failures.append(f"{name}: {r['rate']:,.0f} {r['unit']} vs baseline {b['rate']:,.0f} "
+                            f"({r['rate'] / b['rate'] - 1:+.0%})")
+        if r["peak_mb"] > b["peak_mb"] * (1 + mem_tolerance) + MEM_SLACK_MB:
+            failures.append(f"{name}: peak {r['peak_mb']:.1f} MB vs baseline {b['peak_mb']:.1f} MB")
+    return failures
+
+def load_baselines(path: Path = BASELINES) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {"machine": {}, "cases": {}}
+
+def run_suite(names: list[str] | None = None, years: float = 2.0, repeat: int = 5, seed: int = 0) -> dict[str, dict]:
+    names = names or list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        raise ValueError(f"unknown case(s): {', '.join(unknown)}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="dhan-bench-") as tmp, Workspace(Path(tmp), years, seed) as ws:
+        for name in names:
+            c = CASES[name]
+            run = c.setup(ws)
+            results[name] = {"unit": c.unit, **measure(run, repeat)}
+            r = results[name]
+            print(f"{name:20s} {r['rate']:>14,.0f} {c.unit:10s} {r['seconds'] * 1000:>9.1f} ms  "
+                  f"peak {r['peak_mb']:8.1f} MB", flush=True)
+    return results
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", type=str, default=None, help="comma-separated subset (default: all)")
+    ap.add_argument("--years", type=float, default=2.0, help="years of synthetic 1-minute bars")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per case (best is kept)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed throughput drop vs baseline")
+    ap.add_argument("--mem-tolerance", type=float, default=0.25, help="allowed peak memory growth vs baseline")
+    ap.add_argument("--baseline", type=str, default=str(BASELINES))
+    ap.add_argument("--update", action="store_true", help="write the results as the new baselines")
+    args = ap.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = run_suite(args.cases.split(",") if args.cases else None, args.years, args.repeat, args.seed)
+    path = Path(args.baseline)
+    stored = load_baselines(path)
+    if args.update:
+        stored["machine"] = machine()
+        stored["cases"].update({k: {f: v[f] for f in ("unit", "rate", "peak_mb")} for k, v in results.items()})
+        path.write_text(json.dumps(stored, indent=2) + "\n")
+        print(f"baselines written to {path}")
+        sys.exit(0)
+    if stored["machine"] and stored["machine"] != machine():
+        logger.warning(f"baselines were recorded on {stored['machine']}; throughput may not be comparable")
+    new = [k for k in results if k not in stored["cases"]]
+    if new:
+        print(f"no baseline yet: {', '.join(new)}")
+    failures = compare(results, stored["cases"], args.tolerance, args.mem_tolerance)
+    for f in failures:
+        print(f"REGRESSION {f}")
+    sys.exit(1 if failures else 0)
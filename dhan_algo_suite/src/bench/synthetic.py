@@ -0,0 +1,122 @@
+from __future__ import annotations
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from ..backtester.core import TradeLog, resample_session
+from ..feed.live_feed import QUOTE, _QUOTE
+from ..session_calendar import SessionCalendar, day_id, get_calendar
+from ..storage.bar_store import BarKey, BarStore
+
+# Deterministic synthetic market data for offline benchmarks: the same
+# arguments and seed always give the same bars, instruments, frames and trades.
+# Timestamps follow the session calendar (trading days only, 09:15-15:29
+# one-minute bars, weekly expiries on the calendar's expiry days).
+
+SESSION_MINUTES = 375
+STRIKE_STEP = 50
+
+def minute_bars(years: float = 2.0, end: date | None = None, seed: int = 0, level: float = 22000.0,
+                calendar: SessionCalendar | None = None) -> pd.DataFrame:
+    # NIFTY-like 1-minute OHLCV ending at `end` (default: yesterday), tz-aware index
+    cal = calendar or get_calendar()
+    end = end or date.today() - timedelta(days=1)
+    days = cal.trading_days_between(end - timedelta(days=int(365 * years)), end)
+    rng = np.random.default_rng(seed)
+    n = len(days) * SESSION_MINUTES
+    base = np.repeat(np.array([day_id(d) for d in days], dtype=np.int64) * 86_400 - cal.offset + 9 * 3600 + 15 * 60,
+                     SESSION_MINUTES)
+    ts = base + np.tile(np.arange(SESSION_MINUTES, dtype=np.int64) * 60, len(days))
+    # random walk with fat-tailed shocks so momentum candles (and SL exits) occur
+    step = rng.standard_t(4, n) * 3.0 * level / 22000.0
+    close = level + np.cumsum(step)
+    open_ = np.concatenate(([level], close[:-1])) + rng.normal(0, 0.5, n)
+    wick = np.abs(rng.normal(0, 2.0, (2, n)))
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + wick[0], "low": np.minimum(open_, close) - wick[1],
+        "close": close, "volume": rng.integers(1_000, 50_000, n).astype(np.float64),
+    }, index=pd.to_datetime(ts, unit="s", utc=True).tz_convert(cal.tz).rename("ts"))
+
+def fill_store(store: BarStore, key: BarKey, df: pd.DataFrame) -> int:
+    # write bars (resampled to key.interval) into the cache day by day; returns bars written
+    bars = df if key.interval == 1 else resample_session(df, key.interval)
+    ts = bars.index.asi8 // 1_000_000_000
+    days = bars.index.tz_localize(None).normalize()
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    ends = np.r_[starts[1:], len(bars)]
+    for lo, hi in zip(starts, ends):
+        store.write_day(key, days[lo].date(), {
+            "ts": ts[lo:hi], **{c: bars[c].to_numpy(np.float64)[lo:hi] for c in ("open", "high", "low", "close", "volume")},
+        })
+    return len(bars)
+
+def instrument_master(start: date, weeks: int = 12, level: float = 22000.0, strikes_each_side: int = 40,
+                      underlying: str = "NIFTY", exchange_segment: str = "NSE_FNO",
+                      calendar: SessionCalendar | None = None) -> pd.DataFrame:
+    # Dhan-style instrument list: CE/PE for every strike of every weekly expiry
+    cal = calendar or get_calendar()
+    expiries = [d for d in cal.trading_days_between(start, start + timedelta(weeks=weeks)) if cal.is_expiry(day_id(d))]
+    atm = round(level / STRIKE_STEP) * STRIKE_STEP
+    strikes = atm + STRIKE_STEP * np.arange(-strikes_each_side, strikes_each_side + 1)
+    rows, sid = [], 40_000
+    for exp in expiries:
+        for k in strikes:
+            for opt, suffix in (("CALL", "CE"), ("PUT", "PE")):
+                sid += 1
+                rows.append((sid, f"{underlying}-{exp:%b%Y}-{k:g}-{suffix}", exchange_segment, "OPTIDX",
+                             float(k), opt, f"{exp.isoformat()} 14:30:00"))
+    return pd.DataFrame(rows, columns=["securityId", "tradingSymbol", "exchangeSegment", "instrument",
+                                       "drvStrikePrice", "drvOptionType", "drvExpiryDate"])
+
+def tick_frames(day: date, n: int, security_ids: tuple[int, ...] = (13,), seed: int = 0, level: float = 22000.0,
+                calendar: SessionCalendar | None = None) -> list[bytes]:
+    # recorded-style LiveFeed QUOTE frames spread over one session (FrameRecorder payloads)
+    cal = calendar or get_calendar()
+    rng = np.random.default_rng(seed)
+    t0 = day_id(day) * 86_400 - cal.offset + 9 * 3600 + 15 * 60
+    ltt = t0 + np.sort(rng.integers(0, SESSION_MINUTES * 60, n))
+    px = level + np.cumsum(rng.standard_t(4, n) * 0.6)
+    sids = np.asarray(security_ids)[rng.integers(0, len(security_ids), n)]
+    vol = np.cumsum(rng.integers(1, 200, n))
+    return [_QUOTE.pack(QUOTE, _QUOTE.size, 0, int(s), float(p), 75, int(t), float(p), int(v), 1000, 1200,
+                        float(p), float(p), float(p) + 5, float(p) - 5)
+            for s, p, t, v in zip(sids.tolist(), px.tolist(), ltt.tolist(), vol.tolist())]
+
+def quote_response(exchange_segment: str, security_ids: list[int], ltp: np.ndarray, volume: np.ndarray) -> dict:
+    # Dhan market quote response shape for a batch of instruments
+    return {"status": "success", "data": {exchange_segment: {
+        str(s): {"last_price": float(p), "volume": int(v), "last_quantity": 75, "oi": 0}
+        for s, p, v in zip(security_ids, ltp.tolist(), volume.tolist())
+    }}}
+
+class QuoteSource:
+    # Offline stand-in for DhanClient.market_quotes: synthetic quotes, no network
+    def __init__(self, seed: int = 0, level: float = 22000.0):
+        self.rng = np.random.default_rng(seed)
+        self.level = level
+        self.calls = 0
+
+    async def market_quotes(self, security_ids: list[int], exchange_segment: str) -> dict:
+        self.calls += 1
+        n = len(security_ids)
+        return quote_response(exchange_segment, security_ids, self.level + self.rng.normal(0, 5, n),
+                              self.rng.integers(0, 10**6, n))
+
+def trade_logs(n: int, years: float = 2.0, end: date | None = None, seed: int = 0,
+               calendar: SessionCalendar | None = None) -> list[TradeLog]:
+    # closed trades spread over the session days of the last `years` (trade store / report input)
+    cal = calendar or get_calendar()
+    end = end or date.today() - timedelta(days=1)
+    days = np.array([day_id(d) for d in cal.trading_days_between(end - timedelta(days=int(365 * years)), end)])
+    rng = np.random.default_rng(seed)
+    entry = np.sort(days[rng.integers(0, len(days), n)] * 86_400 - cal.offset + 9 * 3600 + 15 * 60
+                    + rng.integers(0, 360 * 60, n))
+    hold = rng.integers(60, 3600, n)
+    px = 22000.0 + rng.normal(0, 300, n)
+    move = np.where(rng.random(n) < 0.4, rng.uniform(5, 60, n), -20.0)
+    side = np.where(rng.random(n) < 0.5, "BUY_CALL", "BUY_PUT")
+    t_in = pd.to_datetime(entry, unit="s", utc=True).tz_convert(cal.tz)
+    t_out = pd.to_datetime(entry + hold, unit="s", utc=True).tz_convert(cal.tz)
+    return [TradeLog(ts_entry=a, ts_exit=b, symbol="NIFTY_OPTION_ATM", security_id="ATM_DERIVED", side=s, qty=75,
+                     entry_price=float(p), exit_price=float(p + m), pnl=float(m * 75), sl_hits_today=0,
+                     notes="SL/TSL exit")
+            for a, b, s, p, m in zip(t_in, t_out, side.tolist(), px.tolist(), move.tolist())]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from pydantic_settings import BaseSettings
 import os
 
@@ -7,15 +7,58 @@ class Settings(BaseSettings):
     DHAN_CLIENT_ID: str | None = None
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_CHAT_ID: str
+    TELEGRAM_API_URL: str = "https://api.telegram.org"  # or a local Bot API stand-in
+    WEBHOOK_URL: str | None = None  # set: receive updates by webhook, else long polling
     RUN_MODE: str = "paper"  # live|paper|backtest
     TIMEZONE: str = "Asia/Kolkata"
     EXCHANGE_SEGMENT: str = "IDX_I"  # per Dhan Annexure for NIFTY options
     NSE_UNDERLYING_SECURITY_ID: int = 13  # example: NIFTY index security id
+    OPTION_EXCHANGE_SEGMENT: str = "NSE_FNO"  # segment the option legs are ordered on
     DB_URL: str = "sqlite:///app.db"
     LOG_LEVEL: str = "INFO"
     LIVE_WS_URL: str | None = None
+    BAR_CACHE_DIR: str = "data/bars"
+    BAR_BASE_INTERVAL: int = 1  # only this interval is fetched; higher timeframes are derived (bar_pyramid)
+    TICK_JOURNAL_DIR: str = "data/ticks"
+    INSTRUMENTS_CSV: str = "data/instruments.csv"
+    HOLIDAYS_CSV: str = "data/nse_holidays.csv"  # optional: date,open,close,note (extends session_calendar)
+    OPTION_UNDERLYING: str = "NIFTY"  # tradingSymbol prefix of the option legs
+    OPTION_CHAIN_REFRESH_SEC: float = 3.0  # Dhan limit: 1 option chain call / 3s
+    STRATEGIES_FILE: str | None = None  # JSON strategy specs: run them all in one process (runtime.runner)
+    STARTUP_MODE: str = "background"  # background: app.py serves at once, subsystems load behind it | eager
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
+class _LazySettings:
+    # Settings() is built (and validated) on first attribute access, so importing
+    # any module that references `settings` works without the env being set
+    __slots__ = ("_settings",)
+
+    def __init__(self):
+        object.__setattr__(self, "_settings", None)
+
+    def load(self) -> Settings:
+        if self._settings is None:
+            object.__setattr__(self, "_settings", Settings())
+        return self._settings
+
+    def peek(self, name: str):
+        # one setting even when the rest does not validate (offline tools run without the
+        # API tokens): from Settings if it loads, else the environment, else the field default
+        try:
+            return getattr(self.load(), name)
+        except ValidationError:
+            pass
+        field = Settings.model_fields[name]
+        if name not in os.environ:
+            return field.default
+        return TypeAdapter(field.annotation).validate_python(os.environ[name])
+
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self.load(), name, value)
+
+settings = _LazySettings()
@@ -3,6 +3,7 @@ import httpx, time, asyncio, json
 from typing import Any, Dict, Optional
 from loguru import logger
 from .config import settings
+from .transport import DhanTransport
 
 API_BASE = "https://api.dhan.co/v2"
 
@@ -17,53 +18,56 @@ def _headers(include_client=False):
     return h
 
 class DhanClient:
-    def __init__(self, timeout: float = 15.0):
-        self.http = httpx.AsyncClient(timeout=timeout)
+    def __init__(self, timeout: float = 15.0, transport: httpx.AsyncBaseTransport | None = None, **transport_kw):
+        # transport: e.g. httpx.MockTransport for offline tests
+        self.t = DhanTransport(API_BASE, timeout=timeout, transport=transport, **transport_kw)
+        self.http = self.t.http
+        self._h = _headers()
+        self._hc = _headers(include_client=True)
 
     async def close(self):
-        await self.http.aclose()
+        await self.t.aclose()
 
     # --- Orders ---
     async def place_order(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        r = await self.http.post(f"{API_BASE}/orders", json=payload, headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("orders", "POST", "/orders", json=payload, headers=self._h, idempotent=False)
 
     async def modify_order(self, order_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        r = await self.http.put(f"{API_BASE}/orders/{order_id}", json=payload, headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("orders", "PUT", f"/orders/{order_id}", json=payload, headers=self._h,
+                                    idempotent=False)
 
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
-        r = await self.http.delete(f"{API_BASE}/orders/{order_id}", headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("orders", "DELETE", f"/orders/{order_id}", headers=self._h, idempotent=False)
 
     async def order_book(self):
-        r = await self.http.get(f"{API_BASE}/orders", headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("other", "GET", "/orders", headers=self._h, idempotent=True)
+
+    async def order_status(self, order_id: str):
+        # single order, for targeted status checks instead of pulling the whole book
+        return await self.t.request("other", "GET", f"/orders/{order_id}", headers=self._h, idempotent=True)
+
+    async def order_by_correlation(self, correlation_id: str):
+        # GET /orders/external/{correlation-id}: finds an order whose placement went unanswered
+        return await self.t.request("other", "GET", f"/orders/external/{correlation_id}", headers=self._h,
+                                    idempotent=True)
 
     async def trade_book(self):
-        r = await self.http.get(f"{API_BASE}/trades", headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("other", "GET", "/trades", headers=self._h, idempotent=True)
 
     # --- Market Quote ---
     async def market_quote(self, security_id: int, exchange_segment: str):
-        # POST /marketfeed/quotes or as per docs 'Market Quote' page
-        # Dhan v2 page shows Market Quote endpoint group; request body may accept list.
-        # We'll support single security for simplicity here.
-        url = f"{API_BASE}/marketfeed/quotes"
-        payload = {"securityIds": [str(security_id)], "exchangeSegment": exchange_segment}
-        r = await self.http.post(url, json=payload, headers=_headers(include_client=True))
-        r.raise_for_status()
-        return r.json()
+        return await self.market_quotes([security_id], exchange_segment)
+
+    async def market_quotes(self, security_ids: list[int], exchange_segment: str):
+        # POST /marketfeed/quotes; body takes a list of securityIds (up to 1000 per call).
+        # feed.quotes.QuoteBatcher coalesces concurrent single-instrument requests into this.
+        payload = {"securityIds": [str(s) for s in security_ids], "exchangeSegment": exchange_segment}
+        return await self.t.request("quotes", "POST", "/marketfeed/quotes", json=payload, headers=self._hc,
+                                    idempotent=True)
 
     # --- Historical ---
     async def intraday(self, security_id: int, exchange_segment: str, instrument: str, interval: int,
                        from_dt: str, to_dt: str, oi: bool=False):
-        url = f"{API_BASE}/charts/intraday"
         payload = {
             "securityId": str(security_id),
             "exchangeSegment": exchange_segment,
@@ -73,38 +77,31 @@ class DhanClient:
             "fromDate": from_dt,
             "toDate": to_dt
         }
-        r = await self.http.post(url, json=payload, headers=_headers())
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("historical", "POST", "/charts/intraday", json=payload, headers=self._h,
+                                    idempotent=True)
 
     # --- Option Chain ---
     async def option_chain(self, underlying_sec_id: int, underlying_seg: str, expiry: str):
-        url = f"{API_BASE}/optionchain"
         payload = {"UnderlyingScrip": underlying_sec_id, "UnderlyingSeg": underlying_seg, "Expiry": expiry}
-        r = await self.http.post(url, json=payload, headers=_headers(include_client=True))
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("option_chain", "POST", "/optionchain", json=payload, headers=self._hc,
+                                    idempotent=True)
 
     async def expiry_list(self, underlying_sec_id: int, underlying_seg: str):
-        url = f"{API_BASE}/optionchain/expirylist"
         payload = {"UnderlyingScrip": underlying_sec_id, "UnderlyingSeg": underlying_seg}
-        r = await self.http.post(url, json=payload, headers=_headers(include_client=True))
-        r.raise_for_status()
-        return r.json()
+        return await self.t.request("option_chain", "POST", "/optionchain/expirylist", json=payload,
+                                    headers=self._hc, idempotent=True)
 
     # --- Websocket (Live Market Feed) ---
-    async def live_feed(self, on_message):
-        # Dhan docs provide Live Market Feed; URL may change. Supply via env if needed.
-        ws_url = settings.LIVE_WS_URL or "wss://livefeeds.dhan.co/v2/ws"
-        import websockets
-        async with websockets.connect(ws_url, extra_headers=_headers(include_client=True)) as ws:
-            # Typically, you must send a subscribe message after connect.
-            # This structure is documented in Dhan Live Market Feed page.
-            # Example subscription payload; user should pass list of tokens elsewhere.
-            await ws.send(json.dumps({"action": "subscribe", "instruments": []}))
-            async for msg in ws:
-                try:
-                    data = json.loads(msg)
-                except json.JSONDecodeError:
-                    data = {"raw": msg}
-                await on_message(data)
+    async def live_feed(self, on_message, instruments: list[tuple[str, int]] = (), mode: int | None = None):
+        # Binary v2 feed; see feed.live_feed for decoding, resubscription and reconnects.
+        # instruments: [(exchange_segment, security_id), ...]
+        from .feed.live_feed import LiveFeed, SUB_QUOTE
+        feed = LiveFeed()
+        await feed.set_group("default", instruments, mode or SUB_QUOTE)
+        runner = asyncio.create_task(feed.run())
+        try:
+            async for pkt in feed.stream():
+                await on_message(pkt)
+        finally:
+            feed.stop()
+            runner.cancel()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Iterator
+import numpy as np
+from ..session_calendar import SessionCalendar, get_calendar
+
+# Incremental tick -> OHLC candle aggregation for paper/live modes.
+# Buckets are counted from each day's session open (SessionCalendar: 09:15 on
+# regular days) and labelled by their start, as backtester.core.resample_session
+# does for historical bars. Per tick the work is a handful of integer compares;
+# closed candles go into fixed-size NumPy ring buffers and to the on_close
+# callback. No pandas objects are built on this path.
+
+@dataclass(slots=True)
+class Candle:
+    ts: int          # bucket start, epoch seconds (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+class CandleRing:
+    # Fixed-capacity ring of closed candles for one (instrument, timeframe)
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((capacity, 5), dtype=np.float64)
+        self.count = 0
+
+    def append(self, c: Candle):
+        i = self.count % self.capacity
+        self.ts[i] = c.ts
+        self.ohlcv[i] = (c.open, c.high, c.low, c.close, c.volume)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def last(self, n: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        # (ts, ohlcv) of the newest n candles, oldest first
+        size = len(self)
+        n = size if n is None else min(n, size)
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.ts[idx], self.ohlcv[idx]
+
+class _Forming:
+    __slots__ = ("bucket", "open", "high", "low", "close", "volume")
+
+    def __init__(self, bucket: int, price: float, qty: float):
+        self.bucket = bucket
+        self.open = self.high = self.low = self.close = price
+        self.volume = qty
+
+    def candle(self) -> Candle:
+        return Candle(self.bucket, self.open, self.high, self.low, self.close, self.volume)
+
+OnClose = Callable[[object, int, Candle], None]
+
+class CandleAggregator:
+    def __init__(self, timeframes: list[int], tz: str = "Asia/Kolkata", capacity: int = 512,
+                 on_close: OnClose | None = None, calendar: SessionCalendar | None = None):
+        self.timeframes = sorted(set(timeframes))
+        self.calendar = calendar or get_calendar(tz)
+        # fixed offset for the session's zone (IST has no DST)
+        self.utc_offset = self.calendar.offset
+        self._day = None
+        self._open = 0
+        self.capacity = capacity
+        self.on_close = on_close
+        self._forming: dict[tuple[object, int], _Forming] = {}
+        self.rings: dict[tuple[object, int], CandleRing] = {}
+
+    def session_open(self, day: int) -> int:
+        # epoch seconds of the day's open; closed days keep the regular open as anchor
+        s = self.calendar.session(day)
+        return s[0] if s is not None else day * 86_400 - self.utc_offset + self.calendar.regular[0]
+
+    def bucket_start(self, ts: float, minutes: int) -> int:
+        # epoch seconds of the `minutes` bucket holding ts, counted from the session open
+        t = int(ts)
+        day = (t + self.utc_offset) // 86_400
+        if day != self._day:
+            self._day, self._open = day, self.session_open(day)
+        width = minutes * 60
+        return self._open + (t - self._open) // width * width
+
+    def ring(self, key: object, timeframe: int) -> CandleRing:
+        r = self.rings.get((key, timeframe))
+        if r is None:
+            r = self.rings[(key, timeframe)] = CandleRing(self.capacity)
+        return r
+
+    def _close(self, key: object, tf: int, f: _Forming):
+        c = f.candle()
+        self.ring(key, tf).append(c)
+        if self.on_close is not None:
+            self.on_close(key, tf, c)
+
+    def on_tick(self, key: object, price: float, ts: float, qty: float = 0.0):
+        for tf in self.timeframes:
+            b = self.bucket_start(ts, tf)
+            f = self._forming.get((key, tf))
+            if f is None:
+                self._forming[(key, tf)] = _Forming(b, price, qty)
+            elif b == f.bucket:
+                if price > f.high:
+                    f.high = price
+                elif price < f.low:
+                    f.low = price
+                f.close = price
+                f.volume += qty
+            elif b > f.bucket:
+                self._close(key, tf, f)
+                self._forming[(key, tf)] = _Forming(b, price, qty)
+            # late tick for an already closed bucket: dropped
+
+    def flush(self, now: float):
+        # close candles whose bucket has ended even if no newer tick arrived
+        for (key, tf), f in list(self._forming.items()):
+            if self.bucket_start(now, tf) > f.bucket:
+                self._close(key, tf, f)
+                del self._forming[(key, tf)]
+
+def quote_ticks(resp: dict) -> Iterator[tuple[str, int, float, float]]:
+    # Dhan market quote response -> (exchange_segment, security_id, ltp, volume)
+    for seg, by_id in (resp.get("data") or {}).items():
+        if not isinstance(by_id, dict):
+            continue
+        for sid, q in by_id.items():
+            ltp = q.get("last_price") if isinstance(q, dict) else None
+            if ltp is None:
+                continue
+            yield seg, int(sid), float(ltp), float(q.get("volume") or 0.0)
@@ -0,0 +1,379 @@
+from __future__ import annotations
+import asyncio, json, random, struct, time
+from typing import Iterable, Iterator, NamedTuple
+import numpy as np
+from loguru import logger
+from .. import metrics
+from ..config import settings
+
+# Dhan v2 live market feed: binary little-endian packets behind an 8-byte
+# header (response code u8, message length i16, exchange segment u8,
+# security id i32). Packets are decoded with precompiled struct.Struct
+# unpack_from over a memoryview of the frame (no slicing/copying), one
+# NamedTuple per packet; FULL packet market depth is a zero-copy NumPy view.
+
+# Response codes
+TICKER, QUOTE, OI, PREV_CLOSE, FULL, DISCONNECT = 2, 4, 5, 6, 8, 50
+# Subscribe request codes (unsubscribe = code + 1)
+SUB_TICKER, SUB_QUOTE, SUB_FULL = 15, 17, 21
+MAX_PER_MESSAGE = 100
+
+SEGMENTS = {0: "IDX_I", 1: "NSE_EQ", 2: "NSE_FNO", 3: "NSE_CURRENCY", 4: "BSE_EQ", 5: "MCX_COMM",
+            7: "BSE_CURRENCY", 8: "BSE_FNO"}
+SEGMENT_CODES = {v: k for k, v in SEGMENTS.items()}
+
+_HEADER = struct.Struct("<BhBi")
+_TICKER = struct.Struct("<BhBifi")
+_QUOTE = struct.Struct("<BhBifhifiiiffff")
+_OI = struct.Struct("<BhBii")
+_PREV_CLOSE = struct.Struct("<BhBifi")
+_FULL = struct.Struct("<BhBifhifiiiiiiffff")
+_DISCONNECT = struct.Struct("<BhBih")
+DEPTH_DTYPE = np.dtype([("bid_qty", "<i4"), ("ask_qty", "<i4"), ("bid_orders", "<i2"), ("ask_orders", "<i2"),
+                        ("bid", "<f4"), ("ask", "<f4")])
+DEPTH_LEVELS = 5
+_H_RECEIVE = metrics.histogram("feed.receive", metrics.STAGE_BUCKETS_MS)
+_H_DECODE = metrics.histogram("feed.decode", metrics.STAGE_BUCKETS_MS)
+
+class Ticker(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    ltp: float
+    ltt: int
+
+class Quote(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    ltp: float
+    ltq: int
+    ltt: int
+    atp: float
+    volume: int
+    total_sell_qty: int
+    total_buy_qty: int
+    open: float
+    close: float
+    high: float
+    low: float
+
+class OpenInterest(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    oi: int
+
+class PrevClose(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    prev_close: float
+    prev_oi: int
+
+class Full(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    ltp: float
+    ltq: int
+    ltt: int
+    atp: float
+    volume: int
+    total_sell_qty: int
+    total_buy_qty: int
+    oi: int
+    oi_high: int
+    oi_low: int
+    open: float
+    close: float
+    high: float
+    low: float
+    depth: np.ndarray   # DEPTH_DTYPE[5], view into the frame
+
+class Disconnect(NamedTuple):
+    code: int
+    length: int
+    segment: int
+    security_id: int
+    reason: int
+
+_LAYOUT = {
+    TICKER: (_TICKER, Ticker), QUOTE: (_QUOTE, Quote), OI: (_OI, OpenInterest),
+    PREV_CLOSE: (_PREV_CLOSE, PrevClose), DISCONNECT: (_DISCONNECT, Disconnect),
+}
+FULL_SIZE = _FULL.size + DEPTH_LEVELS * DEPTH_DTYPE.itemsize
+
+def decode(frame: bytes) -> Iterator[NamedTuple]:
+    # A frame may carry several packets back to back; unknown codes are skipped by length
+    mv = memoryview(frame)
+    off, n = 0, len(mv)
+    while off + _HEADER.size <= n:
+        code, length, _, _ = _HEADER.unpack_from(mv, off)
+        if code == FULL:
+            if off + FULL_SIZE > n:
+                return
+            yield Full._make((*_FULL.unpack_from(mv, off),
+                              np.frombuffer(frame, DEPTH_DTYPE, DEPTH_LEVELS, off + _FULL.size)))
+            step = FULL_SIZE
+        else:
+            layout = _LAYOUT.get(code)
+            if layout is None:
+                if length <= 0:
+                    return
+                off += length
+                continue
+            s, cls = layout
+            if off + s.size > n:
+                return
+            yield cls._make(s.unpack_from(mv, off))
+            step = s.size
+        off += length if length >= step else step
+
+def subscription_messages(instruments: Iterable[tuple[str, int]], request_code: int) -> list[str]:
+    items = [{"ExchangeSegment": seg, "SecurityId": str(sid)} for seg, sid in instruments]
+    return [json.dumps({"RequestCode": request_code, "InstrumentCount": len(chunk), "InstrumentList": chunk})
+            for chunk in (items[k:k + MAX_PER_MESSAGE] for k in range(0, len(items), MAX_PER_MESSAGE))]
+
+class Subscriptions:
+    # Desired subscription set, kept as named groups so e.g. the ATM option
+    # window can be swapped without touching the underlying's subscription.
+    def __init__(self):
+        self.groups: dict[str, dict[tuple[str, int], int]] = {}
+
+    def current(self) -> dict[tuple[str, int], int]:
+        # instrument -> highest requested mode
+        out: dict[tuple[str, int], int] = {}
+        for g in self.groups.values():
+            for k, mode in g.items():
+                out[k] = max(out.get(k, 0), mode)
+        return out
+
+    def set_group(self, name: str, instruments: Iterable[tuple[str, int]], mode: int = SUB_QUOTE) -> list[str]:
+        # returns the subscribe/unsubscribe messages needed to move to the new set
+        before = self.current()
+        self.groups[name] = {(seg, int(sid)): mode for seg, sid in instruments}
+        return self._diff(before, self.current())
+
+    def drop_group(self, name: str) -> list[str]:
+        before = self.current()
+        self.groups.pop(name, None)
+        return self._diff(before, self.current())
+
+    def resubscribe_all(self) -> list[str]:
+        return self._diff({}, self.current())
+
+    @staticmethod
+    def _diff(before: dict, after: dict) -> list[str]:
+        msgs: list[str] = []
+        removed: dict[int, list] = {}
+        added: dict[int, list] = {}
+        for k, mode in before.items():
+            if after.get(k) != mode:
+                removed.setdefault(mode + 1, []).append(k)
+        for k, mode in after.items():
+            if before.get(k) != mode:
+                added.setdefault(mode, []).append(k)
+        for code, ks in removed.items():
+            msgs += subscription_messages(ks, code)
+        for code, ks in added.items():
+            msgs += subscription_messages(ks, code)
+        return msgs
+
+def default_url() -> str:
+    return settings.LIVE_WS_URL or (
+        f"wss://api-feed.dhan.co?version=2&token={settings.DHAN_ACCESS_TOKEN}"
+        f"&clientId={settings.DHAN_CLIENT_ID or ''}&authType=2")
+
+class LiveFeed:
+    # Owns the websocket: reconnects with jittered backoff, replays the
+    # subscription set after every connect, and hands decoded packets to
+    # consumers through a bounded queue. When consumers fall behind, the oldest
+    # packet is dropped (ticks are perishable) and counted.
+    def __init__(self, url: str | None = None, queue_size: int = 10_000, connect=None,
+                 backoff_max: float = 30.0, recorder=None, journal=None):
+        self.url = url or default_url()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.subs = Subscriptions()
+        self._connect = connect
+        self.backoff_max = backoff_max
+        self.recorder = recorder
+        self.journal = journal      # storage.tick_journal.TickJournal
+        self._ws = None
+        self._stop = False
+        self.stats = {"frames": 0, "packets": 0, "dropped": 0, "queue_high_water": 0, "reconnects": 0,
+                      "decode_errors": 0}
+
+    # --- subscriptions ---
+    async def set_group(self, name: str, instruments: Iterable[tuple[str, int]], mode: int = SUB_QUOTE):
+        await self._send(self.subs.set_group(name, instruments, mode))
+
+    async def drop_group(self, name: str):
+        await self._send(self.subs.drop_group(name))
+
+    async def _send(self, msgs: list[str]):
+        ws = self._ws
+        if ws is None:
+            return  # applied on (re)connect
+        for m in msgs:
+            await ws.send(m)
+
+    # --- consumer side ---
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    async def stream(self):
+        while True:
+            yield await self.queue.get()
+
+    def _publish(self, pkt):
+        q = self.queue
+        if q.full():
+            q.get_nowait()
+            self.stats["dropped"] += 1
+        q.put_nowait(pkt)
+        d = q.qsize()
+        if d > self.stats["queue_high_water"]:
+            self.stats["queue_high_water"] = d
+
+    # --- connection ---
+    def stop(self):
+        self._stop = True
+
+    async def run(self):
+        if self._connect is None:
+            import websockets
+            self._connect = websockets.connect
+        delay = 0.5
+        while not self._stop:
+            try:
+                async with self._connect(self.url) as ws:
+                    self._ws = ws
+                    delay = 0.5
+                    await self._send(self.subs.resubscribe_all())
+                    async for frame in ws:
+                        self._on_frame(frame)
+                        if self._stop:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LiveFeed: connection lost: {e!r}")
+            finally:
+                self._ws = None
+            if self._stop:
+                break
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, self.backoff_max)
+
+    def _on_frame(self, frame):
+        t0 = time.perf_counter()
+        self.stats["frames"] += 1
+        if isinstance(frame, str):
+            logger.debug(f"LiveFeed: text frame {frame[:200]}")
+            return
+        if self.recorder is not None:
+            self.recorder.write(frame)
+        journal = self.journal
+        # decode time is the generator's share between packets; the rest is journal + enqueue
+        decoding = 0.0
+        t = time.perf_counter()
+        try:
+            for pkt in decode(frame):
+                decoding += time.perf_counter() - t
+                if journal is not None:
+                    journal.on_packet(pkt)
+                if pkt.code == DISCONNECT:
+                    logger.warning(f"LiveFeed: server disconnect reason={pkt.reason}")
+                self.stats["packets"] += 1
+                self._publish(pkt)
+                t = time.perf_counter()
+        except struct.error as e:
+            self.stats["decode_errors"] += 1
+            logger.warning(f"LiveFeed: bad frame ({len(frame)} bytes): {e}")
+        t1 = time.perf_counter()
+        _H_DECODE.observe(decoding + t1 - t)
+        _H_RECEIVE.observe(t1 - t0)
+
+# --- Recorded frames (length-prefixed) for replay/benchmarks ---
+_LEN = struct.Struct("<I")
+
+class FrameRecorder:
+    def __init__(self, path: str):
+        self.f = open(path, "ab", buffering=1 << 20)
+
+    def write(self, frame: bytes):
+        self.f.write(_LEN.pack(len(frame)))
+        self.f.write(frame)
+
+    def close(self):
+        self.f.close()
+
+def read_frames(path: str) -> list[bytes]:
+    data = open(path, "rb").read()
+    out, off = [], 0
+    while off + 4 <= len(data):
+        (n,) = _LEN.unpack_from(data, off)
+        out.append(data[off + 4:off + 4 + n])
+        off += 4 + n
+    return out
+
+async def serve_replay(frames: list[bytes], host: str = "127.0.0.1", port: int = 8765, rate: float = 0.0):
+    # Local websocket stand-in for the Dhan feed: logs subscribe messages and
+    # replays recorded frames to each client (rate=0 -> as fast as possible)
+    import websockets
+
+    async def handler(ws):
+        sent = 0
+        async def reader():
+            async for m in ws:
+                logger.info(f"replay: client sent {m[:120]}")
+        r = asyncio.create_task(reader())
+        try:
+            for fr in frames:
+                await ws.send(fr)
+                sent += 1
+                if rate:
+                    await asyncio.sleep(1.0 / rate)
+        finally:
+            r.cancel()
+            logger.info(f"replay: sent {sent} frames")
+
+    return await websockets.serve(handler, host, port)
+
+def synthetic_frames(n: int, security_ids: tuple[int, ...] = (13,), code: int = QUOTE, seed: int = 0) -> list[bytes]:
+    rng = random.Random(seed)
+    out = []
+    ltp = 22000.0
+    t = int(time.time())
+    for k in range(n):
+        ltp += rng.uniform(-2, 2)
+        sid = security_ids[k % len(security_ids)]
+        if code == TICKER:
+            out.append(_TICKER.pack(TICKER, _TICKER.size, 0, sid, ltp, t + k // 10))
+        elif code == FULL:
+            head = _FULL.pack(FULL, FULL_SIZE, 2, sid, ltp, 75, t, ltp, k, 1000, 1200, 5, 6, 4,
+                              ltp, ltp, ltp + 5, ltp - 5)
+            out.append(head + np.zeros(DEPTH_LEVELS, DEPTH_DTYPE).tobytes())
+        else:
+            out.append(_QUOTE.pack(QUOTE, _QUOTE.size, 2, sid, ltp, 75, t + k // 10, ltp, k, 1000, 1200,
+                                   ltp, ltp, ltp + 5, ltp - 5))
+    return out
+
+if __name__ == "__main__":
+    # packets/sec benchmark per packet type
+    for code, name in ((TICKER, "ticker"), (QUOTE, "quote"), (FULL, "full")):
+        frames = synthetic_frames(200_000, (13, 25, 51), code)
+        t0 = time.perf_counter()
+        cnt = 0
+        for fr in frames:
+            for _ in decode(fr):
+                cnt += 1
+        dt = time.perf_counter() - t0
+        print(f"{name:7s} {cnt / dt:,.0f} packets/s")
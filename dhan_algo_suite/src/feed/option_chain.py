@@ -0,0 +1,160 @@
+from __future__ import annotations
+import asyncio, time
+from dataclasses import dataclass
+from datetime import date
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..dhan_client import DhanClient
+
+# Background-refreshed option chain per (underlying, expiry). The chain is kept
+# as sorted strike arrays with CE/PE LTP, OI and security ids, swapped in whole
+# on each refresh, so readers on the entry path never await the network.
+# The expiry list is fetched once per local trading day.
+
+@dataclass
+class ChainSnapshot:
+    expiry: str
+    underlying_ltp: float
+    fetched_at: float            # time.monotonic()
+    strikes: np.ndarray          # float64, ascending
+    ce_ltp: np.ndarray
+    ce_oi: np.ndarray
+    ce_sid: np.ndarray           # int64, -1 if not in the response
+    pe_ltp: np.ndarray
+    pe_oi: np.ndarray
+    pe_sid: np.ndarray
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def atm_position(self, spot: float | None = None) -> int:
+        s = self.underlying_ltp if spot is None else spot
+        k = self.strikes
+        i = int(np.searchsorted(k, s))
+        if i == len(k) or (i > 0 and s - k[i - 1] <= k[i] - s):
+            i -= 1
+        return i
+
+    def leg(self, i: int, option_type: str) -> dict:
+        call = option_type.upper() in ("CALL", "CE")
+        return {
+            "expiry": self.expiry, "strike": float(self.strikes[i]), "option_type": "CALL" if call else "PUT",
+            "ltp": float((self.ce_ltp if call else self.pe_ltp)[i]),
+            "oi": float((self.ce_oi if call else self.pe_oi)[i]),
+            "security_id": int((self.ce_sid if call else self.pe_sid)[i]),
+        }
+
+    def atm(self, option_type: str, itm_steps: int = 0, spot: float | None = None) -> dict:
+        i = self.atm_position(spot)
+        i += -itm_steps if option_type.upper() in ("CALL", "CE") else itm_steps
+        return self.leg(min(max(i, 0), len(self.strikes) - 1), option_type)
+
+    def neighbours(self, option_type: str, n: int = 2, spot: float | None = None) -> list[dict]:
+        i = self.atm_position(spot)
+        return [self.leg(j, option_type) for j in range(max(i - n, 0), min(i + n + 1, len(self.strikes)))]
+
+def parse_chain(resp: dict, expiry: str) -> ChainSnapshot:
+    data = (resp or {}).get("data") or {}
+    oc = data.get("oc") or {}
+    items = sorted(((float(k), v) for k, v in oc.items()), key=lambda kv: kv[0])
+    n = len(items)
+    cols = {c: np.zeros(n) for c in ("ce_ltp", "ce_oi", "pe_ltp", "pe_oi")}
+    sids = {c: np.full(n, -1, dtype=np.int64) for c in ("ce_sid", "pe_sid")}
+    for j, (_, legs) in enumerate(items):
+        for side in ("ce", "pe"):
+            leg = (legs or {}).get(side) or {}
+            cols[f"{side}_ltp"][j] = leg.get("last_price") or 0.0
+            cols[f"{side}_oi"][j] = leg.get("oi") or 0.0
+            if leg.get("security_id") is not None:
+                sids[f"{side}_sid"][j] = int(leg["security_id"])
+    return ChainSnapshot(
+        expiry=expiry, underlying_ltp=float(data.get("last_price") or 0.0), fetched_at=time.monotonic(),
+        strikes=np.array([k for k, _ in items], dtype=np.float64), **cols, **sids,
+    )
+
+class OptionChainCache:
+    def __init__(self, client: DhanClient, underlying_sec_id: int, underlying_seg: str,
+                 refresh_sec: float = 3.0, expiries_ahead: int = 1, tz: str = "Asia/Kolkata"):
+        # Dhan allows one option chain request per 3s; each tracked expiry takes a slot
+        self.client = client
+        self.underlying = (underlying_sec_id, underlying_seg)
+        self.refresh_sec = max(refresh_sec, 3.0)
+        self.expiries_ahead = expiries_ahead
+        self.tz = tz
+        self._expiries: list[str] = []
+        self._expiry_day: date | None = None
+        self._chains: dict[str, ChainSnapshot] = {}
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+        self.errors = 0
+
+    # --- readers (never await) ---
+    def expiries(self) -> list[str]:
+        return self._expiries
+
+    def nearest_expiry(self) -> str | None:
+        return self._expiries[0] if self._expiries else None
+
+    def snapshot(self, expiry: str | None = None) -> ChainSnapshot | None:
+        return self._chains.get(expiry or self.nearest_expiry() or "")
+
+    def atm(self, option_type: str, itm_steps: int = 0, expiry: str | None = None,
+            spot: float | None = None) -> dict | None:
+        snap = self.snapshot(expiry)
+        if snap is None or len(snap.strikes) == 0:
+            return None
+        return snap.atm(option_type, itm_steps, spot)
+
+    # --- refresh ---
+    def today(self) -> date:
+        return pd.Timestamp.now(tz=self.tz).date()
+
+    async def refresh_expiries(self, force: bool = False):
+        today = self.today()
+        if not force and self._expiry_day == today and self._expiries:
+            return
+        resp = await self.client.expiry_list(*self.underlying)
+        exp = sorted(str(e)[:10] for e in ((resp or {}).get("data") or []))
+        self._expiries = [e for e in exp if e >= today.isoformat()]
+        self._expiry_day = today
+        logger.info(f"OptionChainCache: expiries {self._expiries[:3]}...")
+
+    async def refresh_chain(self, expiry: str):
+        resp = await self.client.option_chain(*self.underlying, expiry)
+        self._chains[expiry] = parse_chain(resp, expiry)
+        self.refreshes += 1
+
+    async def start(self):
+        # first fill is awaited so the cache is warm before trading starts
+        await self.refresh_expiries(force=True)
+        for e in self._expiries[:self.expiries_ahead]:
+            await self.refresh_chain(e)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        k = 0
+        while True:
+            await asyncio.sleep(self.refresh_sec)
+            try:
+                await self.refresh_expiries()
+                tracked = self._expiries[:self.expiries_ahead]
+                if tracked:
+                    await self.refresh_chain(tracked[k % len(tracked)])
+                    k += 1
+                for stale in set(self._chains) - set(tracked):
+                    self._chains.pop(stale, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"OptionChainCache: refresh failed, keeping last snapshot: {e!r}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import asyncio, time
+from loguru import logger
+from ..dhan_client import DhanClient
+
+# Micro-batching front for DhanClient.market_quotes. Concurrent quote requests
+# arriving within `window` seconds are grouped per exchange segment into one
+# POST (split at `max_batch` ids), the response is fanned back out to each
+# caller's future, and per-instrument quotes are reused for `ttl` seconds.
+
+MAX_IDS_PER_CALL = 1000
+
+class QuoteBatcher:
+    def __init__(self, client: DhanClient, window: float = 0.02, max_batch: int = MAX_IDS_PER_CALL,
+                 ttl: float = 1.0, journal=None):
+        self.client = client
+        self.journal = journal      # storage.tick_journal.TickJournal: every fetched quote is recorded
+        self.window = window
+        self.max_batch = max_batch
+        self.ttl = ttl
+        self._pending: dict[str, dict[int, list[asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._cache: dict[tuple[str, int], tuple[float, dict | None]] = {}
+        self._tasks: set[asyncio.Task] = set()    # in-flight sends, referenced until done
+        self.requests_sent = 0
+        self.quotes_served = 0
+
+    async def get(self, security_id: int, exchange_segment: str) -> dict | None:
+        # quote payload for one instrument (None if the API returned nothing for it)
+        self.quotes_served += 1
+        key = (exchange_segment, int(security_id))
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        seg = self._pending.setdefault(exchange_segment, {})
+        seg.setdefault(int(security_id), []).append(fut)
+        if len(seg) >= self.max_batch:
+            self._flush(exchange_segment)
+        elif exchange_segment not in self._timers:
+            self._timers[exchange_segment] = loop.call_later(self.window, self._flush, exchange_segment)
+        return await fut
+
+    async def quote(self, security_id: int, exchange_segment: str) -> dict:
+        # Drop-in for DhanClient.market_quote: same response shape, batched underneath
+        q = await self.get(security_id, exchange_segment)
+        data = {exchange_segment: {str(security_id): q}} if q is not None else {}
+        return {"status": "success", "data": data}
+
+    def _flush(self, exchange_segment: str):
+        t = self._timers.pop(exchange_segment, None)
+        if t is not None:
+            t.cancel()
+        waiters = self._pending.pop(exchange_segment, None)
+        if waiters:
+            task = asyncio.get_running_loop().create_task(self._send(exchange_segment, waiters))
+            self._tasks.add(task)
+            task.add_done_callback(lambda t: self._sent(t, exchange_segment, waiters))
+
+    def _sent(self, task: asyncio.Task, exchange_segment: str, waiters: dict[int, list[asyncio.Future]]):
+        # an unexpected error (e.g. in the journal) must reach the callers, not leave them waiting
+        self._tasks.discard(task)
+        err = None if task.cancelled() else task.exception()
+        if err is not None:
+            logger.error(f"QuoteBatcher: {exchange_segment} send failed: {err!r}")
+        for futs in waiters.values():
+            for f in futs:
+                if f.done():
+                    continue
+                if err is None:
+                    f.cancel()
+                else:
+                    f.set_exception(err)
+
+    async def _send(self, exchange_segment: str, waiters: dict[int, list[asyncio.Future]]):
+        ids = list(waiters)
+        for k in range(0, len(ids), self.max_batch):
+            chunk = ids[k:k + self.max_batch]
+            self.requests_sent += 1
+            try:
+                resp = await self.client.market_quotes(chunk, exchange_segment)
+            except Exception as e:
+                logger.warning(f"QuoteBatcher: {exchange_segment} batch of {len(chunk)} failed: {e}")
+                for sid in chunk:
+                    for f in waiters[sid]:
+                        if not f.done():
+                            f.set_exception(e)
+                continue
+            if self.journal is not None:
+                self.journal.on_quotes(resp)
+            by_id = ((resp or {}).get("data") or {}).get(exchange_segment) or {}
+            expires = time.monotonic() + self.ttl
+            for sid in chunk:
+                q = by_id.get(str(sid))
+                self._cache[(exchange_segment, sid)] = (expires, q)
+                for f in waiters[sid]:
+                    if not f.done():
+                        f.set_result(q)
+
+    def depth(self) -> int:
+        # instruments waiting for the next batch
+        return sum(len(w) for w in self._pending.values())
+
+    def invalidate(self):
+        self._cache.clear()
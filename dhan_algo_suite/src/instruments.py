@@ -1,5 +1,9 @@
-import pandas as pd
+from __future__ import annotations
+import pickle
+from bisect import bisect_left
 from pathlib import Path
+import pandas as pd
+from loguru import logger
 
 # Load Dhan Instrument List CSV exported from Dhan docs (Annexure).
 # Must include columns like: securityId, tradingSymbol, exchangeSegment, instrument, drvStrikePrice, drvOptionType, drvExpiryDate
@@ -9,7 +13,7 @@ def load_instruments(csv_path: str | Path = "data/instruments.csv") -> pd.DataFr
     df.columns = [c.strip() for c in df.columns]
     return df
 
-def find_atm_option(df: pd.DataFrame, underlying_ltp: float, expiry: str, option_type: str, 
+def find_atm_option(df: pd.DataFrame, underlying_ltp: float, expiry: str, option_type: str,
                     exchange_segment: str = "IDX_I", tick: int = 50):
     # For NIFTY index options with 50/100 strike steps (adjust tick as needed).
     # Choose ATM (nearest strike) or slightly ITM: prefer ATM; if ITM requested, shift one tick into ITM.
@@ -26,3 +30,123 @@ def find_atm_option(df: pd.DataFrame, underlying_ltp: float, expiry: str, option
     if chosen.empty:
         raise ValueError("No ATM strike found for filters")
     return chosen.iloc[0].to_dict()
+
+# --- Indexed lookup ---
+# Built once from the instrument CSV: for every (segment, expiry date, CALL/PUT,
+# underlying) a sorted strike list plus row tuples, so ATM resolution is one
+# bisect. Persisted next to the CSV as a pickle snapshot stamped with the CSV's
+# size and mtime; a changed CSV invalidates it. An unwritable snapshot (e.g. a
+# read-only data dir) only costs the rebuild on the next start.
+
+SNAPSHOT_VERSION = 1
+_OPT_TYPES = {"CALL": "CALL", "CE": "CALL", "PUT": "PUT", "PE": "PUT"}
+
+def _expiry_key(expiry) -> str:
+    return str(expiry)[:10]
+
+def _underlying(symbol) -> str:
+    # "NIFTY-Dec2024-24000-CE" -> "NIFTY"
+    return str(symbol).split("-", 1)[0].strip().upper() if isinstance(symbol, str) else ""
+
+def _stamp(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+class InstrumentIndex:
+    def __init__(self, columns: list[str], chains: dict[tuple, tuple[list[float], list[tuple]]]):
+        self.columns = columns
+        # (segment, expiry, CALL|PUT, underlying or "") -> (sorted strikes, rows)
+        self.chains = chains
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "InstrumentIndex":
+        opt = df["drvOptionType"].astype(str).str.upper().map(_OPT_TYPES)
+        df = df[opt.notna()].assign(_opt=opt[opt.notna()])
+        df = df.assign(_exp=df["drvExpiryDate"].map(_expiry_key),
+                       _und=df["tradingSymbol"].map(_underlying) if "tradingSymbol" in df else "")
+        columns = [c for c in df.columns if not c.startswith("_")]
+        df = df.sort_values("drvStrikePrice", kind="stable")
+        chains: dict[tuple, tuple[list[float], list[tuple]]] = {}
+
+        def add(keys: tuple, g: pd.DataFrame):
+            chains[keys] = (g["drvStrikePrice"].astype(float).tolist(),
+                            list(g[columns].itertuples(index=False, name=None)))
+
+        for keys, g in df.groupby(["exchangeSegment", "_exp", "_opt", "_und"], sort=False):
+            add(keys, g)
+        if (df["_und"] != "").any():
+            # underlying-agnostic view, same as find_atm_option's filter
+            for (seg, exp, o), g in df.groupby(["exchangeSegment", "_exp", "_opt"], sort=False):
+                add((seg, exp, o, ""), g)
+        return cls(columns, chains)
+
+    # --- Snapshot ---
+    @staticmethod
+    def snapshot_path(csv_path: str | Path) -> Path:
+        p = Path(csv_path)
+        return p.with_name(p.name + ".idx.pkl")
+
+    def save(self, path: Path, stamp: tuple[int, int]):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "stamp": stamp, "columns": self.columns,
+                         "chains": self.chains}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, csv_path: str | Path = "data/instruments.csv") -> "InstrumentIndex":
+        csv_path = Path(csv_path)
+        snap = cls.snapshot_path(csv_path)
+        stamp = _stamp(csv_path)
+        if snap.exists():
+            try:
+                with open(snap, "rb") as f:
+                    blob = pickle.load(f)
+                if blob.get("version") == SNAPSHOT_VERSION and tuple(blob.get("stamp", ())) == stamp:
+                    return cls(blob["columns"], blob["chains"])
+            except (pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+                pass
+        idx = cls.build(load_instruments(csv_path))
+        try:
+            idx.save(snap, stamp)
+        except OSError as e:
+            logger.warning(f"instruments: snapshot {snap} not written ({e!r}); using the in-memory index")
+        return idx
+
+    # --- Lookups ---
+    def _chain(self, expiry: str, option_type: str, exchange_segment: str, underlying: str | None):
+        key = (exchange_segment, _expiry_key(expiry), _OPT_TYPES.get(option_type.upper(), option_type.upper()),
+               (underlying or "").upper())
+        chain = self.chains.get(key)
+        if chain is None or not chain[0]:
+            raise ValueError("No ATM strike found for filters")
+        return chain
+
+    def atm_position(self, strikes: list[float], underlying_ltp: float, tick: int = 50) -> int:
+        target = round(underlying_ltp / tick) * tick
+        i = bisect_left(strikes, target)
+        if i == len(strikes) or (i > 0 and target - strikes[i - 1] <= strikes[i] - target):
+            i -= 1
+        return i
+
+    def row(self, rec: tuple) -> dict:
+        return dict(zip(self.columns, rec))
+
+    def find_atm(self, underlying_ltp: float, expiry: str, option_type: str, exchange_segment: str = "IDX_I",
+                 tick: int = 50, itm_steps: int = 0, underlying: str | None = None) -> dict:
+        # itm_steps=1 -> the "slightly ITM" strike (one below ATM for CALL, one above for PUT)
+        strikes, rows = self._chain(expiry, option_type, exchange_segment, underlying)
+        i = self.atm_position(strikes, underlying_ltp, tick)
+        i += -itm_steps if _OPT_TYPES.get(option_type.upper()) == "CALL" else itm_steps
+        return self.row(rows[min(max(i, 0), len(rows) - 1)])
+
+    def neighbours(self, underlying_ltp: float, expiry: str, option_type: str, n: int = 2,
+                   exchange_segment: str = "IDX_I", tick: int = 50, underlying: str | None = None) -> list[dict]:
+        # ATM +/- n strikes, ascending by strike
+        strikes, rows = self._chain(expiry, option_type, exchange_segment, underlying)
+        i = self.atm_position(strikes, underlying_ltp, tick)
+        return [self.row(r) for r in rows[max(i - n, 0):i + n + 1]]
+
+    def expiries(self, exchange_segment: str = "IDX_I", underlying: str | None = None) -> list[str]:
+        u = (underlying or "").upper()
+        return sorted({k[1] for k in self.chains if k[0] == exchange_segment and k[3] == u})
@@ -0,0 +1,400 @@
+from __future__ import annotations
+import asyncio, itertools, math, time
+from dataclasses import dataclass, field
+from typing import Any
+import httpx
+from loguru import logger
+from .. import metrics
+from ..config import settings
+from ..dhan_client import DhanClient
+from ..strategy.nifty_atm_option import NiftyATMOptionStrategy
+
+# Order execution for LiveTrader: prebuilt payload templates per instrument,
+# entry + protective SL-M sent concurrently, trailing-stop modifications that
+# follow step_tsl but are throttled and coalesced (one in flight, latest level
+# wins), and order state kept from acks, pushed order updates and targeted
+# GET /orders/{id} calls for still-open orders only (never the full book).
+# The SL is sent before the entry fills, so it follows the entry: cancelled
+# (and any short it opened covered) if the entry dies unfilled, resized to the
+# filled quantity and re-based to the fill price once the fill is known.
+# A placement that gets no broker answer (timeout, dropped connection) is
+# UNKNOWN, not REJECTED: it is looked up by its correlation id before anything
+# is decided, since the order may well be live at the exchange.
+# Latency per order lands in metrics histograms exec.signal_to_send and
+# exec.send_to_ack.
+
+TERMINAL = {"TRADED", "CANCELLED", "REJECTED", "EXPIRED"}
+UNKNOWN = "UNKNOWN"       # sent, no broker answer: may or may not exist
+OPTION_TICK = 0.05
+
+def round_tick(px: float, tick: float = OPTION_TICK, down: bool = True) -> float:
+    f = math.floor if down else math.ceil
+    return round(f(px / tick + 1e-9) * tick, 2)
+
+class OrderTemplate:
+    # Static fields of every order for one instrument, built once
+    def __init__(self, security_id: int | str, exchange_segment: str, product: str = "INTRADAY"):
+        self.base = {
+            "dhanClientId": settings.DHAN_CLIENT_ID,
+            "exchangeSegment": exchange_segment,
+            "productType": product,
+            "validity": "DAY",
+            "securityId": str(security_id),
+        }
+
+    def market(self, side: str, qty: int, tag: str = "") -> dict:
+        return {**self.base, "transactionType": side, "orderType": "MARKET", "quantity": qty,
+                "price": 0, "correlationId": tag}
+
+    def stop_market(self, side: str, qty: int, trigger: float, tag: str = "") -> dict:
+        return {**self.base, "transactionType": side, "orderType": "STOP_LOSS_MARKET", "quantity": qty,
+                "price": 0, "triggerPrice": trigger, "correlationId": tag}
+
+    def modify_trigger(self, order_id: str, qty: int, trigger: float) -> dict:
+        return {"dhanClientId": self.base["dhanClientId"], "orderId": order_id, "orderType": "STOP_LOSS_MARKET",
+                "quantity": qty, "price": 0, "triggerPrice": trigger, "validity": "DAY"}
+
+@dataclass
+class OrderState:
+    order_id: str | None
+    role: str                      # ENTRY | SL | EXIT
+    tag: str = ""                  # correlationId, unique per order
+    status: str = "SENT"
+    filled_qty: int = 0
+    avg_price: float | None = None
+    t_signal: float = 0.0          # time.monotonic()
+    t_send: float = 0.0
+    t_ack: float = 0.0
+    last_update: float = 0.0
+
+    def apply(self, upd: dict):
+        self.status = str(upd.get("orderStatus") or upd.get("status") or self.status).upper()
+        if upd.get("filledQty") is not None:
+            self.filled_qty = int(upd["filledQty"])
+        px = upd.get("averageTradedPrice") or upd.get("tradedPrice")
+        if px:
+            self.avg_price = float(px)
+        self.last_update = time.monotonic()
+
+@dataclass
+class Position:
+    security_id: str
+    exchange_segment: str
+    qty: int
+    ref_price: float               # LTP at signal; replaced by the fill price once known
+    entry: OrderState
+    sl: OrderState
+    sl_trigger: float
+    high_water: float
+    closed: bool = False
+    exit_price: float | None = None
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def entry_price(self) -> float:
+        return self.entry.avg_price or self.ref_price
+
+class ExecutionEngine:
+    def __init__(self, client: DhanClient, strat: NiftyATMOptionStrategy, modify_interval: float = 1.0,
+                 poll_interval: float = 1.0, tick: float = OPTION_TICK):
+        self.client = client
+        self.strat = strat
+        self.tick = tick                # exchange price tick of the traded contracts
+        self.modify_interval = modify_interval
+        self.poll_interval = poll_interval
+        self.templates: dict[tuple[str, str], OrderTemplate] = {}
+        self.orders: dict[str, OrderState] = {}
+        self.position: Position | None = None
+        self._desired_trigger: float | None = None
+        self._modifier: asyncio.Task | None = None
+        self._watcher: asyncio.Task | None = None
+        self._resync = False            # SL quantity/trigger must be re-sent even if not higher
+        self._tasks: set[asyncio.Task] = set()
+        self._run = time.strftime("%H%M%S")
+        self._seq = itertools.count(1)
+        self.modifies_sent = 0
+        self.modifies_coalesced = 0
+        self.sl_hits = 0
+
+    def template(self, security_id: int | str, exchange_segment: str) -> OrderTemplate:
+        key = (str(security_id), exchange_segment)
+        t = self.templates.get(key)
+        if t is None:
+            t = self.templates[key] = OrderTemplate(security_id, exchange_segment)
+        return t
+
+    def _tag(self, role: str) -> str:
+        # correlationId the order can be found by if its placement goes unanswered
+        return f"{role}-{self._run}-{next(self._seq)}"
+
+    async def _send(self, payload: dict, role: str, t_signal: float) -> OrderState:
+        st = OrderState(order_id=None, role=role, tag=payload.get("correlationId", ""), t_signal=t_signal,
+                        t_send=time.monotonic())
+        metrics.histogram("exec.signal_to_send").observe(st.t_send - t_signal)
+        try:
+            resp = await self.client.place_order(payload)
+        except httpx.HTTPStatusError as e:
+            # an explicit refusal; a 429/5xx says nothing about whether the order exists
+            code = e.response.status_code
+            st.status = "REJECTED" if 400 <= code < 500 and code != 429 else UNKNOWN
+            logger.error(f"[exec] {role} order {st.status.lower()}: {e!r}")
+            return st
+        except Exception as e:
+            st.status = UNKNOWN
+            logger.error(f"[exec] {role} order unanswered, reconciling {st.tag}: {e!r}")
+            return st
+        st.t_ack = time.monotonic()
+        metrics.histogram("exec.send_to_ack").observe(st.t_ack - st.t_send)
+        self._register(st, resp)
+        return st
+
+    def _register(self, st: OrderState, resp: dict):
+        st.order_id = str(resp.get("orderId")) if resp.get("orderId") is not None else None
+        st.apply(resp)
+        if st.order_id:
+            self.orders[st.order_id] = st
+
+    async def _reconcile(self, st: OrderState, polls: int = 3):
+        # find an UNKNOWN order by correlation id; absent every time -> it never
+        # reached the broker (REJECTED); lookups failing -> still UNKNOWN
+        missing = 0
+        for k in range(polls):
+            if k:
+                await asyncio.sleep(self.poll_interval)
+            try:
+                resp = await self.client.order_by_correlation(st.tag)
+            except httpx.HTTPStatusError as e:
+                if 400 <= e.response.status_code < 500 and e.response.status_code != 429:
+                    missing += 1
+                continue
+            except Exception as e:
+                logger.debug(f"[exec] lookup {st.tag} failed: {e!r}")
+                continue
+            if isinstance(resp, list):
+                resp = resp[0] if resp else None
+            if resp and resp.get("orderId") is not None:
+                self._register(st, resp)
+                logger.warning(f"[exec] {st.role} {st.tag} found as {st.order_id} ({st.status})")
+                return
+            missing += 1
+        if missing == polls:
+            st.status = "REJECTED"
+            logger.warning(f"[exec] {st.role} {st.tag} not at the broker, treated as rejected")
+
+    async def enter(self, security_id: int | str, exchange_segment: str, qty: int, ref_price: float,
+                    t_signal: float | None = None, meta: dict | None = None) -> Position | None:
+        if self.position is not None and not self.position.closed:
+            return None
+        t_signal = t_signal or time.monotonic()
+        tpl = self.template(security_id, exchange_segment)
+        trigger = round_tick(ref_price - self.strat.p.sl_per_unit, self.tick)
+        entry, sl = await asyncio.gather(
+            self._send(tpl.market("BUY", qty, self._tag("entry")), "ENTRY", t_signal),
+            self._send(tpl.stop_market("SELL", qty, trigger, self._tag("sl")), "SL", t_signal),
+        )
+        await asyncio.gather(*(self._reconcile(st) for st in (entry, sl) if st.status == UNKNOWN))
+        if entry.status == "REJECTED":
+            await self._unwind_sl(sl, tpl)
+            return None
+        if entry.status == UNKNOWN:
+            # may be live: keep it (and its SL) and let the watcher settle it
+            logger.error(f"[exec] entry {entry.tag} still unknown, holding its SL until resolved")
+        self.position = Position(str(security_id), exchange_segment, qty, ref_price, entry, sl, trigger,
+                                 high_water=ref_price, meta=meta or {})
+        self._desired_trigger = None
+        self._resync = False
+        self._after_update(entry)      # the ack may already carry the fill
+        if not self.position.closed:
+            self._watcher = asyncio.create_task(self._watch())
+        return self.position
+
+    # --- trailing ---
+    def on_price(self, ltp: float):
+        # called per tick of the held option; cheap: compares and at most a task wake-up
+        pos = self.position
+        if pos is None or pos.closed:
+            return
+        if ltp > pos.high_water:
+            pos.high_water = ltp
+        new = round_tick(self.strat.step_tsl(pos.entry_price, pos.high_water), self.tick)
+        if new > pos.sl_trigger and (self._desired_trigger is None or new > self._desired_trigger):
+            if self._desired_trigger is not None:
+                self.modifies_coalesced += 1
+            self._desired_trigger = new
+            self._wake_modifier()
+
+    def _wake_modifier(self):
+        if self._modifier is None or self._modifier.done():
+            self._modifier = asyncio.create_task(self._modify_loop())
+
+    async def _modify_loop(self):
+        last = 0.0
+        while self._desired_trigger is not None or self._resync:
+            pos = self.position
+            if pos is None or pos.closed or pos.sl.order_id is None or pos.sl.status in TERMINAL:
+                self._desired_trigger, self._resync = None, False
+                return
+            wait = self.modify_interval - (time.monotonic() - last)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            target, self._desired_trigger = self._desired_trigger, None
+            resync, self._resync = self._resync, False
+            if target is None:
+                target = pos.sl_trigger
+            if not resync and target <= pos.sl_trigger:
+                continue
+            last = time.monotonic()
+            try:
+                await self.client.modify_order(pos.sl.order_id,
+                                               self.template(pos.security_id, pos.exchange_segment)
+                                               .modify_trigger(pos.sl.order_id, pos.qty, target))
+                pos.sl_trigger = target
+                self.modifies_sent += 1
+                metrics.histogram("exec.modify_rtt").observe(time.monotonic() - last)
+            except Exception as e:
+                logger.warning(f"[exec] SL modify to {target} failed: {e!r}")
+                self._resync = self._resync or resync
+
+    # --- order state ---
+    def on_order_update(self, upd: dict):
+        # push updates (Dhan order update stream) or targeted status responses
+        oid = str(upd.get("orderId") or upd.get("orderNo") or "")
+        st = self.orders.get(oid)
+        if st is None:
+            return
+        st.apply(upd)
+        self._after_update(st)
+
+    def _after_update(self, st: OrderState):
+        pos = self.position
+        if pos is None or pos.closed:
+            return
+        if st is pos.entry:
+            self._after_entry(pos)
+        elif st is pos.sl and st.status == "TRADED":
+            self._sl_exit(pos)
+
+    def _after_entry(self, pos: Position):
+        e = pos.entry
+        if e.status in TERMINAL and not e.filled_qty:
+            # rejected/cancelled after the ack: nothing bought, so the SELL SL-M must not stay live
+            pos.qty, pos.closed = 0, True
+            logger.warning(f"[exec] entry {e.order_id} {e.status} unfilled, cancelling SL {pos.sl.order_id}")
+            self._spawn(self._unwind_sl(pos.sl, self.template(pos.security_id, pos.exchange_segment)))
+            return
+        if e.avg_price and e.avg_price != pos.ref_price:
+            # re-base the initial stop on the actual fill instead of the signal-time LTP
+            pos.ref_price = pos.high_water = e.avg_price
+            self._desired_trigger = round_tick(self.strat.step_tsl(e.avg_price, e.avg_price), self.tick)
+            self._resync = True
+        if e.filled_qty and e.filled_qty != pos.qty:
+            # partial fill: protect exactly what is held
+            pos.qty = e.filled_qty
+            self._resync = True
+        if self._resync:
+            self._wake_modifier()
+
+    def _sl_exit(self, pos: Position):
+        pos.closed = True
+        pos.exit_price = pos.sl.avg_price or pos.sl_trigger
+        if pos.exit_price - pos.entry_price <= -self.strat.p.sl_per_unit + 1e-6:
+            self.sl_hits += 1
+        logger.info(f"[exec] SL/TSL exit {pos.security_id} @ {pos.exit_price}")
+
+    def _spawn(self, coro):
+        t = asyncio.create_task(coro)
+        self._tasks.add(t)
+        t.add_done_callback(self._tasks.discard)
+
+    async def _unwind_sl(self, sl: OrderState, tpl: OrderTemplate):
+        # no entry behind this SL: cancel it and buy back whatever it already sold
+        if sl.status == UNKNOWN:
+            await self._reconcile(sl)
+        if sl.order_id and sl.status not in TERMINAL:
+            await self._cancel(sl)
+        if sl.filled_qty:
+            await self._send(tpl.market("BUY", sl.filled_qty, self._tag("cover")), "EXIT", time.monotonic())
+            logger.error(f"[exec] SL {sl.order_id} {sl.status} without an entry, covered {sl.filled_qty}")
+
+    async def _watch(self):
+        # targeted polling of open orders only, until the position is closed
+        while self.position is not None and not self.position.closed:
+            await asyncio.sleep(self.poll_interval)
+            for st in (self.position.entry, self.position.sl):
+                if st.status == UNKNOWN:
+                    await self._reconcile(st, polls=1)
+                    if st.status != UNKNOWN:
+                        self._after_update(st)
+                        if st is self.position.sl and st.order_id and st.status not in TERMINAL:
+                            self._resync = True     # bring the found SL to the current qty/trigger
+                            self._wake_modifier()
+                elif st.order_id and st.status not in TERMINAL:
+                    try:
+                        self.on_order_update({"orderId": st.order_id, **(await self.client.order_status(st.order_id))})
+                    except Exception as e:
+                        logger.debug(f"[exec] status {st.order_id} failed: {e!r}")
+
+    async def _refresh(self, st: OrderState):
+        try:
+            st.apply(await self.client.order_status(st.order_id))
+        except Exception as e:
+            logger.debug(f"[exec] status {st.order_id} failed: {e!r}")
+
+    async def _cancel(self, st: OrderState):
+        try:
+            st.apply(await self.client.cancel_order(st.order_id))
+        except Exception as e:
+            logger.warning(f"[exec] cancel {st.order_id} failed: {e!r}")
+        if st.status not in TERMINAL:
+            # a cancel racing a fill is refused or acked as pending: ask for the final state
+            await self._refresh(st)
+
+    async def _await_fill(self, st: OrderState, polls: int = 5):
+        # market orders ack without a price; poll the order until it is done
+        if st.status == UNKNOWN:
+            await self._reconcile(st)
+        for _ in range(polls):
+            if st.status in TERMINAL or st.order_id is None:
+                return
+            await asyncio.sleep(self.poll_interval)
+            if st.status not in TERMINAL:
+                await self._refresh(st)
+
+    async def flatten(self):
+        # square off at market and cancel the protective order (e.g. at cutoff)
+        pos = self.position
+        if pos is None or pos.closed:
+            return
+        if pos.entry.order_id and pos.entry.status not in TERMINAL:
+            await self._cancel(pos.entry)
+            self._after_update(pos.entry)       # unfilled: closes and unwinds the SL
+        sl = pos.sl
+        if not pos.closed and sl.status == UNKNOWN:
+            await self._reconcile(sl)
+        if not pos.closed and sl.order_id and sl.status not in TERMINAL:
+            await self._cancel(sl)
+        # whatever the SL sold before it was cancelled (or modified) is no longer held
+        held = pos.qty - (sl.filled_qty if sl.status in TERMINAL else 0)
+        if pos.closed:
+            pass
+        elif held <= 0:
+            # the SL filled between polls: already flat, a market SELL would go short
+            self._sl_exit(pos)
+        else:
+            tpl = self.template(pos.security_id, pos.exchange_segment)
+            ex = await self._send(tpl.market("SELL", held, self._tag("exit")), "EXIT", time.monotonic())
+            await self._await_fill(ex)
+            pos.closed = True
+            pos.exit_price = ex.avg_price
+            if sl.filled_qty and sl.avg_price and ex.avg_price:
+                # part went out on the SL: blend both fills
+                pos.exit_price = (sl.filled_qty * sl.avg_price + held * ex.avg_price) / (sl.filled_qty + held)
+        await self.close()
+
+    async def close(self):
+        for t in (self._modifier, self._watcher):
+            if t is not None and not t.done():
+                t.cancel()
+
+    def latency_snapshot(self) -> dict[str, Any]:
+        return metrics.snapshot("exec.")
@@ -1,43 +1,94 @@
-import asyncio, json, math
-from datetime import datetime
+import asyncio, json, math, time
 from loguru import logger
+from .. import metrics
 from ..config import settings
 from ..dhan_client import DhanClient
+from ..feed.live_feed import LiveFeed
+from ..feed.option_chain import OptionChainCache
+from ..feed.quotes import QuoteBatcher
+from ..notify.alerts import AlertQueue, trade_alert
+from .execution import ExecutionEngine
+from ..runtime import state
+from ..runtime.engine import StrategyRuntime, chain_leg
+from ..runtime.sources import LiveFeedSource, QuotePollSource
+from ..storage.tick_journal import TickJournal
+from ..storage.trade_store import TradeStore
 from ..strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
-from ..utils import in_trading_window, after_cutoff
 
 class LiveTrader:
+    # Real orders through ExecutionEngine; candles, signals, session and SL
+    # accounting live in runtime.engine.StrategyRuntime (shared with paper/replay).
     def __init__(self):
         self.client = DhanClient()
+        self.journal = TickJournal()
+        self.store = TradeStore()
+        self.alerts = AlertQueue()
+        self.quotes = QuoteBatcher(self.client, journal=self.journal)
         self.strat = NiftyATMOptionStrategy(Params())
-        self.sl_hits = 0
-        self.position = None  # store order ids and prices
-
-    async def place_entry(self, security_id: str, side: str, qty: int, price: float | None=None):
-        payload = {
-            "dhanClientId": settings.DHAN_CLIENT_ID,
-            "transactionType": "BUY",
-            "exchangeSegment": settings.EXCHANGE_SEGMENT,
-            "productType": "INTRADAY",
-            "orderType": "MARKET",
-            "validity": "DAY",
-            "securityId": str(security_id),
-            "quantity": qty,
-        }
-        resp = await self.client.place_order(payload)
+        self.exec = ExecutionEngine(self.client, self.strat)
+        self.chain = OptionChainCache(self.client, settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT,
+                                      refresh_sec=settings.OPTION_CHAIN_REFRESH_SEC, tz=settings.TIMEZONE)
+        self._select = chain_leg(self.chain, itm_steps=1 if self.strat.p.slightly_itm else 0)
+        self.runtime = StrategyRuntime(self.strat, self.exec, self.resolve_strike, on_trade=self.on_trade,
+                                       mode="live")
+
+    @property
+    def position(self):
+        return self.runtime.position
+
+    @property
+    def sl_hits(self) -> int:
+        return self.strat.daily_sl_hits
+
+    def resolve_strike(self, direction: str, spot: float, ts: float) -> dict | None:
+        # ATM / slightly ITM leg from the cached chain; no network on this path
+        return self._select(direction, spot, ts)
+
+    def on_trade(self, t):
+        logger.info(f"[live] {t.side} {t.symbol} {t.entry_price:.2f} -> {t.exit_price} ({t.notes})")
+        self.store.add([t], source="live")
+        self.alerts.send(trade_alert(t, "live"))
+
+    async def place_entry(self, security_id: str, side: str, qty: int, price: float | None=None,
+                          exchange_segment: str | None = None):
+        tpl = self.exec.template(security_id, exchange_segment or settings.EXCHANGE_SEGMENT)
+        resp = await self.client.place_order(tpl.market("BUY", qty))
         return resp
 
+    def source(self):
+        underlying = [(settings.EXCHANGE_SEGMENT, settings.NSE_UNDERLYING_SECURITY_ID)]
+        if settings.LIVE_WS_URL:
+            feed = LiveFeed(settings.LIVE_WS_URL, journal=self.journal)
+            metrics.gauge("feed.queue_depth", feed.queue_depth)
+            metrics.gauge("feed", lambda: feed.stats)
+            self._feed_task = asyncio.create_task(feed.run())
+            return LiveFeedSource(feed, underlying)
+        source = QuotePollSource(self.quotes, underlying, tz=settings.TIMEZONE)
+        metrics.gauge("quotes.poll_errors", lambda: source.errors)
+        return source
+
     async def loop(self):
-        # Simplified live loop
+        self._feed_task = None
         try:
-            while True:
-                now = datetime.utcnow()
-                if after_cutoff(now, settings.TIMEZONE) or self.sl_hits >= self.strat.p.max_daily_sls:
-                    await asyncio.sleep(5); continue
-                # TODO: build candles from Market Quote or WS to detect momentum and then pick ATM strike via Option Chain
-                await asyncio.sleep(3)
+            self.journal.start()
+            self.alerts.start()
+            state.register("alerts", self.alerts.stats)
+            metrics.gauge("alerts.queued", lambda: len(self.alerts.pending))
+            metrics.gauge("quotes.pending", self.quotes.depth)
+            metrics.gauge("journal.records", lambda: self.journal.records)
+            await self.chain.start()
+            await self.runtime.run(self.source())
         finally:
+            if self._feed_task is not None:
+                self._feed_task.cancel()
+            await self.chain.stop()
             await self.client.close()
+            await self.journal.stop()
+            self.store.close()
+            state.unregister("alerts")
+            for name in ("feed.queue_depth", "feed", "alerts.queued", "quotes.pending", "journal.records"):
+                metrics.unregister(name)
+            await self.alerts.stop()
 
 if __name__ == "__main__":
     asyncio.run(LiveTrader().loop())
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import asyncio, re, time
+from bisect import bisect_left
+from typing import Callable
+
+# Process-wide latency histograms and gauges. Fixed bucket bounds and
+# preallocated counters: observe() is a bisect plus a few integer/float
+# updates. Gauges are callables sampled only when metrics are read (queue
+# depths, feed counters), so they cost nothing on the hot path. app.py serves
+# everything at /metrics (Prometheus text) and /metrics.json.
+#   feed.receive           websocket frame in hand -> its packets on the consumer queue
+#   feed.decode            binary decode share of feed.receive
+#   runtime.event          one tick/bar through the strategy runtime
+#   runtime.candle_close   event arrival -> candle closed (aggregation)
+#   runtime.signal         momentum check on a closed candle
+#   runtime.strike         option leg resolution
+#   runtime.event_to_order event arrival -> entry order acknowledged
+#   exec.signal_to_send / exec.send_to_ack   order send and broker ack (live)
+#   dhan.<endpoint>        REST round trips; loop.lag  event loop scheduling delay
+
+BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# in-process stages run in microseconds
+STAGE_BUCKETS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+NAMESPACE = "dhan_algo"
+
+class LatencyHistogram:
+    __slots__ = ("name", "bounds", "counts", "count", "total", "max")
+
+    def __init__(self, name: str, bounds_ms: tuple[float, ...] = BUCKETS_MS):
+        self.name = name
+        self.bounds = [b / 1000.0 for b in bounds_ms]   # seconds
+        self.counts = [0] * (len(self.bounds) + 1)     # last slot: > largest bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th observation (seconds)
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count * 1000.0) if self.count else 0.0,
+            "p50_ms": self.quantile(0.50) * 1000.0,
+            "p99_ms": self.quantile(0.99) * 1000.0,
+            "max_ms": self.max * 1000.0,
+            "buckets_ms": dict(zip([*(f"le_{b * 1000:g}" for b in self.bounds), "inf"], self.counts)),
+        }
+
+_HISTOGRAMS: dict[str, LatencyHistogram] = {}
+
+def histogram(name: str, bounds_ms: tuple[float, ...] = BUCKETS_MS) -> LatencyHistogram:
+    # bounds apply when the histogram is first created
+    h = _HISTOGRAMS.get(name)
+    if h is None:
+        h = _HISTOGRAMS[name] = LatencyHistogram(name, bounds_ms)
+    return h
+
+def snapshot(prefix: str = "") -> dict[str, dict]:
+    return {k: h.snapshot() for k, h in _HISTOGRAMS.items() if k.startswith(prefix)}
+
+# --- Gauges ---
+Probe = Callable[[], "float | int | dict[str, float | int]"]
+_GAUGES: dict[str, Probe] = {}
+
+def gauge(name: str, probe: Probe):
+    # probe returns a number, or a dict of numbers (one gauge per key)
+    _GAUGES[name] = probe
+
+def unregister(name: str):
+    _GAUGES.pop(name, None)
+
+def gauges() -> dict[str, float]:
+    out = {}
+    for name, probe in list(_GAUGES.items()):
+        try:
+            v = probe()
+        except Exception:
+            continue
+        if isinstance(v, dict):
+            out.update({f"{name}.{k}": float(x) for k, x in v.items() if isinstance(x, (int, float))})
+        elif v is not None:
+            out[name] = float(v)
+    return out
+
+class LoopLagMonitor:
+    # Sleeps `interval` in a loop; the overshoot is how long ready callbacks kept
+    # the event loop from running this one (loop.lag histogram; loop.lag.last /
+    # loop.lag.max gauges, named apart from the histogram's exported family).
+    def __init__(self, interval: float = 0.1, name: str = "loop.lag"):
+        self.interval = interval
+        self.name = name
+        self.hist = histogram(name, STAGE_BUCKETS_MS)
+        self.last = 0.0
+        self.max = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - t - self.interval, 0.0)
+            self.hist.observe(lag)
+            self.last = lag
+            if lag > self.max:
+                self.max = lag
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            gauge(f"{self.name}.last", lambda: {"seconds": self.last})
+            gauge(f"{self.name}.max", lambda: {"seconds": self.max})
+
+    async def stop(self):
+        unregister(f"{self.name}.last")
+        unregister(f"{self.name}.max")
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# --- Export ---
+def report() -> dict:
+    return {"ts": time.time(), "histograms": snapshot(), "gauges": gauges()}
+
+def _metric_name(name: str) -> str:
+    return f"{NAMESPACE}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+def prometheus_text() -> str:
+    # Prometheus text exposition format 0.0.4; histograms in seconds
+    lines = []
+    for name, h in sorted(_HISTOGRAMS.items()):
+        m = _metric_name(name) + "_seconds"
+        lines.append(f"# TYPE {m} histogram")
+        cum = 0
+        for b, c in zip(h.bounds, h.counts):
+            cum += c
+            lines.append(f'{m}_bucket{{le="{b:g}"}} {cum}')
+        lines.append(f'{m}_bucket{{le="+Inf"}} {h.count}')
+        lines.append(f"{m}_sum {h.total:.9g}")
+        lines.append(f"{m}_count {h.count}")
+    for name, v in sorted(gauges().items()):
+        m = _metric_name(name)
+        lines.append(f"# TYPE {m} gauge")
+        lines.append(f"{m} {v:.9g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import asyncio, time
+from collections import deque
+import httpx
+from loguru import logger
+from ..config import settings
+from ..transport import RateLimiter
+
+# Outbound Telegram alerts off the trading path. send() only appends to a
+# bounded deque (the oldest alert is dropped when full, never the caller
+# blocked); a background task coalesces whatever is queued into one message
+# per send, paced by Telegram's limits for a chat: 1 message/s and 20/min
+# (group chats). 429 replies are honoured via retry_after.
+# api_url / transport point the queue at a local stand-in for the Bot API.
+
+TELEGRAM_LIMITS = [(1, 1.0), (20, 60.0)]
+MAX_MESSAGE = 4096
+
+class AlertQueue:
+    def __init__(self, token: str | None = None, chat_id: str | int | None = None, api_url: str | None = None,
+                 transport: httpx.AsyncBaseTransport | None = None, batch_window: float = 0.5,
+                 max_queue: int = 1000, limits: list[tuple[int, float]] = TELEGRAM_LIMITS,
+                 max_attempts: int = 3):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        self.chat_id = chat_id if chat_id is not None else settings.TELEGRAM_CHAT_ID
+        self.http = httpx.AsyncClient(base_url=api_url or settings.TELEGRAM_API_URL, timeout=10.0,
+                                      transport=transport)
+        self.batch_window = batch_window
+        self.limiter = RateLimiter(limits)
+        self.max_attempts = max_attempts
+        self.pending: deque[str] = deque(maxlen=max_queue)
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._busy = False
+        self.sent = 0            # messages delivered
+        self.alerts = 0          # alerts delivered (several per message when batched)
+        self.dropped = 0
+        self.failed = 0
+
+    def send(self, text: str):
+        # non-blocking; safe to call from any coroutine or callback on the loop
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(text)
+        self._ready.set()
+
+    def _batch(self) -> list[str]:
+        batch, size = [], 0
+        while self.pending:
+            text = self.pending[0][:MAX_MESSAGE]
+            if batch and size + len(text) + 1 > MAX_MESSAGE:
+                break
+            batch.append(text)
+            size += len(text) + 1
+            self.pending.popleft()
+        return batch
+
+    async def _post(self, text: str) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            await self.limiter.acquire()
+            try:
+                r = await self.http.post(f"/bot{self.token}/sendMessage",
+                                         json={"chat_id": self.chat_id, "text": text,
+                                               "disable_web_page_preview": True})
+            except httpx.TransportError as e:
+                logger.warning(f"Telegram alert attempt {attempt} failed: {e!r}")
+                await asyncio.sleep(min(2 ** attempt, 10))
+                continue
+            if r.status_code == 429:
+                try:
+                    retry = (r.json().get("parameters") or {}).get("retry_after", 1)
+                except ValueError:
+                    retry = 1
+                logger.warning(f"Telegram rate limited, retrying in {retry}s")
+                await asyncio.sleep(float(retry))
+                continue
+            if r.is_success:
+                return True
+            logger.warning(f"Telegram alert rejected: {r.status_code} {r.text[:200]}")
+            return False
+        return False
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self._ready.clear()
+                await self._ready.wait()
+                # let a burst of fills land in the same message
+                await asyncio.sleep(self.batch_window)
+            batch = self._batch()
+            self._busy = True
+            try:
+                ok = await self._post("\n".join(batch))
+            finally:
+                self._busy = False
+            if ok:
+                self.sent += 1
+                self.alerts += len(batch)
+            else:
+                self.failed += len(batch)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain: float = 5.0):
+        # give queued alerts up to `drain` seconds to go out, then close
+        deadline = time.monotonic() + drain
+        while (self.pending or self._busy) and self._task is not None and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.http.aclose()
+
+    def stats(self) -> dict:
+        return {"queued": len(self.pending), "sent": self.sent, "alerts": self.alerts,
+                "dropped": self.dropped, "failed": self.failed, "rate_wait_s": round(self.limiter.waited, 3)}
+
+def trade_alert(t, mode: str) -> str:
+    exit_px = "-" if t.exit_price is None else f"{t.exit_price:.2f}"
+    return f"[{mode}] {t.side} {t.symbol} {t.entry_price:.2f} -> {exit_px} pnl {t.pnl:+.2f} ({t.notes})"
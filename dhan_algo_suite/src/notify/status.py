@@ -0,0 +1,69 @@
+from __future__ import annotations
+import time
+from .. import metrics
+from ..runtime import state
+
+# Text for the Telegram status commands, rendered from runtime.state snapshots
+# and the in-process latency histograms only (no files, database or broker calls).
+
+NO_RUNTIME = "No strategy runtime is publishing in this process."
+
+def _age(ts: float) -> str:
+    s = max(time.time() - ts, 0.0)
+    return f"{s:.0f}s" if s < 120 else f"{s / 60:.0f}m"
+
+def pnl_text(snaps: dict[str, state.Snapshot] | None = None) -> str:
+    snaps = state.snapshots() if snaps is None else snaps
+    if not snaps:
+        return NO_RUNTIME
+    lines = []
+    for s in snaps.values():
+        lines.append(f"{s.strategy} [{s.mode}] {s.day or '-'}")
+        lines.append(f"  realized {s.realized:+.2f} ({s.trades} trades, {s.wins} wins)")
+        if s.position is not None:
+            lines.append(f"  open {s.unrealized:+.2f}  total {s.realized + s.unrealized:+.2f}")
+        if s.last_trade:
+            t = s.last_trade
+            lines.append(f"  last {t['side']} {t['symbol']} {t['pnl']:+.2f} ({t['notes']})")
+    return "\n".join(lines)
+
+def positions_text(snaps: dict[str, state.Snapshot] | None = None) -> str:
+    snaps = state.snapshots() if snaps is None else snaps
+    if not snaps:
+        return NO_RUNTIME
+    lines = []
+    for s in snaps.values():
+        p = s.position
+        if p is None:
+            lines.append(f"{s.strategy}: flat")
+            continue
+        ltp = "-" if p.ltp is None else f"{p.ltp:.2f}"
+        lines.append(f"{s.strategy}: {p.side} {p.symbol} x{p.qty}")
+        lines.append(f"  entry {p.entry_price:.2f}  ltp {ltp}  SL {p.sl_trigger:.2f}  "
+                     f"open {p.unrealized:+.2f}  since {_age(p.opened_at)}")
+    return "\n".join(lines)
+
+def status_text(snaps: dict[str, state.Snapshot] | None = None, extra: dict | None = None) -> str:
+    snaps = state.snapshots() if snaps is None else snaps
+    lines = [f"uptime {state.uptime() / 60:.0f}m"]
+    if not snaps:
+        lines.append(NO_RUNTIME)
+    for s in snaps.values():
+        spot = "-" if s.spot is None else f"{s.spot:.2f}"
+        lines.append(f"{s.strategy} [{s.mode}] spot {spot}  last event {_age(s.ts)} ago  events {s.events}")
+        lines.append(f"  SL hits {s.sl_hits}/{s.max_sl_hits}{'  (halted for the day)' if s.halted else ''}  "
+                     f"{'in position' if s.position is not None else 'flat'}")
+    for k, v in {**state.probes(), **(extra or {})}.items():
+        lines.append(f"{k}: {v}")
+    return "\n".join(lines)
+
+def latency_text(prefix: str = "") -> str:
+    hists = metrics.snapshot(prefix)
+    if not hists:
+        return "No latency samples yet."
+    lines = []
+    for name, h in sorted(hists.items()):
+        if h["count"]:
+            lines.append(f"{name}: n={h['count']} p50 {h['p50_ms']:.1f}ms p99 {h['p99_ms']:.1f}ms "
+                         f"max {h['max_ms']:.1f}ms")
+    return "\n".join(lines) or "No latency samples yet."
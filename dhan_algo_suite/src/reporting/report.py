@@ -1,21 +1,39 @@
+import argparse, os
 import pandas as pd
-from datetime import datetime, timedelta
+from ..storage.trade_store import TradeStore
 
-def summarize(trades_csv: str = "backtest_trades.csv"):
-    df = pd.read_csv(trades_csv, parse_dates=["ts_entry","ts_exit"])
-    df["month"] = df["ts_entry"].dt.to_period("M").astype(str)
-    by_month = df.groupby("month").agg(trades=("pnl","count"), pnl=("pnl","sum")).reset_index()
-    now = df["ts_entry"].max() if not df.empty else datetime.utcnow()
-    summary = {
-        "1m": df[df["ts_entry"] >= now - timedelta(days=30)]["pnl"].sum(),
-        "2m": df[df["ts_entry"] >= now - timedelta(days=60)]["pnl"].sum(),
-        "3m": df[df["ts_entry"] >= now - timedelta(days=90)]["pnl"].sum(),
-        "6m": df[df["ts_entry"] >= now - timedelta(days=180)]["pnl"].sum(),
-        "12m": df[df["ts_entry"] >= now - timedelta(days=360)]["pnl"].sum(),
-    }
+def summarize(strategy: str | None = None, source: str | None = "backtest", store: TradeStore | None = None):
+    # Monthly breakdown and rolling windows from the trade store's aggregates
+    # (windows end at the last recorded entry)
+    if isinstance(strategy, os.PathLike) or str(strategy).lower().endswith(".csv"):
+        # pre-store call summarize("backtest_trades.csv")
+        return summarize_csv(strategy)
+    store = store or TradeStore()
+    by_month = store.monthly(strategy, source)
+    summary = store.window_pnl(strategy, source)
     by_month.to_csv("report_monthly.csv", index=False)
     pd.Series(summary).to_csv("report_summary.csv")
     return by_month, summary
 
+def summarize_csv(trades_csv: str | os.PathLike = "backtest_trades.csv"):
+    # same report for one trades CSV (backtester.engine.save_results), through a throwaway in-memory store
+    if not os.path.exists(trades_csv):
+        raise FileNotFoundError(trades_csv)
+    store = TradeStore("sqlite://")
+    try:
+        store.import_csv(str(trades_csv), "csv", "backtest")
+        return summarize("csv", "backtest", store)
+    finally:
+        store.close()
+
 if __name__ == "__main__":
-    print(summarize())
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strategy", type=str, default=None)
+    ap.add_argument("--source", choices=["backtest", "paper", "live"], default="backtest")
+    ap.add_argument("--import-csv", type=str, default=None, help="load a backtest_trades.csv into the store first")
+    args = ap.parse_args()
+    store = TradeStore()
+    if args.import_csv:
+        store.import_csv(args.import_csv, args.strategy or "nifty_atm_option", args.source)
+    print(summarize(args.strategy, args.source, store))
+    print(store.by_strategy())
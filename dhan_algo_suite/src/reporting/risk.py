@@ -0,0 +1,196 @@
+from __future__ import annotations
+import argparse, json
+from dataclasses import dataclass
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from ..session_calendar import SessionCalendar, get_calendar
+from ..storage.trade_store import TradeStore
+from ..strategy.nifty_atm_option import Params
+
+# Risk analytics over closed trades (TradeLog lists, backtest_trades.csv or the
+# trade store). risk_metrics gives drawdown, Sharpe/Sortino on session-day PnL
+# (days without trades count as 0), expectancy, streaks and the distribution of
+# SL hits per day. monte_carlo resamples the trade (or day) PnL sequence --
+# bootstrap with replacement or order shuffles -- as (batch, n) NumPy matrices
+# sized to `max_mb`, so memory stays flat however many simulations are asked for.
+#   python -m reporting.risk --source backtest --sims 200000
+
+TRADING_DAYS = 252
+MAX_MB = 16.0        # working set per Monte Carlo batch
+
+@dataclass
+class TradeArrays:
+    pnl: np.ndarray          # per trade, entry order
+    unit: np.ndarray         # exit - entry per unit (nan if open)
+    qty: np.ndarray
+    day: np.ndarray          # local entry day (days since epoch)
+
+def trade_arrays(trades: Iterable | pd.DataFrame, calendar: SessionCalendar | None = None) -> TradeArrays:
+    # TradeLog objects/dicts or a frame with ts_entry, entry_price, exit_price, qty, pnl
+    cal = calendar or get_calendar()
+    df = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(
+        [t if isinstance(t, dict) else t.__dict__ for t in trades],
+        columns=["ts_entry", "entry_price", "exit_price", "qty", "pnl"])
+    ts = pd.DatetimeIndex(pd.to_datetime(df["ts_entry"], utc=True))
+    order = np.argsort(ts.asi8, kind="stable")
+    num = lambda c: pd.to_numeric(df[c], errors="coerce").to_numpy(np.float64)[order]
+    return TradeArrays(pnl=np.nan_to_num(num("pnl")), unit=num("exit_price") - num("entry_price"),
+                       qty=num("qty"), day=cal.day_ids(ts[order]) if len(ts) else np.empty(0, np.int64))
+
+def max_drawdown(pnl: np.ndarray) -> tuple[float, int]:
+    # deepest fall of cumulative PnL below its running peak (start = 0) and its length in trades
+    if len(pnl) == 0:
+        return 0.0, 0
+    equity = np.cumsum(pnl)
+    peak = np.maximum(np.maximum.accumulate(equity), 0.0)
+    dd = peak - equity
+    k = int(dd.argmax())
+    at_peak = np.flatnonzero(equity[:k + 1] >= peak[k])
+    return float(dd[k]), k - (int(at_peak[-1]) if len(at_peak) else -1)
+
+def _streaks(mask: np.ndarray) -> int:
+    # longest run of True
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.r_[0, mask.astype(np.int8), 0]))
+    return int((edges[1::2] - edges[::2]).max())
+
+def daily_pnl(a: TradeArrays, calendar: SessionCalendar | None = None) -> pd.Series:
+    # PnL per session day from the first to the last traded day, 0 on days without trades
+    cal = calendar or get_calendar()
+    if len(a.day) == 0:
+        return pd.Series(dtype=np.float64)
+    days = np.array(cal.trading_days, dtype=np.int64)
+    days = days[(days >= a.day.min()) & (days <= a.day.max())]
+    days = np.union1d(days, a.day)
+    out = np.zeros(len(days))
+    np.add.at(out, np.searchsorted(days, a.day), a.pnl)
+    return pd.Series(out, index=pd.to_datetime(days, unit="D"), name="pnl")
+
+def risk_metrics(a: TradeArrays, p: Params | None = None, calendar: SessionCalendar | None = None) -> dict:
+    p = p or Params()
+    n = len(a.pnl)
+    if n == 0:
+        return {"trades": 0}
+    wins, losses = a.pnl[a.pnl > 0], a.pnl[a.pnl < 0]
+    dd, dd_len = max_drawdown(a.pnl)
+    daily = daily_pnl(a, calendar).to_numpy()
+    sd = daily.std(ddof=1) if len(daily) > 1 else 0.0
+    down = np.sqrt(np.mean(np.minimum(daily, 0.0) ** 2))
+    # SL hit as in the sweep: the per-unit loss reached the initial stop
+    sl = a.unit <= -p.sl_per_unit + 1e-6
+    per_day = np.bincount(np.unique(a.day, return_inverse=True)[1], weights=sl).astype(np.int64)
+    per_day = np.r_[per_day, np.zeros(len(daily) - len(per_day), np.int64)]   # session days without trades
+    risk_per_trade = p.sl_per_unit * np.where(a.qty > 0, a.qty, p.lot_qty)
+    return {
+        "trades": n,
+        "net_pnl": float(a.pnl.sum()),
+        "win_rate": float(len(wins) / n),
+        "avg_win": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        "expectancy": float(a.pnl.mean()),
+        "expectancy_r": float((a.pnl / risk_per_trade).mean()),
+        "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) else float("inf"),
+        "max_drawdown": dd,
+        "max_drawdown_trades": dd_len,
+        "max_win_streak": _streaks(a.pnl > 0),
+        "max_loss_streak": _streaks(a.pnl < 0),
+        "days": len(daily),
+        "sharpe": float(daily.mean() / sd * np.sqrt(TRADING_DAYS)) if sd > 0 else 0.0,
+        "sortino": float(daily.mean() / down * np.sqrt(TRADING_DAYS)) if down > 0 else 0.0,
+        "worst_day": float(daily.min()),
+        "best_day": float(daily.max()),
+        "sl_hits": int(sl.sum()),
+        "sl_hits_per_day": {int(k): int(v) for k, v in zip(*np.unique(per_day, return_counts=True))},
+        "days_at_sl_cap": int((per_day >= p.max_daily_sls).sum()),
+    }
+
+@dataclass
+class MonteCarlo:
+    method: str
+    final: np.ndarray         # final PnL per simulation
+    max_drawdown: np.ndarray  # max drawdown per simulation
+
+    def summary(self, quantiles: tuple[float, ...] = (0.05, 0.5, 0.95), dd_limit: float | None = None) -> dict:
+        out = {"method": self.method, "sims": len(self.final), "p_loss": float((self.final < 0).mean())}
+        for name, v in (("final", self.final), ("max_drawdown", self.max_drawdown)):
+            out.update({f"{name}_p{round(q * 100)}": float(x) for q, x in zip(quantiles, np.quantile(v, quantiles))})
+        if dd_limit is not None:
+            out["p_drawdown_over_limit"] = float((self.max_drawdown >= dd_limit).mean())
+        return out
+
+def batch_size(n: int, max_mb: float = MAX_MB) -> int:
+    # rows per batch: int32 draws + float64 equity + running peak
+    return max(1, int(max_mb * 2**20) // max(1, 20 * n))
+
+def monte_carlo(pnl: np.ndarray, sims: int = 100_000, method: str = "bootstrap", horizon: int | None = None,
+                seed: int = 0, max_mb: float = MAX_MB) -> MonteCarlo:
+    # bootstrap: draw `horizon` (default len(pnl)) outcomes with replacement;
+    # shuffle: every simulation is a permutation of the whole sequence (same final PnL, different path)
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"unknown method {method!r}")
+    n = len(pnl) if method == "shuffle" or horizon is None else int(horizon)
+    final, worst = np.zeros(sims), np.zeros(sims)
+    if len(pnl) == 0 or n == 0:
+        return MonteCarlo(method, final, worst)
+    rng = np.random.default_rng(seed)
+    rows = min(sims, batch_size(n, max_mb))
+    eq = np.empty((rows, n))
+    peak = np.empty((rows, n))
+    for lo in range(0, sims, rows):
+        b = min(rows, sims - lo)
+        e, pk = eq[:b], peak[:b]
+        if method == "bootstrap":
+            np.take(pnl, rng.integers(0, len(pnl), (b, n), dtype=np.int32), out=e)
+        else:
+            e[:] = pnl
+            rng.permuted(e, axis=1, out=e)
+        np.cumsum(e, axis=1, out=e)
+        np.maximum.accumulate(e, axis=1, out=pk)
+        np.subtract(pk, e, out=pk)
+        final[lo:lo + b] = e[:, -1]
+        # the peak starts at 0: falls below the starting equity count too
+        worst[lo:lo + b] = np.maximum(pk.max(axis=1), -e.min(axis=1))
+    return MonteCarlo(method, final, worst)
+
+def robustness(a: TradeArrays, sims: int = 100_000, by: str = "trade", seed: int = 0,
+               calendar: SessionCalendar | None = None, max_mb: float = MAX_MB) -> dict:
+    # bootstrap + shuffle over trades, or over session days (keeps each day's trades together)
+    pnl = a.pnl if by == "trade" else daily_pnl(a, calendar).to_numpy()
+    dd, _ = max_drawdown(pnl)
+    return {m: monte_carlo(pnl, sims, m, seed=seed, max_mb=max_mb).summary(dd_limit=2 * dd)
+            for m in ("bootstrap", "shuffle")}
+
+def risk_report(trades: Iterable | pd.DataFrame, p: Params | None = None, sims: int = 100_000, by: str = "trade",
+                seed: int = 0, out_json: str | None = "report_risk.json") -> dict:
+    a = trade_arrays(trades)
+    report = {"metrics": risk_metrics(a, p)}
+    if sims > 0 and len(a.pnl):
+        report["monte_carlo"] = robustness(a, sims, by, seed)
+    if out_json:
+        with open(out_json, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strategy", type=str, default=None)
+    ap.add_argument("--source", choices=["backtest", "paper", "live"], default="backtest")
+    ap.add_argument("--csv", type=str, default=None, help="read trades from a backtest_trades.csv instead of the store")
+    ap.add_argument("--sims", type=int, default=100_000, help="Monte Carlo simulations per method (0: metrics only)")
+    ap.add_argument("--by", choices=["trade", "day"], default="trade", help="resample trades or whole session days")
+    ap.add_argument("--sl", type=float, default=Params.sl_per_unit, help="initial SL per unit (SL hit threshold)")
+    ap.add_argument("--max-sls", type=int, default=Params.max_daily_sls)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    if args.csv:
+        trades = pd.read_csv(args.csv)
+    else:
+        store = TradeStore()
+        trades = store.trades_frame(args.strategy, args.source)
+        store.close()
+    report = risk_report(trades, Params(sl_per_unit=args.sl, max_daily_sls=args.max_sls), args.sims, args.by,
+                         args.seed)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,294 @@
+from __future__ import annotations
+import time
+from typing import Any, AsyncIterator, Callable
+import pandas as pd
+from loguru import logger
+from .. import metrics
+from ..backtester.core import NS_PER_SEC, TradeLog, parse_tod
+from ..config import settings
+from ..feed.candles import Candle, CandleAggregator
+from ..feed.option_chain import OptionChainCache
+from ..session_calendar import SessionCalendar, get_calendar
+from ..strategy.base import StrategySignal
+from ..strategy.nifty_atm_option import NiftyATMOptionStrategy
+from .events import Bar, Heartbeat, Tick
+from .sim import SimExecutor
+from .sources import BarReplaySource, frame_arrays
+from . import state
+
+# One event-driven strategy runtime for backtest replay, paper and live:
+#   market data event -> candle -> signal -> leg selection -> order -> fill
+# Sources yield runtime.events; executors are live.execution.ExecutionEngine
+# (real orders) or runtime.sim.SimExecutor (simulated fills). Session rules
+# follow the backtester: start/end_time inclusive (clipped to the exchange
+# session from session_calendar; holidays have no session), daily state resets
+# at the first event of a new trading day at or after start_time, no entries after
+# max_daily_sls SL exits, and a bar/tick that closes a trade does not open one.
+# Unlike backtester.core (which drops a position still open at the next
+# session start), an open position is flattened at the first event past
+# end_time, as LiveTrader does at the cutoff.
+
+# (direction, spot, ts) -> leg dict with security_id, exchange_segment and
+# optionally symbol / ltp (reference price); None when nothing is tradable
+SelectLeg = Callable[[str, float, float], "dict | None"]
+OnTrade = Callable[[TradeLog], Any]
+
+# stage latency histograms (see metrics.py); one perf_counter pair per event
+_H_EVENT = metrics.histogram("runtime.event", metrics.STAGE_BUCKETS_MS)
+_H_CANDLE = metrics.histogram("runtime.candle_close", metrics.STAGE_BUCKETS_MS)
+_H_SIGNAL = metrics.histogram("runtime.signal", metrics.STAGE_BUCKETS_MS)
+_H_STRIKE = metrics.histogram("runtime.strike", metrics.STAGE_BUCKETS_MS)
+_H_ORDER = metrics.histogram("runtime.event_to_order", metrics.STAGE_BUCKETS_MS)
+
+def feed_candles(candles: CandleAggregator, ev: Tick | Bar):
+    # a bar is replayed as its four prices; closes are flushed up to the event's end
+    if type(ev) is Bar:
+        sid, ts = ev.security_id, ev.ts
+        candles.on_tick(sid, ev.open, ts)
+        candles.on_tick(sid, ev.high, ts)
+        candles.on_tick(sid, ev.low, ts)
+        candles.on_tick(sid, ev.close, ts, ev.volume)
+        candles.flush(ev.end)
+    else:
+        candles.on_tick(ev.security_id, ev.ltp, ev.ts, ev.qty)
+        candles.flush(ev.ts)
+
+def spot_leg(security_id: int, exchange_segment: str, symbol: str = "NIFTY_OPTION_ATM") -> SelectLeg:
+    # the backtester's placeholder: trade the underlying's own price as the premium
+    leg = {"security_id": int(security_id), "exchange_segment": exchange_segment, "symbol": symbol}
+    return lambda direction, spot, ts: leg
+
+def chain_leg(chain: OptionChainCache, itm_steps: int = 0, exchange_segment: str | None = None) -> SelectLeg:
+    # ATM / slightly ITM leg from the background-refreshed chain; no network on this path
+    seg = exchange_segment or settings.OPTION_EXCHANGE_SEGMENT
+
+    def select(direction: str, spot: float, ts: float) -> dict | None:
+        leg = chain.atm(direction, itm_steps=itm_steps, spot=spot)
+        if not leg or leg["security_id"] <= 0 or leg["ltp"] <= 0:
+            return None
+        return {**leg, "exchange_segment": seg, "symbol": f"{leg['expiry']} {leg['strike']:g} {leg['option_type']}"}
+    return select
+
+class StrategyRuntime:
+    def __init__(self, strat: NiftyATMOptionStrategy, executor, select_leg: SelectLeg,
+                 underlying: tuple[str, int] | None = None, tz: str | None = None,
+                 on_trade: OnTrade | None = None, name: str = "nifty_atm_option", mode: str | None = None,
+                 publish_interval: float = 1.0, calendar: SessionCalendar | None = None):
+        self.strat = strat
+        self.name = name
+        self.mode = mode                # set: publish runtime.state snapshots (paper/live status)
+        self.publish_interval = publish_interval
+        self.p = strat.p
+        self.executor = executor
+        self.select_leg = select_leg
+        seg, sid = underlying or (settings.EXCHANGE_SEGMENT, settings.NSE_UNDERLYING_SECURITY_ID)
+        self.underlying = (seg, int(sid))
+        self.tz = tz or settings.TIMEZONE
+        self.on_trade = on_trade
+        self.calendar = calendar or get_calendar(self.tz)
+        self.candles = CandleAggregator([self.p.timeframe_min], self.tz, on_close=self.on_candle)
+        self.start_s = parse_tod(self.p.start_time) // NS_PER_SEC
+        self.end_s = parse_tod(self.p.end_time) // NS_PER_SEC
+        self.lo_s, self.hi_s = self.start_s, self.end_s     # today's window
+        self.prices: dict[int, float] = {}
+        self.day: int | None = None
+        self.position = None            # executor Position while a trade is open
+        self.trades: list[TradeLog] = []
+        self.events = 0
+        self.source = None
+        self._pending: tuple[StrategySignal, float] | None = None
+        self._signal_t = 0.0
+        self._entry_ts = 0.0
+        self._entry_sl_hits = 0
+        self._exit_ts: float | None = None
+        self._now = 0.0
+        self._t_event = 0.0             # perf_counter() at the current event's arrival
+        self._published = 0.0
+        self.day_pnl = 0.0
+        self.day_trades = 0
+        self.day_wins = 0
+
+    # --- session ---
+    def _new_session(self, day: int, window: tuple[int, int]):
+        self.day = day
+        self.lo_s, self.hi_s = window
+        self.strat.reset_day()
+        self._pending = None
+        self.day_pnl = 0.0
+        self.day_trades = 0
+        self.day_wins = 0
+        self.publish()
+
+    # --- events ---
+    async def on_event(self, ev: Tick | Bar | Heartbeat):
+        await self.begin_event(ev)
+        if type(ev) is Heartbeat:
+            self.candles.flush(ev.ts)
+        elif ev.security_id == self.underlying[1]:
+            feed_candles(self.candles, ev)
+        await self.end_event()
+
+    # on_event in two halves around candle aggregation, so runtime.runner can
+    # aggregate an instrument once for every runtime trading it
+    async def begin_event(self, ev: Tick | Bar | Heartbeat):
+        self._t_event = time.perf_counter()
+        self.events += 1
+        ts = self._now = ev.ts
+        day, tod = self.calendar.split(ts)
+        if self.position is not None and self.position.closed:
+            # live SL fills arrive through order updates, between events
+            self._record(self.position, "SL/TSL exit")
+        if self.position is not None and (day != self.day or tod > self.hi_s):
+            await self.flatten("EOD flatten")
+        if day != self.day and tod >= self.start_s:
+            window = self.calendar.window(day, self.start_s, self.end_s)
+            if window is not None and tod >= window[0]:
+                self._new_session(day, window)
+        if type(ev) is not Heartbeat:
+            sid = ev.security_id
+            px = ev.close if type(ev) is Bar else ev.ltp
+            self.prices[sid] = px
+            pos = self.position
+            if (pos is not None and day == self.day and self.lo_s <= tod <= self.hi_s
+                    and sid == int(pos.security_id)):
+                self.executor.on_price(px)
+                if pos.closed:
+                    self._record(pos, "SL/TSL exit")
+
+    async def end_event(self):
+        if self._pending is not None:
+            sig, spot = self._pending
+            self._pending = None
+            await self.enter(sig, spot)
+        if self.mode is not None and time.monotonic() - self._published >= self.publish_interval:
+            self.publish()
+        _H_EVENT.observe(time.perf_counter() - self._t_event)
+
+    def on_candle(self, security_id, timeframe: int, c: Candle):
+        t = time.perf_counter()
+        _H_CANDLE.observe(t - self._t_event)
+        day, tod = self.calendar.split(c.ts)
+        if (self.position is not None or self._exit_ts == self._now or day != self.day
+                or not self.lo_s <= tod <= self.hi_s or self.strat.daily_sl_hits >= self.p.max_daily_sls):
+            return
+        sig = self.strat.momentum_from_bar(c.open, c.close)
+        _H_SIGNAL.observe(time.perf_counter() - t)
+        if sig.enter:
+            self._pending = (sig, c.close)
+            self._signal_t = time.monotonic()
+
+    # --- orders ---
+    async def enter(self, sig: StrategySignal, spot: float):
+        t = time.perf_counter()
+        leg = self.select_leg(sig.direction, spot, self._now)
+        _H_STRIKE.observe(time.perf_counter() - t)
+        sid = int(leg["security_id"]) if leg else -1
+        ref = (leg.get("ltp") or self.prices.get(sid)) if leg else None
+        if not ref or sid <= 0:
+            # formatted only if a sink takes DEBUG
+            logger.opt(lazy=True).debug("[runtime] no tradable {} leg at {}: {}", lambda: sig.direction,
+                                        lambda: self._now, lambda: leg)
+            return
+        pos = await self.executor.enter(sid, leg["exchange_segment"], self.p.lot_qty, ref,
+                                        t_signal=self._signal_t, meta={**leg, "side": sig.direction})
+        if pos is None:
+            return
+        _H_ORDER.observe(time.perf_counter() - self._t_event)
+        self.position = pos
+        self.strat.in_position = True
+        self._entry_ts = self._now
+        self._entry_sl_hits = self.strat.daily_sl_hits
+        if self.source is not None and hasattr(self.source, "watch"):
+            await self.source.watch(leg["exchange_segment"], sid)
+        self.publish()
+
+    async def flatten(self, reason: str = "flatten"):
+        pos = self.position
+        if pos is None:
+            return
+        if not pos.closed:
+            await self.executor.flatten()
+            if pos.sl.status == "TRADED":
+                reason = "SL/TSL exit"      # the stop filled first; flatten sent no exit
+        self._record(pos, reason)
+
+    def _record(self, pos, notes: str):
+        if not pos.qty:
+            # entry rejected or cancelled after the ack: no trade happened
+            logger.warning(f"[runtime] entry {pos.entry.order_id} {pos.entry.status}, nothing filled")
+            self.position = None
+            self.strat.in_position = False
+            return
+        exit_px = pos.exit_price if pos.exit_price is not None else self.prices.get(int(pos.security_id))
+        unit = (exit_px - pos.entry_price) if exit_px is not None else 0.0
+        if notes == "SL/TSL exit" and unit <= -self.p.sl_per_unit + 1e-6:
+            self.strat.daily_sl_hits += 1
+        to_ts = lambda t: pd.Timestamp(int(t) * NS_PER_SEC + round((t - int(t)) * 1e9), tz="UTC").tz_convert(self.tz)
+        trade = TradeLog(
+            ts_entry=to_ts(self._entry_ts), ts_exit=to_ts(self._now), symbol=pos.meta.get("symbol", pos.security_id),
+            security_id=pos.security_id, side="BUY_" + pos.meta.get("side", "CALL"), qty=pos.qty,
+            entry_price=float(pos.entry_price), exit_price=None if exit_px is None else float(exit_px),
+            pnl=float(unit * pos.qty), sl_hits_today=self._entry_sl_hits, notes=notes,
+        )
+        self.trades.append(trade)
+        self.day_pnl += trade.pnl
+        self.day_trades += 1
+        self.day_wins += trade.pnl > 0
+        self.position = None
+        self.strat.in_position = False
+        self._exit_ts = self._now
+        if self.source is not None and hasattr(self.source, "unwatch"):
+            self.source.unwatch(pos.exchange_segment, int(pos.security_id))
+        self.publish(trade)
+        if self.on_trade is not None:
+            self.on_trade(trade)
+
+    # --- status ---
+    def publish(self, trade: TradeLog | None = None):
+        # swap in a fresh runtime.state snapshot; O(1), no I/O
+        if self.mode is None:
+            return
+        self._published = time.monotonic()
+        pos = self.position
+        view = None
+        if pos is not None:
+            view = state.PositionView(
+                symbol=str(pos.meta.get("symbol", pos.security_id)), security_id=str(pos.security_id),
+                side=pos.meta.get("side", "CALL"), qty=pos.qty, entry_price=float(pos.entry_price),
+                ltp=self.prices.get(int(pos.security_id)), sl_trigger=float(pos.sl_trigger), opened_at=self._entry_ts)
+        prev = state.current(self.name)
+        last = prev.last_trade if prev is not None else None
+        if trade is not None:
+            last = {"symbol": trade.symbol, "side": trade.side, "entry_price": trade.entry_price,
+                    "exit_price": trade.exit_price, "pnl": trade.pnl, "notes": trade.notes, "ts_exit": self._now}
+        day = None
+        if self.day is not None:
+            day = (pd.Timestamp("1970-01-01") + pd.Timedelta(days=self.day)).strftime("%Y-%m-%d")
+        state.publish(state.Snapshot(
+            strategy=self.name, mode=self.mode, ts=self._now, published=time.time(), day=day,
+            spot=self.prices.get(self.underlying[1]), realized=self.day_pnl, trades=self.day_trades,
+            wins=self.day_wins, sl_hits=self.strat.daily_sl_hits, max_sl_hits=self.p.max_daily_sls,
+            events=self.events, position=view, last_trade=last,
+        ))
+
+    # --- driver ---
+    async def run(self, source: AsyncIterator) -> list[TradeLog]:
+        self.source = source
+        try:
+            async for ev in source:
+                await self.on_event(ev)
+        finally:
+            if self.position is not None:
+                await self.flatten("stopped")
+            await self.executor.close()
+        return self.trades
+
+async def replay_bars(df: pd.DataFrame, strat: NiftyATMOptionStrategy, interval: int,
+                      legs: dict[int, dict] | None = None, select_leg: SelectLeg | None = None,
+                      executor=None, speed: float = 0.0, on_trade: OnTrade | None = None) -> list[TradeLog]:
+    # Paper trading over historical underlying bars (df: ts-indexed OHLC), optionally
+    # with the legs' own bar series; defaults to the spot-as-premium placeholder.
+    seg, sid = settings.EXCHANGE_SEGMENT, settings.NSE_UNDERLYING_SECURITY_ID
+    rt = StrategyRuntime(strat, executor or SimExecutor(strat), select_leg or spot_leg(sid, seg), (seg, sid),
+                         on_trade=on_trade)
+    return await rt.run(BarReplaySource({sid: frame_arrays(df), **(legs or {})}, interval, sid, speed))
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+# Market data events consumed by runtime.engine.StrategyRuntime. Every source
+# (historical bars, recorded feed frames, quote polling, the live websocket)
+# reduces to these three; ts is epoch seconds (UTC).
+
+@dataclass(slots=True)
+class Tick:
+    ts: float
+    security_id: int
+    ltp: float
+    qty: float = 0.0        # traded quantity since the previous tick of this instrument
+
+@dataclass(slots=True)
+class Bar:
+    ts: float               # bucket start
+    security_id: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    interval: int           # minutes
+
+    @property
+    def end(self) -> float:
+        return self.ts + self.interval * 60
+
+@dataclass(slots=True)
+class Heartbeat:
+    # no data, time only: lets candles close and the session cutoff fire in quiet markets
+    ts: float
@@ -0,0 +1,249 @@
+from __future__ import annotations
+import argparse, asyncio, json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+from loguru import logger
+from .. import metrics
+from ..config import settings
+from ..dhan_client import DhanClient
+from ..feed.candles import Candle, CandleAggregator
+from ..feed.live_feed import LiveFeed
+from ..feed.option_chain import OptionChainCache
+from ..feed.quotes import QuoteBatcher
+from ..live.execution import OPTION_TICK, ExecutionEngine
+from ..notify.alerts import AlertQueue, trade_alert
+from ..storage.tick_journal import TickJournal
+from ..storage.trade_store import TradeStore
+from ..strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
+from . import state
+from .engine import StrategyRuntime, chain_leg, feed_candles
+from .events import Bar, Heartbeat, Tick
+from .sim import SimExecutor
+from .sources import LiveFeedSource, QuotePollSource
+
+# Many strategy instances (underlyings, Params, tick sizes) in one event loop.
+# Everything market-facing is shared: one source (one quote poll / one feed
+# subscription set for the union of instruments), one candle aggregator per
+# instrument with the union of the timeframes trading it, one option chain
+# cache per underlying and one rate-limited DhanClient. Each instance keeps
+# its own StrategyRuntime (session, position, daily SL counter, PnL) and
+# executor, and publishes its own runtime.state snapshot under its name.
+# Adding an instance on an underlying that is already traded adds no API calls.
+
+@dataclass
+class StrategySpec:
+    name: str
+    security_id: int = 13                   # underlying (e.g. 13 NIFTY, 25 BANKNIFTY, 27 FINNIFTY)
+    exchange_segment: str = "IDX_I"
+    option_segment: str = "NSE_FNO"
+    params: Params = field(default_factory=Params)
+    tick: float = OPTION_TICK               # price tick of the traded contracts
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StrategySpec":
+        d = dict(d)
+        p = dict(d.pop("params", {}) or {})
+        if "tsl_steps" in p:
+            p["tsl_steps"] = [tuple(x) for x in p["tsl_steps"]]
+        return cls(params=Params(**p), **d)
+
+def load_specs(path: str | Path) -> list[StrategySpec]:
+    # JSON list: [{"name": "nifty_5m", "security_id": 13, "params": {"lot_qty": 75}}, ...]
+    return [StrategySpec.from_dict(d) for d in json.loads(Path(path).read_text())]
+
+class _Legs:
+    # stands in for the source inside one runtime: leg watches go through the runner
+    __slots__ = ("runner", "rt")
+
+    def __init__(self, runner: "StrategyRunner", rt: StrategyRuntime):
+        self.runner = runner
+        self.rt = rt
+
+    async def watch(self, exchange_segment: str, security_id: int):
+        await self.runner.watch(self.rt, exchange_segment, security_id)
+
+    def unwatch(self, exchange_segment: str, security_id: int):
+        self.runner.unwatch(self.rt, exchange_segment, security_id)
+
+class StrategyRunner:
+    def __init__(self, runtimes: Iterable[StrategyRuntime], tz: str | None = None):
+        self.runtimes = list(runtimes)
+        names = [rt.name for rt in self.runtimes]
+        if len(set(names)) != len(names):
+            raise ValueError(f"strategy names must be unique: {names}")
+        self.tz = tz or settings.TIMEZONE
+        # security id -> runtimes that receive its events (underlying, then held legs)
+        self.routes: dict[int, tuple[StrategyRuntime, ...]] = {}
+        self._listeners: dict[tuple[int, int], list[StrategyRuntime]] = {}
+        self.aggregators: dict[int, CandleAggregator] = {}
+        timeframes: dict[int, set[int]] = {}
+        for rt in self.runtimes:
+            sid = rt.underlying[1]
+            self.routes[sid] = self.routes.get(sid, ()) + (rt,)
+            self._listeners.setdefault((sid, rt.p.timeframe_min), []).append(rt)
+            timeframes.setdefault(sid, set()).add(rt.p.timeframe_min)
+        for sid, tfs in timeframes.items():
+            self.aggregators[sid] = CandleAggregator(sorted(tfs), self.tz, on_close=self._dispatch)
+        self._legs: dict[tuple[str, int], int] = {}
+        self.source = None
+
+    def instruments(self) -> list[tuple[str, int]]:
+        return sorted({rt.underlying for rt in self.runtimes})
+
+    def _dispatch(self, security_id, timeframe: int, c: Candle):
+        for rt in self._listeners.get((security_id, timeframe), ()):
+            rt.on_candle(security_id, timeframe, c)
+
+    # --- held legs (refcounted across runtimes) ---
+    async def watch(self, rt: StrategyRuntime, exchange_segment: str, security_id: int):
+        sid = int(security_id)
+        if rt not in self.routes.get(sid, ()):
+            self.routes[sid] = self.routes.get(sid, ()) + (rt,)
+        key = (exchange_segment, sid)
+        self._legs[key] = self._legs.get(key, 0) + 1
+        if self._legs[key] == 1 and self.source is not None and hasattr(self.source, "watch"):
+            await self.source.watch(exchange_segment, sid)
+
+    def unwatch(self, rt: StrategyRuntime, exchange_segment: str, security_id: int):
+        sid = int(security_id)
+        if sid != rt.underlying[1]:
+            self.routes[sid] = tuple(r for r in self.routes.get(sid, ()) if r is not rt)
+            if not self.routes[sid]:
+                del self.routes[sid]
+        key = (exchange_segment, sid)
+        n = self._legs.get(key, 0) - 1
+        if n > 0:
+            self._legs[key] = n
+            return
+        self._legs.pop(key, None)
+        if self.source is not None and hasattr(self.source, "unwatch"):
+            self.source.unwatch(exchange_segment, sid)
+
+    # --- events ---
+    async def on_event(self, ev: Tick | Bar | Heartbeat):
+        if type(ev) is Heartbeat:
+            targets = self.runtimes
+        else:
+            targets = self.routes.get(ev.security_id)
+            if not targets:
+                return
+        for rt in targets:
+            await rt.begin_event(ev)
+        if type(ev) is Heartbeat:
+            for agg in self.aggregators.values():
+                agg.flush(ev.ts)
+        else:
+            agg = self.aggregators.get(ev.security_id)
+            if agg is not None:
+                feed_candles(agg, ev)
+        for rt in targets:
+            await rt.end_event()
+
+    async def run(self, source: AsyncIterator) -> dict[str, list]:
+        self.source = source
+        for rt in self.runtimes:
+            rt.source = _Legs(self, rt)
+        try:
+            async for ev in source:
+                await self.on_event(ev)
+        finally:
+            for rt in self.runtimes:
+                try:
+                    if rt.position is not None:
+                        await rt.flatten("stopped")
+                    await rt.executor.close()
+                except Exception as e:
+                    logger.error(f"[runner] {rt.name}: shutdown failed: {e!r}")
+        return {rt.name: rt.trades for rt in self.runtimes}
+
+    def risk(self) -> dict[str, dict]:
+        # per-strategy counters (state probe)
+        return {rt.name: {"sl_hits": rt.strat.daily_sl_hits, "max_sl_hits": rt.p.max_daily_sls,
+                          "realized": round(rt.day_pnl, 2), "trades": rt.day_trades,
+                          "in_position": rt.position is not None} for rt in self.runtimes}
+
+def build_runtimes(specs: list[StrategySpec], mode: str, client: DhanClient | None = None,
+                   chains: dict[tuple[int, str], OptionChainCache] | None = None, on_trade=None,
+                   select_leg=None) -> list[StrategyRuntime]:
+    # one option chain cache per underlying, shared by every spec trading it;
+    # live -> ExecutionEngine on the shared client, otherwise simulated fills
+    chains = {} if chains is None else chains
+    out = []
+    for spec in specs:
+        strat = NiftyATMOptionStrategy(spec.params)
+        if select_leg is not None:
+            select = select_leg(spec)
+        else:
+            key = (spec.security_id, spec.exchange_segment)
+            if key not in chains:
+                chains[key] = OptionChainCache(client, spec.security_id, spec.exchange_segment,
+                                               refresh_sec=settings.OPTION_CHAIN_REFRESH_SEC, tz=settings.TIMEZONE)
+            select = chain_leg(chains[key], 1 if spec.params.slightly_itm else 0, spec.option_segment)
+        executor = (ExecutionEngine(client, strat, tick=spec.tick) if mode == "live"
+                    else SimExecutor(strat, tick=spec.tick))
+        cb = (lambda t, name=spec.name: on_trade(name, t)) if on_trade is not None else None
+        out.append(StrategyRuntime(strat, executor, select, (spec.exchange_segment, spec.security_id),
+                                   on_trade=cb, name=spec.name, mode=mode))
+    return out
+
+async def run_strategies(specs: list[StrategySpec], mode: str = "paper"):
+    # paper_trade / LiveTrader.loop for many strategies on one client, journal, store and alert queue
+    client = DhanClient()
+    journal = TickJournal()
+    quotes = QuoteBatcher(client, journal=journal)
+    store = TradeStore()
+    alerts = AlertQueue()
+    chains: dict[tuple[int, str], OptionChainCache] = {}
+
+    def on_trade(name: str, t):
+        logger.info(f"[{mode}/{name}] {t.side} {t.symbol} {t.entry_price:.2f} -> {t.exit_price} ({t.notes})")
+        store.add([t], strategy=name, source=mode)
+        alerts.send(trade_alert(t, f"{mode}/{name}"))
+
+    runner = StrategyRunner(build_runtimes(specs, mode, client, chains, on_trade))
+    feed_task = None
+    if settings.LIVE_WS_URL:
+        feed = LiveFeed(settings.LIVE_WS_URL, journal=journal)
+        metrics.gauge("feed.queue_depth", feed.queue_depth)
+        metrics.gauge("feed", lambda: feed.stats)
+        feed_task = asyncio.create_task(feed.run())
+        source = LiveFeedSource(feed, runner.instruments())
+    else:
+        source = QuotePollSource(quotes, runner.instruments(), tz=settings.TIMEZONE)
+        metrics.gauge("quotes.poll_errors", lambda: source.errors)
+    logger.info(f"[runner] {len(specs)} strategies on {len(runner.instruments())} underlying(s), "
+                f"{len(chains)} option chain(s)")
+    try:
+        journal.start()
+        alerts.start()
+        state.register("alerts", alerts.stats)
+        state.register("risk", runner.risk)
+        metrics.gauge("alerts.queued", lambda: len(alerts.pending))
+        metrics.gauge("quotes.pending", quotes.depth)
+        metrics.gauge("journal.records", lambda: journal.records)
+        for chain in chains.values():
+            await chain.start()
+        return await runner.run(source)
+    finally:
+        if feed_task is not None:
+            feed_task.cancel()
+        for chain in chains.values():
+            await chain.stop()
+        await client.close()
+        await journal.stop()
+        store.close()
+        state.unregister("alerts")
+        state.unregister("risk")
+        for name in ("feed.queue_depth", "feed", "alerts.queued", "quotes.pending", "journal.records"):
+            metrics.unregister(name)
+        await alerts.stop()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strategies", type=str, default=settings.STRATEGIES_FILE, help="JSON list of strategy specs")
+    ap.add_argument("--mode", choices=["paper", "live"], default="paper" if settings.RUN_MODE != "live" else "live")
+    args = ap.parse_args()
+    if not args.strategies:
+        ap.error("--strategies (or STRATEGIES_FILE) is required")
+    asyncio.run(run_strategies(load_specs(args.strategies), args.mode))
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import time
+from ..live.execution import OPTION_TICK, OrderState, Position, round_tick
+from ..strategy.nifty_atm_option import NiftyATMOptionStrategy
+
+# Simulated fills behind the same interface as live.execution.ExecutionEngine
+# (enter / on_price / flatten / close, .position, .sl_hits), so paper trading and
+# replays run the runtime code path that trades live. The entry fills at the
+# reference price; the protective SL-M trails per step_tsl and fills at the first
+# price at or below its trigger (a gap through the trigger fills at the gap price,
+# as in the backtester). tick=None skips exchange tick rounding of the trigger.
+
+class SimExecutor:
+    def __init__(self, strat: NiftyATMOptionStrategy, tick: float | None = OPTION_TICK, slippage: float = 0.0):
+        self.strat = strat
+        self.tick = tick
+        self.slippage = slippage     # per unit, against us on every fill
+        self.position: Position | None = None
+        self.last_price: float | None = None
+        self.sl_hits = 0
+        self._seq = 0
+
+    def _order(self, role: str, qty: int, price: float | None, status: str) -> OrderState:
+        self._seq += 1
+        now = time.monotonic()
+        return OrderState(order_id=f"SIM-{self._seq}", role=role, status=status, filled_qty=qty if price else 0,
+                          avg_price=price, t_signal=now, t_send=now, t_ack=now, last_update=now)
+
+    def _trigger(self, px: float) -> float:
+        return round_tick(px, self.tick) if self.tick else px
+
+    async def enter(self, security_id: int | str, exchange_segment: str, qty: int, ref_price: float,
+                    t_signal: float | None = None, meta: dict | None = None) -> Position | None:
+        if self.position is not None and not self.position.closed:
+            return None
+        fill = ref_price + self.slippage
+        trigger = self._trigger(fill - self.strat.p.sl_per_unit)
+        self.position = Position(str(security_id), exchange_segment, qty, ref_price,
+                                 self._order("ENTRY", qty, fill, "TRADED"),
+                                 self._order("SL", qty, None, "PENDING"),
+                                 trigger, high_water=fill, meta=meta or {})
+        self.last_price = ref_price
+        return self.position
+
+    def on_price(self, ltp: float):
+        pos = self.position
+        if pos is None or pos.closed:
+            return
+        self.last_price = ltp
+        if ltp > pos.high_water:
+            pos.high_water = ltp
+            new = self._trigger(self.strat.step_tsl(pos.entry_price, pos.high_water))
+            if new > pos.sl_trigger:
+                pos.sl_trigger = new
+        if ltp <= pos.sl_trigger:
+            self._fill_exit(pos.sl, ltp)
+            if pos.exit_price - pos.entry_price <= -self.strat.p.sl_per_unit + 1e-6:
+                self.sl_hits += 1
+
+    def _fill_exit(self, st: OrderState, px: float):
+        pos = self.position
+        st.status, st.filled_qty, st.avg_price = "TRADED", pos.qty, px - self.slippage
+        pos.closed = True
+        pos.exit_price = st.avg_price
+
+    async def flatten(self):
+        pos = self.position
+        if pos is None or pos.closed:
+            return
+        pos.sl.status = "CANCELLED"
+        self._fill_exit(self._order("EXIT", pos.qty, None, "SENT"), self.last_price)
+
+    async def close(self):
+        pass
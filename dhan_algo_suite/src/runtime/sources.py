@@ -0,0 +1,216 @@
+from __future__ import annotations
+import asyncio, time
+from datetime import date
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..feed.candles import quote_ticks
+from ..feed.live_feed import FULL, QUOTE, TICKER, LiveFeed, decode
+from ..feed.quotes import QuoteBatcher
+from ..storage.tick_journal import TickJournal
+from ..session_calendar import get_calendar
+from .events import Bar, Heartbeat, Tick
+
+# Market data sources for StrategyRuntime: async iterables of runtime.events.
+# Replays take speed=0 (as fast as the CPU allows, no sleeping) or a factor of
+# real time (speed=60: one recorded minute per second). Live sources expose
+# watch/unwatch so the runtime can stream the leg it holds.
+
+async def _pace(speed: float, prev: float | None, ts: float):
+    if speed > 0 and prev is not None and ts > prev:
+        await asyncio.sleep((ts - prev) / speed)
+
+def frame_arrays(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    # ts-indexed OHLC(V) frame -> BarStore-style column arrays (ts in epoch seconds)
+    n = len(df)
+    return {
+        "ts": np.asarray(df.index.asi8 // 1_000_000_000, dtype=np.int64),
+        **{c: df[c].to_numpy(np.float64) if c in df else np.zeros(n) for c in ("open", "high", "low", "close", "volume")},
+    }
+
+class BarReplaySource:
+    # Bars of several instruments merged into one time-ordered stream. Within a
+    # timestamp the underlying comes last, so legs' prices are current when its
+    # candle closes. Series may carry only ts/close (open/high/low default to close).
+    def __init__(self, series: dict[int, dict[str, np.ndarray]], interval: int, underlying: int, speed: float = 0.0):
+        self.interval = interval
+        self.speed = speed
+        sids, cols = [], {c: [] for c in ("ts", "open", "high", "low", "close", "volume")}
+        for sid, s in series.items():
+            n = len(s["ts"])
+            sids.append(np.full(n, int(sid), dtype=np.int64))
+            for c in cols:
+                v = s.get(c)
+                cols[c].append(np.asarray(v if v is not None else (s["close"] if c != "volume" else np.zeros(n))))
+        sid = np.concatenate(sids) if sids else np.empty(0, np.int64)
+        arrs = {c: np.concatenate(v) if v else np.empty(0) for c, v in cols.items()}
+        order = np.lexsort((sid == int(underlying), arrs["ts"]))
+        self.sid = sid[order]
+        self.cols = {c: a[order] for c, a in arrs.items()}
+
+    def __len__(self) -> int:
+        return len(self.sid)
+
+    async def __aiter__(self):
+        c = self.cols
+        rows = zip(c["ts"].tolist(), self.sid.tolist(), c["open"].tolist(), c["high"].tolist(),
+                   c["low"].tolist(), c["close"].tolist(), c["volume"].tolist())
+        prev = None
+        for ts, sid, o, h, l, cl, v in rows:
+            await _pace(self.speed, prev, ts)
+            prev = ts
+            yield Bar(ts, sid, o, h, l, cl, v, self.interval)
+
+class FrameReplaySource:
+    # Recorded LiveFeed frames (feed.live_feed.FrameRecorder) as ticks, timed by
+    # the packets' last trade time; quote volume is cumulative, ticks carry the delta.
+    def __init__(self, frames: Iterable[bytes], speed: float = 0.0):
+        self.frames = frames
+        self.speed = speed
+
+    async def __aiter__(self):
+        last_vol: dict[int, int] = {}
+        prev = None
+        for frame in self.frames:
+            for pkt in decode(frame):
+                code = pkt.code
+                if code == TICKER:
+                    qty = 0.0
+                elif code == QUOTE or code == FULL:
+                    qty = float(max(pkt.volume - last_vol.get(pkt.security_id, pkt.volume), 0))
+                    last_vol[pkt.security_id] = pkt.volume
+                else:
+                    continue
+                await _pace(self.speed, prev, pkt.ltt)
+                prev = pkt.ltt
+                yield Tick(float(pkt.ltt), pkt.security_id, float(pkt.ltp), qty)
+
+class JournalReplaySource:
+    # One TickJournal day merged across instruments by receive time; the per-tick
+    # quantity is the instrument's cumulative volume delta.
+    def __init__(self, journal: TickJournal, day: date, instruments: Iterable[tuple[str, int]] | None = None,
+                 speed: float = 0.0):
+        self.journal = journal
+        self.day = day
+        self.instruments = list(instruments) if instruments is not None else None
+        self.speed = speed
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        keys = self.instruments if self.instruments is not None else self.journal.instruments(self.day)
+        parts = [(sid, self.journal.read(self.day, seg, sid)) for seg, sid in keys]
+        parts = [(sid, a) for sid, a in parts if len(a)]
+        if not parts:
+            return {"ts": np.empty(0, np.int64), "sid": np.empty(0, np.int64), "ltp": np.empty(0), "qty": np.empty(0)}
+        qty = [np.maximum(np.diff(a["volume"], prepend=a["volume"][:1]), 0) for _, a in parts]
+        ts = np.concatenate([a["ts"] for _, a in parts])
+        order = np.argsort(ts, kind="stable")
+        return {
+            "ts": ts[order],
+            "sid": np.concatenate([np.full(len(a), sid, np.int64) for sid, a in parts])[order],
+            "ltp": np.concatenate([a["ltp"] for _, a in parts])[order],
+            "qty": np.concatenate(qty)[order],
+        }
+
+    async def __aiter__(self):
+        a = self.arrays()
+        prev = None
+        for ts, sid, ltp, qty in zip((a["ts"] / 1e9).tolist(), a["sid"].tolist(), a["ltp"].tolist(),
+                                     a["qty"].tolist()):
+            await _pace(self.speed, prev, ts)
+            prev = ts
+            yield Tick(ts, sid, ltp, qty)
+
+class QuotePollSource:
+    # Polls market quotes (batched per segment by QuoteBatcher) for the
+    # underlying plus any watched legs; idles outside exchange sessions.
+    def __init__(self, quotes: QuoteBatcher, instruments: Iterable[tuple[str, int]], interval: float = 3.0,
+                 tz: str = "Asia/Kolkata"):
+        self.quotes = quotes
+        self.instruments = {(seg, int(sid)) for seg, sid in instruments}
+        self.interval = interval
+        self.tz = tz
+        self.calendar = get_calendar(tz)
+        self._last_vol: dict[int, float] = {}
+        self._stop = False
+        self.errors = 0                 # polls lost to quote failures (after transport retries)
+
+    async def watch(self, exchange_segment: str, security_id: int):
+        self.instruments.add((exchange_segment, int(security_id)))
+
+    def unwatch(self, exchange_segment: str, security_id: int):
+        self.instruments.discard((exchange_segment, int(security_id)))
+
+    def stop(self):
+        self._stop = True
+
+    async def __aiter__(self):
+        while not self._stop:
+            if not self.calendar.is_open(time.time()):
+                yield Heartbeat(time.time())
+                await asyncio.sleep(5)
+                continue
+            try:
+                resps = await asyncio.gather(*(self.quotes.quote(sid, seg) for seg, sid in self.instruments))
+            except Exception as e:
+                # one failed poll must not end the runtime: skip this interval
+                self.errors += 1
+                logger.warning(f"[quotes] poll failed ({self.errors} so far): {e!r}")
+                yield Heartbeat(time.time())
+                await asyncio.sleep(self.interval)
+                continue
+            ts = time.time()
+            for q in resps:
+                for _, sid, ltp, vol in quote_ticks(q):
+                    qty = max(vol - self._last_vol.get(sid, vol), 0.0)
+                    self._last_vol[sid] = vol
+                    yield Tick(ts, sid, ltp, qty)
+            yield Heartbeat(ts)
+            await asyncio.sleep(self.interval)
+
+class LiveFeedSource:
+    # Ticks from a running LiveFeed; held legs are their own subscription group.
+    # Heartbeats fill gaps longer than `idle` seconds.
+    def __init__(self, feed: LiveFeed, instruments: Iterable[tuple[str, int]] = (), idle: float = 1.0):
+        self.feed = feed
+        self.base = list(instruments)
+        self.idle = idle
+        self.legs: set[tuple[str, int]] = set()
+        self._last_vol: dict[int, int] = {}
+        self._tasks: set[asyncio.Task] = set()     # pending unsubscribes, referenced until done
+
+    async def watch(self, exchange_segment: str, security_id: int):
+        self.legs.add((exchange_segment, int(security_id)))
+        await self.feed.set_group("position", sorted(self.legs))
+
+    def unwatch(self, exchange_segment: str, security_id: int):
+        self.legs.discard((exchange_segment, int(security_id)))
+        update = self.feed.set_group("position", sorted(self.legs)) if self.legs else self.feed.drop_group("position")
+        task = asyncio.get_running_loop().create_task(update)
+        self._tasks.add(task)
+        task.add_done_callback(self._updated)
+
+    def _updated(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[feed] position group update failed: {task.exception()!r}")
+
+    async def __aiter__(self):
+        if self.base:
+            await self.feed.set_group("underlying", self.base)
+        q = self.feed.queue
+        while True:
+            try:
+                pkt = await asyncio.wait_for(q.get(), self.idle)
+            except asyncio.TimeoutError:
+                yield Heartbeat(time.time())
+                continue
+            code = pkt.code
+            if code == QUOTE or code == FULL:
+                qty = float(max(pkt.volume - self._last_vol.get(pkt.security_id, pkt.volume), 0))
+                self._last_vol[pkt.security_id] = pkt.volume
+            elif code != TICKER:
+                continue
+            else:
+                qty = 0.0
+            yield Tick(time.time(), pkt.security_id, float(pkt.ltp), qty)
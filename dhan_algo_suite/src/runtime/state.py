@@ -0,0 +1,80 @@
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+# Process-wide trading state for status readers (Telegram commands, HTTP).
+# StrategyRuntime builds an immutable Snapshot and swaps it in with publish();
+# readers take the current reference and never touch files, the database or
+# the broker, so a status request costs a dict lookup.
+
+@dataclass(frozen=True, slots=True)
+class PositionView:
+    symbol: str
+    security_id: str
+    side: str
+    qty: int
+    entry_price: float
+    ltp: float | None
+    sl_trigger: float
+    opened_at: float                 # epoch s
+
+    @property
+    def unrealized(self) -> float:
+        return 0.0 if self.ltp is None else (self.ltp - self.entry_price) * self.qty
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    strategy: str
+    mode: str                        # live | paper | replay
+    ts: float                        # last market event, epoch s
+    published: float                 # wall clock at publish
+    day: str | None                  # local session day, YYYY-MM-DD
+    spot: float | None
+    realized: float                  # closed trades of the current day
+    trades: int
+    wins: int
+    sl_hits: int
+    max_sl_hits: int
+    events: int
+    position: PositionView | None = None
+    last_trade: dict | None = None
+
+    @property
+    def unrealized(self) -> float:
+        return self.position.unrealized if self.position is not None else 0.0
+
+    @property
+    def halted(self) -> bool:
+        return self.sl_hits >= self.max_sl_hits
+
+_SNAPSHOTS: dict[str, Snapshot] = {}
+_PROBES: dict[str, Callable[[], dict]] = {}     # e.g. alert queue stats, read on demand
+_STARTED = time.time()
+
+def publish(snap: Snapshot):
+    _SNAPSHOTS[snap.strategy] = snap
+
+def current(strategy: str | None = None) -> Snapshot | None:
+    if strategy is not None:
+        return _SNAPSHOTS.get(strategy)
+    return next(iter(_SNAPSHOTS.values()), None)
+
+def snapshots() -> dict[str, Snapshot]:
+    return dict(_SNAPSHOTS)
+
+def register(name: str, probe: Callable[[], dict]):
+    _PROBES[name] = probe
+
+def unregister(name: str):
+    _PROBES.pop(name, None)
+
+def probes() -> dict[str, dict]:
+    return {k: f() for k, f in _PROBES.items()}
+
+def uptime() -> float:
+    return time.time() - _STARTED
+
+def clear():
+    _SNAPSHOTS.clear()
+    _PROBES.clear()
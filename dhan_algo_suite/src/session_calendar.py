@@ -0,0 +1,261 @@
+from __future__ import annotations
+import csv
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from loguru import logger
+from .config import settings
+
+# NSE session calendar shared by backtest, replay, paper and live. Trading days,
+# holidays, special sessions and expiry days are precomputed per year into flat
+# arrays indexed by local day id (days since 1970-01-01 in the exchange zone),
+# with session bounds as epoch seconds. Scalar checks are an integer divide and
+# an array lookup; backtests get the same answers as vectorized masks over a
+# whole bar index. IST has no DST, so a single UTC offset maps epoch <-> local.
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+REGULAR_SESSION = ("09:15", "15:30")
+
+# Exchange holidays for the equity / F&O segments. HOLIDAYS_CSV adds to or
+# overrides these (date,open,close,note; a row without open/close is a holiday).
+NSE_HOLIDAYS: dict[date, str] = {
+    date(2024, 1, 22): "Special holiday", date(2024, 1, 26): "Republic Day",
+    date(2024, 3, 8): "Mahashivratri", date(2024, 3, 25): "Holi", date(2024, 3, 29): "Good Friday",
+    date(2024, 4, 11): "Id-Ul-Fitr", date(2024, 4, 17): "Ram Navami", date(2024, 5, 1): "Maharashtra Day",
+    date(2024, 5, 20): "General elections", date(2024, 6, 17): "Bakri Id", date(2024, 7, 17): "Moharram",
+    date(2024, 8, 15): "Independence Day", date(2024, 10, 2): "Gandhi Jayanti", date(2024, 11, 1): "Diwali",
+    date(2024, 11, 15): "Gurunanak Jayanti", date(2024, 11, 20): "Assembly elections",
+    date(2024, 12, 25): "Christmas",
+    date(2025, 2, 26): "Mahashivratri", date(2025, 3, 14): "Holi", date(2025, 3, 31): "Id-Ul-Fitr",
+    date(2025, 4, 10): "Mahavir Jayanti", date(2025, 4, 14): "Ambedkar Jayanti", date(2025, 4, 18): "Good Friday",
+    date(2025, 5, 1): "Maharashtra Day", date(2025, 8, 15): "Independence Day",
+    date(2025, 8, 27): "Ganesh Chaturthi", date(2025, 10, 2): "Gandhi Jayanti", date(2025, 10, 21): "Diwali",
+    date(2025, 10, 22): "Balipratipada", date(2025, 11, 5): "Prakash Gurpurb", date(2025, 12, 25): "Christmas",
+}
+# Sessions off the regular hours: (open, close) local time; Diwali muhurat
+# trading, Saturday sessions.
+SPECIAL_SESSIONS: dict[date, tuple[str, str]] = {
+    date(2024, 1, 20): ("09:15", "15:30"),
+    date(2024, 11, 1): ("18:00", "19:00"),
+    date(2025, 10, 21): ("13:45", "14:45"),
+}
+# NIFTY weekly expiry weekday (Mon=0) from the given date; on a holiday the
+# contract expires on the previous trading day.
+EXPIRY_WEEKDAYS: list[tuple[date, int]] = [(date(1970, 1, 1), 3), (date(2025, 9, 1), 1)]
+
+def tod_seconds(hhmm: str) -> int:
+    parts = [int(x) for x in hhmm.split(":")]
+    return parts[0] * 3600 + parts[1] * 60 + (parts[2] if len(parts) > 2 else 0)
+
+def utc_offset(tz: str) -> int:
+    # fixed offset of the exchange zone in seconds
+    return int(datetime.now(ZoneInfo(tz)).utcoffset().total_seconds())
+
+def day_id(d: date) -> int:
+    return d.toordinal() - EPOCH_ORDINAL
+
+def to_date(day: int) -> date:
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+def load_overrides(path: str | Path) -> tuple[dict[date, str], dict[date, tuple[str, str]]]:
+    holidays, special = {}, {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            d = date.fromisoformat(row["date"].strip())
+            if (row.get("open") or "").strip():
+                special[d] = (row["open"].strip(), row["close"].strip())
+            else:
+                holidays[d] = (row.get("note") or "").strip() or "holiday"
+    return holidays, special
+
+class SessionCalendar:
+    def __init__(self, tz: str = "Asia/Kolkata", holidays: dict[date, str] | None = None,
+                 special: dict[date, tuple[str, str]] | None = None,
+                 regular: tuple[str, str] = REGULAR_SESSION, years: tuple[int, int] | None = None):
+        self.tz = tz
+        self.zone = ZoneInfo(tz)
+        self.offset = utc_offset(tz)
+        self.holidays = dict(NSE_HOLIDAYS if holidays is None else holidays)
+        self.special = dict(SPECIAL_SESSIONS if special is None else special)
+        self.regular = (tod_seconds(regular[0]), tod_seconds(regular[1]))
+        # years the holiday table covers; other days are treated as regular sessions, with a warning
+        known = [d.year for d in (*self.holidays, *self.special)]
+        self.covered = (min(known), max(known)) if known else None
+        self._cover = ((day_id(date(self.covered[0], 1, 1)), day_id(date(self.covered[1], 12, 31)))
+                       if self.covered else (-(1 << 62), 1 << 62))
+        self._warned: set[int] = set()
+        y = datetime.now(timezone.utc).year
+        self._build(*(years or (2015, y + 2)))
+
+    # --- tables ---
+    def _build(self, y0: int, y1: int):
+        first, last = day_id(date(y0, 1, 1)), day_id(date(y1, 12, 31))
+        days = np.arange(first, last + 1, dtype=np.int64)
+        trading = (days + 3) % 7 < 5                    # 1970-01-01 was a Thursday
+        open_tod = np.full(len(days), self.regular[0], np.int64)
+        close_tod = np.full(len(days), self.regular[1], np.int64)
+        for d in self.holidays:
+            if first <= day_id(d) <= last:
+                trading[day_id(d) - first] = False
+        for d, (o, c) in self.special.items():
+            if first <= day_id(d) <= last:
+                i = day_id(d) - first
+                trading[i] = True
+                open_tod[i], close_tod[i] = tod_seconds(o), tod_seconds(c)
+        base = days * 86_400 - self.offset
+        self.years = (y0, y1)
+        self.first = first
+        self.trading = trading
+        self.open_s = np.where(trading, base + open_tod, -1)
+        self.close_s = np.where(trading, base + close_tod, -1)
+        self.open_tod = np.where(trading, open_tod, -1)
+        self.close_tod = np.where(trading, close_tod, -1)
+        self.expiry = self._expiries(days, trading)
+        self.expiry_days = days[self.expiry]
+        self.trading_days = days[trading]
+
+    def _expiries(self, days: np.ndarray, trading: np.ndarray) -> np.ndarray:
+        out = np.zeros(len(days), dtype=bool)
+        wd = (days + 3) % 7
+        bounds = [(day_id(d), w) for d, w in EXPIRY_WEEKDAYS] + [(days[-1] + 1, -1)]
+        for (lo, w), (hi, _) in zip(bounds, bounds[1:]):
+            for i in np.flatnonzero((wd == w) & (days >= lo) & (days < hi)):
+                while i >= 0 and not trading[i]:
+                    i -= 1
+                if i >= 0:
+                    out[i] = True
+        return out
+
+    def _i(self, day: int) -> int:
+        i = day - self.first
+        if i < 0 or i >= len(self.trading):
+            y = to_date(day).year
+            self._build(min(y, self.years[0]), max(y, self.years[1]))
+            i = day - self.first
+        if not self._cover[0] <= day <= self._cover[1]:
+            self._uncovered(day)
+        return i
+
+    def _uncovered(self, day: int):
+        y = to_date(day).year
+        if y not in self._warned:
+            self._warned.add(y)
+            logger.warning(f"calendar: no exchange holidays known for {y} (covered {self.covered[0]}-"
+                           f"{self.covered[1]}); weekdays count as trading days -- add them via HOLIDAYS_CSV")
+
+    # --- scalar (live / runtime) ---
+    def day_of(self, ts: float) -> int:
+        return (int(ts) + self.offset) // 86_400
+
+    def split(self, ts: float) -> tuple[int, int]:
+        # (local day id, seconds since local midnight)
+        return divmod(int(ts) + self.offset, 86_400)
+
+    def is_trading_day(self, day: int) -> bool:
+        return bool(self.trading[self._i(day)])
+
+    def is_expiry(self, day: int) -> bool:
+        return bool(self.expiry[self._i(day)])
+
+    def next_expiry(self, day: int) -> int:
+        # day id of the first weekly expiry on or after `day`
+        self._i(day)
+        k = int(np.searchsorted(self.expiry_days, day))
+        if k == len(self.expiry_days):
+            self._build(self.years[0], self.years[1] + 1)
+            return self.next_expiry(day)
+        return int(self.expiry_days[k])
+
+    def session(self, day: int) -> tuple[int, int] | None:
+        # exchange (open, close) of a local day as epoch seconds, None if closed
+        i = self._i(day)
+        return (int(self.open_s[i]), int(self.close_s[i])) if self.trading[i] else None
+
+    def window(self, day: int, start: int | None = None, end: int | None = None) -> tuple[int, int] | None:
+        # a strategy window (seconds since local midnight) clipped to the day's session
+        i = self._i(day)
+        if not self.trading[i]:
+            return None
+        lo = int(self.open_tod[i]) if start is None else max(start, int(self.open_tod[i]))
+        hi = int(self.close_tod[i]) if end is None else min(end, int(self.close_tod[i]))
+        return (lo, hi) if lo <= hi else None
+
+    def is_open(self, ts: float) -> bool:
+        i = self._i(self.day_of(ts))
+        return bool(self.trading[i]) and self.open_s[i] <= ts <= self.close_s[i]
+
+    def in_window(self, ts: float, start: int | None = None, end: int | None = None) -> bool:
+        day, tod = self.split(ts)
+        w = self.window(day, start, end)
+        return w is not None and w[0] <= tod <= w[1]
+
+    def next_open(self, ts: float) -> int:
+        # epoch seconds of the next session open after ts
+        opens = self.open_s[self.trading]
+        k = int(np.searchsorted(opens, ts, side="right"))
+        if k == len(opens):
+            self._build(self.years[0], self.years[1] + 1)
+            return self.next_open(ts)
+        return int(opens[k])
+
+    def trading_days_between(self, start: date, end: date) -> list[date]:
+        self._i(day_id(start)); self._i(day_id(end))
+        d = self.trading_days
+        return [to_date(x) for x in d[(d >= day_id(start)) & (d <= day_id(end))]]
+
+    # --- vectorized (backtests) ---
+    def _epoch_s(self, ts) -> np.ndarray:
+        # DatetimeIndex (tz-aware, or naive in the exchange zone) or epoch seconds
+        if isinstance(ts, pd.DatetimeIndex):
+            s = ts.asi8 // 1_000_000_000
+            return s if ts.tz is not None else s - self.offset
+        return np.asarray(ts, dtype=np.int64)
+
+    def day_ids(self, ts) -> np.ndarray:
+        return (self._epoch_s(ts) + self.offset) // 86_400
+
+    def _idx(self, days: np.ndarray) -> np.ndarray:
+        if len(days):
+            self._i(int(days.min())); self._i(int(days.max()))
+        return days - self.first
+
+    def trading_day_mask(self, ts) -> np.ndarray:
+        return self.trading[self._idx(self.day_ids(ts))]
+
+    def session_mask(self, ts) -> np.ndarray:
+        s = self._epoch_s(ts)
+        i = self._idx((s + self.offset) // 86_400)
+        return self.trading[i] & (s >= self.open_s[i]) & (s <= self.close_s[i])
+
+    def window_mask(self, ts, start: int | None = None, end: int | None = None) -> np.ndarray:
+        s = self._epoch_s(ts)
+        days, tod = np.divmod(s + self.offset, 86_400)
+        i = self._idx(days)
+        lo = self.open_tod[i] if start is None else np.maximum(self.open_tod[i], start)
+        hi = self.close_tod[i] if end is None else np.minimum(self.close_tod[i], end)
+        return self.trading[i] & (tod >= lo) & (tod <= hi)
+
+    def expiry_mask(self, ts) -> np.ndarray:
+        return self.expiry[self._idx(self.day_ids(ts))]
+
+def get_calendar(tz: str | None = None, holidays_csv: str | Path | None = None) -> SessionCalendar:
+    # process-wide calendar per (tz, holidays CSV); defaults from TIMEZONE / HOLIDAYS_CSV
+    # without building Settings, so offline tools need no API credentials
+    return _calendar(tz or settings.peek("TIMEZONE"), str(holidays_csv or settings.peek("HOLIDAYS_CSV") or ""))
+
+@lru_cache(maxsize=None)
+def _calendar(tz: str, holidays_csv: str) -> SessionCalendar:
+    # HOLIDAYS_CSV (if present) extends the built-in tables
+    holidays, special = dict(NSE_HOLIDAYS), dict(SPECIAL_SESSIONS)
+    path = Path(holidays_csv)
+    if holidays_csv and path.exists():
+        h, s = load_overrides(path)
+        for d in s:
+            holidays.pop(d, None)
+        holidays.update(h)
+        special.update(s)
+        logger.info(f"calendar: {len(h)} holiday(s), {len(s)} special session(s) from {path}")
+    return SessionCalendar(tz, holidays, special)
@@ -1,30 +1,113 @@
-import asyncio, json
-from datetime import datetime
+import argparse, asyncio, json, time
+from datetime import date, timedelta
 from loguru import logger
+from .. import metrics
+from ..backtester.engine import load_spot_bars
+from ..backtester.options import LegResolver, needed_days, plan_legs, prefetch
 from ..config import settings
 from ..dhan_client import DhanClient
+from ..feed.live_feed import read_frames
+from ..feed.option_chain import OptionChainCache
+from ..feed.quotes import QuoteBatcher
+from ..instruments import InstrumentIndex
+from ..notify.alerts import AlertQueue, trade_alert
+from ..runtime import state
+from ..runtime.engine import StrategyRuntime, chain_leg, replay_bars, spot_leg
+from ..runtime.sim import SimExecutor
+from ..runtime.sources import FrameReplaySource, JournalReplaySource, QuotePollSource
+from ..storage.bar_store import BarStore
+from ..storage.tick_journal import TickJournal
+from ..storage.trade_store import TradeStore
 from ..strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
-from ..utils import in_trading_window
+from ..utils import now_local
+
+def log_trade(t):
+    logger.info(f"[paper] {t.side} {t.symbol} {t.entry_price:.2f} -> {t.exit_price} pnl {t.pnl:.2f} ({t.notes})")
 
 async def paper_trade():
+    # Same runtime as LiveTrader, with simulated fills instead of orders
     client = DhanClient()
+    journal = TickJournal()
+    quotes = QuoteBatcher(client, journal=journal)
+    store = TradeStore()
+    alerts = AlertQueue()
     strat = NiftyATMOptionStrategy(Params())
-    async def on_msg(msg):
-        # process ticks and simulate; placeholder for user to implement based on Dhan WS payload
-        pass
+    chain = OptionChainCache(client, settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT,
+                             refresh_sec=settings.OPTION_CHAIN_REFRESH_SEC, tz=settings.TIMEZONE)
+
+    def on_trade(t):
+        log_trade(t)
+        store.add([t], source="paper")
+        alerts.send(trade_alert(t, "paper"))
+
+    rt = StrategyRuntime(strat, SimExecutor(strat), chain_leg(chain, 1 if strat.p.slightly_itm else 0),
+                         on_trade=on_trade, mode="paper")
     # If WS URL unavailable, poll quotes
+    source = QuotePollSource(quotes, [(settings.EXCHANGE_SEGMENT, settings.NSE_UNDERLYING_SECURITY_ID)],
+                             tz=settings.TIMEZONE)
+    metrics.gauge("quotes.poll_errors", lambda: source.errors)
     try:
-        # Example polling: every 3s for underlying
-        while True:
-            now = datetime.utcnow()
-            if not in_trading_window(now, settings.TIMEZONE):
-                await asyncio.sleep(5)
-                continue
-            q = await client.market_quote(settings.NSE_UNDERLYING_SECURITY_ID, settings.EXCHANGE_SEGMENT)
-            # TODO: convert q to candle aggregator and run strategy
-            await asyncio.sleep(3)
+        journal.start()
+        alerts.start()
+        state.register("alerts", alerts.stats)
+        metrics.gauge("alerts.queued", lambda: len(alerts.pending))
+        metrics.gauge("quotes.pending", quotes.depth)
+        metrics.gauge("journal.records", lambda: journal.records)
+        await chain.start()
+        await rt.run(source)
     finally:
+        await chain.stop()
         await client.close()
+        await journal.stop()
+        store.close()
+        state.unregister("alerts")
+        for name in ("alerts.queued", "quotes.pending", "journal.records"):
+            metrics.unregister(name)
+        await alerts.stop()
+
+async def replay(days: int, premium: str = "spot", frames: str | None = None, speed: float = 0.0,
+                 journal_day: str | None = None):
+    # Accelerated paper trading over recorded data (cache only, no network):
+    # bars from the BarStore, a TickJournal day, or LiveFeed frames written by FrameRecorder.
+    strat = NiftyATMOptionStrategy(Params())
+    t0 = time.perf_counter()
+    if frames or journal_day:
+        seg, sid = settings.EXCHANGE_SEGMENT, settings.NSE_UNDERLYING_SECURITY_ID
+        rt = StrategyRuntime(strat, SimExecutor(strat), spot_leg(sid, seg), on_trade=log_trade)
+        if frames:
+            source = FrameReplaySource(read_frames(frames), speed)
+        else:
+            source = JournalReplaySource(TickJournal(), date.fromisoformat(journal_day), [(seg, sid)], speed)
+        trades = await rt.run(source)
+        events = rt.events
+    else:
+        now = now_local(settings.TIMEZONE)
+        interval = strat.p.timeframe_min
+        df = (await load_spot_bars(None, now - timedelta(days=days), now, interval)).set_index("ts").sort_index()
+        legs, select = None, None
+        if premium == "option":
+            resolver = LegResolver(InstrumentIndex.load(settings.INSTRUMENTS_CSV),
+                                   itm_steps=1 if strat.p.slightly_itm else 0)
+            plan = plan_legs(df, strat.p, resolver)
+            legs = await prefetch(None, BarStore(), needed_days(df, plan), interval)
+            select = resolver.selector()
+        trades = await replay_bars(df, strat, interval, legs, select, speed=speed, on_trade=log_trade)
+        events = len(df) + sum(len(s["ts"]) for s in (legs or {}).values())
+    dt = time.perf_counter() - t0
+    summary = {"trades": len(trades), "pnl": sum(t.pnl or 0.0 for t in trades), "events": events,
+               "seconds": round(dt, 3)}
+    print(json.dumps(summary, indent=2))
+    return trades
 
 if __name__ == "__main__":
-    asyncio.run(paper_trade())
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--replay-days", type=int, default=0, help="replay the last N days from the bar cache")
+    ap.add_argument("--frames", type=str, default=None, help="replay recorded LiveFeed frames")
+    ap.add_argument("--journal-day", type=str, default=None, help="replay one TickJournal day (YYYY-MM-DD)")
+    ap.add_argument("--premium", choices=["spot", "option"], default="spot")
+    ap.add_argument("--speed", type=float, default=0.0, help="replay speed vs real time; 0 = as fast as possible")
+    args = ap.parse_args()
+    if args.replay_days or args.frames or args.journal_day:
+        asyncio.run(replay(args.replay_days, args.premium, args.frames, args.speed, args.journal_day))
+    else:
+        asyncio.run(paper_trade())
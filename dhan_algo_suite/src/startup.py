@@ -0,0 +1,122 @@
+from __future__ import annotations
+import asyncio, importlib, time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from loguru import logger
+
+# Deferred subsystem loading for the web service. app.py imports only FastAPI
+# and the metrics registry; the Telegram bot, the trading loop and the data
+# stack behind it (pandas, NumPy, SQLAlchemy, httpx) are imported in a worker
+# thread and started by a background task, so health checks and webhooks are
+# answered while they load. Each subsystem reports pending -> loading -> ready
+# (or failed) with its load time; callers that need one await it. A loader
+# may return the long-running task it started (the trading loop): the
+# subsystem then follows it and turns failed (or stopped) when it ends.
+
+Loader = Callable[[], Awaitable[object]]
+MAX_RETRY_S = 60.0
+
+async def import_modules(*names: str) -> list:
+    # import off the event loop: module bodies run in a thread, the loop keeps serving
+    return [await asyncio.to_thread(importlib.import_module, n) for n in names]
+
+@dataclass
+class Subsystem:
+    name: str
+    load: Loader
+    after: tuple[str, ...] = ()
+    retry_s: float = 0.0        # >0: retry a failed load with doubling backoff (capped at MAX_RETRY_S)
+    state: str = "pending"      # pending | loading | ready | failed | stopped
+    seconds: float | None = None
+    error: str | None = None
+    value: object = None
+
+class Subsystems:
+    def __init__(self):
+        self.items: dict[str, Subsystem] = {}
+        self._done: dict[str, asyncio.Event] = {}
+        self._task: asyncio.Task | None = None
+        self.t0 = time.monotonic()
+
+    def add(self, name: str, load: Loader, after: tuple[str, ...] = (), retry_s: float = 0.0):
+        self.items[name] = Subsystem(name, load, after, retry_s)
+
+    async def _load_one(self, s: Subsystem, retry: bool = True):
+        for dep in s.after:
+            if dep in self.items:
+                await self._event(dep).wait()
+                if self.items[dep].state != "ready":
+                    s.state, s.error = "failed", f"{dep} not ready"
+                    self._event(s.name).set()
+                    return
+        delay = s.retry_s if retry else 0.0
+        t = time.perf_counter()
+        while True:
+            s.state = "loading"
+            try:
+                s.value = await s.load()
+                s.state, s.error = "ready", None
+            except Exception as e:
+                s.state, s.error = "failed", repr(e)
+                logger.error(f"startup: {s.name} failed: {e!r}" + (f", retrying in {delay:.0f}s" if delay else ""))
+            s.seconds = round(time.perf_counter() - t, 3)
+            if s.state == "ready" or not delay:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_S)
+        if s.state == "ready":
+            logger.info(f"startup: {s.name} ready in {s.seconds:.2f}s")
+            if isinstance(s.value, asyncio.Task):
+                s.value.add_done_callback(lambda t: self._ended(s, t))
+        self._event(s.name).set()
+
+    def _ended(self, s: Subsystem, task: asyncio.Task):
+        # the task behind a ready subsystem finished; a cancel (shutdown) is not a failure
+        if task.cancelled():
+            return
+        err = task.exception()
+        s.state, s.error = ("failed", repr(err)) if err is not None else ("stopped", "task exited")
+        logger.error(f"startup: {s.name} {s.state}: {s.error}")
+
+    def _event(self, name: str) -> asyncio.Event:
+        return self._done.setdefault(name, asyncio.Event())
+
+    async def load_all(self, retry: bool = True):
+        # retry=False (eager startup): one attempt each, so a dead dependency cannot hang startup
+        await asyncio.gather(*(self._load_one(s, retry) for s in self.items.values()))
+
+    def start(self) -> asyncio.Task:
+        # background mode: returns at once, subsystems come up behind the server
+        self._task = asyncio.create_task(self.load_all())
+        return self._task
+
+    async def wait(self, name: str, timeout: float | None = None):
+        # value of a ready subsystem; raises if it failed or did not come up in time
+        s = self.items.get(name)
+        if s is None:
+            raise KeyError(name)
+        await asyncio.wait_for(self._event(name).wait(), timeout)
+        if s.state != "ready":
+            raise RuntimeError(f"{name} {s.state}: {s.error}")
+        return s.value
+
+    def ready(self, name: str) -> bool:
+        s = self.items.get(name)
+        return s is not None and s.state == "ready"
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def healthy(self) -> bool:
+        return not any(s.state in ("failed", "stopped") for s in self.items.values())
+
+    def report(self) -> dict:
+        return {"uptime_s": round(time.monotonic() - self.t0, 3),
+                "subsystems": {n: {"state": s.state, "seconds": s.seconds, **({"error": s.error} if s.error else {})}
+                               for n, s in self.items.items()}}
@@ -0,0 +1,106 @@
+from __future__ import annotations
+from datetime import date
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..backtester.core import SESSION_ANCHOR
+from ..config import settings
+from ..dhan_client import DhanClient
+from ..session_calendar import day_id, tod_seconds, utc_offset
+from .bar_store import COLUMNS, BarKey, BarStore
+
+# Multi-resolution bars from one base interval (BAR_BASE_INTERVAL, 1 minute by
+# default). Only the base is fetched from Dhan; every higher timeframe is
+# aggregated from it per session (buckets counted from 09:15 local and labelled
+# by their start, as backtester.core.resample_session) and persisted in the
+# BarStore next to the base:
+#   <root>/<segment>/<security_id>/1m/<day>/    fetched base
+#   <root>/<segment>/<security_id>/15m/<day>/   derived once, DERIVED marker
+# so switching timeframes is a set of memory-mapped .npy loads. Level days
+# already in the cache (fetched directly or derived earlier) are used as they
+# are; today's still-forming session is aggregated in memory, never persisted.
+
+API_INTERVALS = (1, 5, 15, 25, 60)     # minutes Dhan intraday charts serve directly
+
+def _empty() -> dict[str, np.ndarray]:
+    return {c: np.empty(0, dtype=np.int64 if c == "ts" else np.float64) for c in COLUMNS}
+
+def aggregate(cols: dict[str, np.ndarray], minutes: int, offset: int, anchor_s: int) -> dict[str, np.ndarray]:
+    # sorted base bars (epoch-second ts) -> session-aligned `minutes` bars, any number of days at once
+    ts = np.asarray(cols["ts"], dtype=np.int64)
+    if len(ts) == 0:
+        return _empty()
+    local = ts + offset
+    midnight = local - local % 86_400
+    width = minutes * 60
+    label = midnight + anchor_s + ((local - midnight - anchor_s) // width) * width - offset
+    starts = np.flatnonzero(np.r_[True, label[1:] != label[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        "ts": label[starts],
+        "open": np.asarray(cols["open"], dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(cols["high"], dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(cols["low"], dtype=np.float64), starts),
+        "close": np.asarray(cols["close"], dtype=np.float64)[ends],
+        "volume": np.add.reduceat(np.asarray(cols["volume"], dtype=np.float64), starts),
+    }
+
+class BarPyramid:
+    def __init__(self, store: BarStore | None = None, base: int | None = None, anchor: str = SESSION_ANCHOR):
+        self.store = store or BarStore()
+        self.base = base or settings.peek("BAR_BASE_INTERVAL")
+        self.offset = utc_offset(self.store.tz)
+        self.anchor_s = tod_seconds(anchor)
+
+    def derivable(self, interval: int) -> bool:
+        return interval > self.base and interval % self.base == 0
+
+    def _aggregate(self, cols: dict[str, np.ndarray], interval: int) -> dict[str, np.ndarray]:
+        return aggregate(cols, interval, self.offset, self.anchor_s)
+
+    def derive(self, security_id: int, exchange_segment: str, interval: int, start: date, end: date,
+               today: date | None = None) -> int:
+        # persist `interval` bars for past days that have a base day but no level day yet; returns days written
+        if not self.derivable(interval):
+            raise ValueError(f"{interval}m cannot be derived from {self.base}m bars")
+        key = BarKey(security_id, exchange_segment, interval)
+        base_key = BarKey(security_id, exchange_segment, self.base)
+        today = today or pd.Timestamp.now(tz=self.store.tz).date()
+        days = [d for d in self.store.missing_days(key, start, end, today)
+                if d < today and self.store.has_day(base_key, d)]
+        if not days:
+            return 0
+        parts = [self.store.read_day(base_key, d) for d in days]
+        agg = self._aggregate({c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}, interval)
+        # labels never cross local midnight, so each day's level bars are one contiguous run
+        day_no = (agg["ts"] + self.offset) // 86_400
+        ids = np.array([day_id(d) for d in days], dtype=np.int64)
+        lo_hi = np.searchsorted(day_no, ids, "left"), np.searchsorted(day_no, ids, "right")
+        for d, lo, hi in zip(days, *lo_hi):
+            self.store.write_day(key, d, {c: a[lo:hi] for c, a in agg.items()}, derived_from=self.base)
+        logger.info(f"BarPyramid: derived {len(days)} day(s) of {interval}m from {self.base}m for {security_id}")
+        return len(days)
+
+    async def get_frame(self, client: DhanClient | None, security_id: int, exchange_segment: str, interval: int,
+                        start: date, end: date, instrument: str = "INDEX") -> pd.DataFrame:
+        # client=None -> offline, cache only; same frame shape as BarStore.load_frame
+        key = BarKey(security_id, exchange_segment, interval)
+        if not self.derivable(interval):
+            if interval != self.base and interval not in API_INTERVALS:
+                raise ValueError(f"{interval}m is neither a Dhan interval nor a multiple of {self.base}m")
+            return await self.store.get_frame(client, key, start, end, instrument)
+        base_key = BarKey(security_id, exchange_segment, self.base)
+        today = pd.Timestamp.now(tz=self.store.tz).date()
+        live: dict[date, dict[str, np.ndarray]] = {}
+        need = [d for d in self.store.missing_days(key, start, end, today)
+                if d >= today or not self.store.has_day(base_key, d)]
+        if need and client is not None:
+            live = await self.store.fill(client, base_key, need[0], need[-1], instrument, today)
+        self.derive(security_id, exchange_segment, interval, start, end, today)
+        df = self.store.load_frame(key, start, end)
+        if live:
+            agg = self._aggregate({c: np.concatenate([cols[c] for cols in live.values()]) for c in COLUMNS}, interval)
+            extra = pd.DataFrame({**{c: v for c, v in agg.items() if c != "ts"},
+                                  "ts": pd.to_datetime(agg["ts"], unit="s", utc=True).tz_convert(self.store.tz)})
+            df = pd.concat([df, extra], ignore_index=True)
+        return df
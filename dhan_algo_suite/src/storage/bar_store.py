@@ -0,0 +1,164 @@
+from __future__ import annotations
+import asyncio, os, shutil
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from loguru import logger
+from ..config import settings
+from ..dhan_client import DhanClient
+
+# On-disk bar cache: one directory per (segment, security, interval, day) holding
+# one .npy file per column, so any day can be np.load'ed with mmap_mode="r".
+#   <root>/<exchange_segment>/<security_id>/<interval>m/<YYYY-MM-DD>/{ts,open,...}.npy
+# Days the API returned nothing for (weekends, holidays) get an EMPTY marker so
+# they are never refetched. Today's (still forming) session is never persisted.
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+EMPTY_MARKER = "EMPTY"
+DERIVED_MARKER = "DERIVED"   # aggregated from a finer cached interval (storage.bar_pyramid)
+MAX_DAYS_PER_REQUEST = 90  # Dhan intraday charts accept ~90 days per call
+EPOCH = date(1970, 1, 1)
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+@dataclass(frozen=True)
+class BarKey:
+    security_id: int
+    exchange_segment: str
+    interval: int
+
+    def path(self, root: Path) -> Path:
+        return root / self.exchange_segment / str(self.security_id) / f"{self.interval}m"
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=k) for k in range((end - start).days + 1)]
+
+def _chunks(days: list[date], max_days: int) -> list[tuple[date, date]]:
+    # Contiguous runs of missing days, each split to at most max_days
+    out: list[tuple[date, date]] = []
+    run: list[date] = []
+    for d in days:
+        if run and ((d - run[-1]).days != 1 or len(run) == max_days):
+            out.append((run[0], run[-1])); run = []
+        run.append(d)
+    if run:
+        out.append((run[0], run[-1]))
+    return out
+
+class BarStore:
+    def __init__(self, root: str | Path | None = None, max_days_per_request: int = MAX_DAYS_PER_REQUEST,
+                 max_concurrency: int = 4, tz: str | None = None):
+        self.root = Path(root or settings.peek("BAR_CACHE_DIR"))
+        self.max_days = max_days_per_request
+        self.max_concurrency = max_concurrency
+        self.tz = tz or settings.peek("TIMEZONE")
+
+    # --- Local reads/writes ---
+    def day_dir(self, key: BarKey, day: date) -> Path:
+        return key.path(self.root) / day.isoformat()
+
+    def has_day(self, key: BarKey, day: date) -> bool:
+        return self.day_dir(key, day).is_dir()
+
+    def read_day(self, key: BarKey, day: date) -> dict[str, np.ndarray] | None:
+        d = self.day_dir(key, day)
+        if not d.is_dir():
+            return None
+        if (d / EMPTY_MARKER).exists():
+            return {c: np.empty(0, dtype=np.int64 if c == "ts" else np.float64) for c in COLUMNS}
+        return {c: np.load(d / f"{c}.npy", mmap_mode="r") for c in COLUMNS}
+
+    def write_day(self, key: BarKey, day: date, cols: dict[str, np.ndarray], derived_from: int | None = None):
+        d = self.day_dir(key, day)
+        tmp = d.with_name(d.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        if derived_from is not None:
+            (tmp / DERIVED_MARKER).write_text(f"{derived_from}m\n")
+        if len(cols["ts"]) == 0:
+            (tmp / EMPTY_MARKER).touch()
+        else:
+            for c in COLUMNS:
+                np.save(tmp / f"{c}.npy", np.ascontiguousarray(cols[c]))
+        shutil.rmtree(d, ignore_errors=True)
+        os.replace(tmp, d)
+
+    def load(self, key: BarKey, start: date, end: date) -> dict[str, np.ndarray]:
+        parts = [p for p in (self.read_day(key, d) for d in _days(start, end)) if p is not None]
+        if not parts:
+            return {c: np.empty(0, dtype=np.int64 if c == "ts" else np.float64) for c in COLUMNS}
+        return {c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}
+
+    def load_frame(self, key: BarKey, start: date, end: date) -> pd.DataFrame:
+        # Same shape as backtester.engine.fetch_spot_intraday
+        cols = self.load(key, start, end)
+        return pd.DataFrame({
+            "open": cols["open"], "high": cols["high"], "low": cols["low"], "close": cols["close"],
+            "volume": cols["volume"],
+            "ts": pd.to_datetime(cols["ts"], unit="s", utc=True).tz_convert(self.tz),
+        })
+
+    def missing_days(self, key: BarKey, start: date, end: date, today: date | None = None) -> list[date]:
+        today = today or pd.Timestamp.now(tz=self.tz).date()
+        return [d for d in _days(start, min(end, today)) if d >= today or not self.has_day(key, d)]
+
+    # --- Fetch and fill ---
+    def _split_by_day(self, data: dict, lo: date, hi: date) -> dict[date, dict[str, np.ndarray]]:
+        ts = np.asarray(data.get("timestamp", []), dtype=np.int64)
+        n = len(ts)
+        order = np.argsort(ts, kind="stable")
+        cols = {"ts": ts[order]}
+        for c in COLUMNS[1:]:
+            v = data.get(c)
+            cols[c] = np.asarray(v, dtype=np.float64)[order] if v is not None and len(v) == n else np.zeros(n)
+        # local calendar day as days-since-epoch, compared as ints rather than date objects
+        local = pd.to_datetime(cols["ts"], unit="s", utc=True).tz_convert(self.tz).tz_localize(None)
+        day_no = np.asarray(local.normalize().asi8 // NS_PER_DAY)
+        out = {}
+        for d in _days(lo, hi):
+            sel = day_no == (d - EPOCH).days
+            out[d] = {c: a[sel] for c, a in cols.items()}
+        return out
+
+    async def fill(self, client: DhanClient, key: BarKey, start: date, end: date, instrument: str = "INDEX",
+                   today: date | None = None) -> dict[date, dict[str, np.ndarray]]:
+        # Fetch only missing days (and today's partial session); returns today's bars unpersisted
+        today = today or pd.Timestamp.now(tz=self.tz).date()
+        missing = self.missing_days(key, start, end, today)
+        live: dict[date, dict[str, np.ndarray]] = {}
+        if not missing:
+            return live
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(lo: date, hi: date):
+            async with sem:
+                data = await client.intraday(
+                    security_id=key.security_id, exchange_segment=key.exchange_segment,
+                    instrument=instrument, interval=key.interval,
+                    from_dt=f"{lo.isoformat()} 00:00:00", to_dt=f"{(hi + timedelta(days=1)).isoformat()} 00:00:00",
+                )
+            for d, cols in self._split_by_day(data or {}, lo, hi).items():
+                if d >= today:
+                    live[d] = cols
+                else:
+                    self.write_day(key, d, cols)
+
+        chunks = _chunks(missing, self.max_days)
+        logger.info(f"BarStore: fetching {len(missing)} day(s) in {len(chunks)} request(s) for {key}")
+        await asyncio.gather(*(one(lo, hi) for lo, hi in chunks))
+        return live
+
+    async def get_frame(self, client: DhanClient | None, key: BarKey, start: date, end: date,
+                        instrument: str = "INDEX") -> pd.DataFrame:
+        # client=None -> offline, cache only
+        live = await self.fill(client, key, start, end, instrument) if client is not None else {}
+        df = self.load_frame(key, start, end)
+        if live:
+            extra = pd.concat([
+                pd.DataFrame({**{c: v for c, v in cols.items() if c != "ts"},
+                              "ts": pd.to_datetime(cols["ts"], unit="s", utc=True).tz_convert(self.tz)})
+                for cols in live.values()
+            ])
+            df = pd.concat([df, extra], ignore_index=True)
+        return df
@@ -0,0 +1,242 @@
+from __future__ import annotations
+import asyncio, mmap, os, struct, time
+from datetime import date, timedelta
+from pathlib import Path
+import numpy as np
+from loguru import logger
+from ..config import settings
+from ..feed.live_feed import FULL, QUOTE, SEGMENTS, TICKER
+from ..session_calendar import utc_offset
+
+# Append-only tick journal: one file per local day and instrument,
+#   <root>/<YYYY-MM-DD>/<exchange_segment>/<security_id>.ticks
+# a 64-byte header (magic, version, record size, committed record count) then
+# fixed-width TICK_DTYPE records. Files grow in preallocated segments and are
+# written through a shared mmap, so append() is a store into mapped memory with
+# no syscall; the committed count is published and pages msync'ed in batches
+# from a worker thread (flush()), never on the event loop. Readers map the
+# committed prefix as a read-only NumPy structured array (zero copy), also
+# while the file is still being written.
+
+TICK_DTYPE = np.dtype([
+    ("ts", "<i8"),          # receive time, epoch ns
+    ("volume", "<i8"),      # cumulative day volume as reported
+    ("ltp", "<f4"),
+    ("qty", "<i4"),         # last traded quantity
+    ("ltt", "<i4"),         # exchange last trade time, epoch s (0 if unknown)
+    ("oi", "<i4"),
+])
+MAGIC = b"DHTJ"
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<4sHHQ")           # magic, version, record size, count
+_COUNT_OFFSET = 8
+SEGMENT_RECORDS = 1 << 16                   # growth step (2 MiB of records)
+SUFFIX = ".ticks"
+
+def read_count(path: str | Path) -> int:
+    with open(path, "rb") as f:
+        magic, version, size, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC or size != TICK_DTYPE.itemsize:
+        raise ValueError(f"{path}: not a v{VERSION} tick journal")
+    return count
+
+def read_ticks(path: str | Path) -> np.ndarray:
+    # committed records as a read-only memmap (zero copy)
+    n = read_count(path)
+    if n == 0:
+        return np.empty(0, TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+class _DayFile:
+    def __init__(self, path: Path, segment_records: int):
+        self.path = path
+        self.step = segment_records
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fresh = not path.exists() or path.stat().st_size < HEADER_SIZE
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.count = 0 if fresh else read_count(path)
+        self.committed = self.count
+        self.capacity = max(self.step, -(-self.count // self.step) * self.step)
+        self.retired: list[mmap.mmap] = []
+        self._map()
+        if fresh:
+            _HEADER.pack_into(self.mm, 0, MAGIC, VERSION, TICK_DTYPE.itemsize, 0)
+
+    def _map(self):
+        size = HEADER_SIZE + self.capacity * TICK_DTYPE.itemsize
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)     # sparse preallocation of the next segment
+        self.mm = mmap.mmap(self.fd, size)
+        self.recs = np.ndarray(self.capacity, TICK_DTYPE, buffer=self.mm, offset=HEADER_SIZE)
+
+    def append(self, ts: int, volume: int, ltp: float, qty: int, ltt: int, oi: int):
+        if self.count == self.capacity:
+            # remap one segment larger; the old map is closed after the next flush
+            self.recs = None
+            self.retired.append(self.mm)
+            self.capacity += self.step
+            self._map()
+        self.recs[self.count] = (ts, volume, ltp, qty, ltt, oi)
+        self.count += 1
+
+    def commit(self) -> bool:
+        # publish the record count (records are written before the count moves)
+        if self.count == self.committed:
+            return False
+        struct.pack_into("<Q", self.mm, _COUNT_OFFSET, self.count)
+        self.committed = self.count
+        return True
+
+    def close(self):
+        self.commit()
+        self.recs = None
+        for m in (*self.retired, self.mm):
+            m.close()
+        self.retired = []
+        os.ftruncate(self.fd, HEADER_SIZE + self.count * TICK_DTYPE.itemsize)
+        os.close(self.fd)
+
+class TickJournal:
+    def __init__(self, root: str | Path | None = None, tz: str | None = None,
+                 segment_records: int = SEGMENT_RECORDS, flush_interval: float = 1.0):
+        self.root = Path(root or settings.TICK_JOURNAL_DIR)
+        self.tz = tz or settings.TIMEZONE
+        self.utc_offset = utc_offset(self.tz)
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self._files: dict[tuple[str, int], tuple[int, _DayFile]] = {}
+        self._closing: list[_DayFile] = []
+        self._task: asyncio.Task | None = None
+        self._inflight: asyncio.Future | None = None     # msync/close running in the worker thread
+        self.records = 0
+        self.flushes = 0
+
+    def path(self, day: date, exchange_segment: str, security_id: int) -> Path:
+        return self.root / day.isoformat() / exchange_segment / f"{int(security_id)}{SUFFIX}"
+
+    # --- write side (event loop) ---
+    def append(self, exchange_segment: str, security_id: int, ltp: float, ts_ns: int | None = None,
+               qty: int = 0, volume: int = 0, ltt: int = 0, oi: int = 0):
+        ts_ns = ts_ns or time.time_ns()
+        day_no = (ts_ns // 1_000_000_000 + self.utc_offset) // 86_400
+        key = (exchange_segment, int(security_id))
+        cur = self._files.get(key)
+        if cur is None or cur[0] != day_no:
+            if cur is not None:
+                self._closing.append(cur[1])
+            day = date(1970, 1, 1) + timedelta(days=int(day_no))
+            cur = self._files[key] = (day_no, _DayFile(self.path(day, *key), self.segment_records))
+        cur[1].append(ts_ns, volume, ltp, qty, ltt, oi)
+        self.records += 1
+
+    def on_packet(self, pkt, ts_ns: int | None = None):
+        # decoded LiveFeed packet; non-price packets are ignored
+        code = pkt.code
+        if code == TICKER:
+            self.append(SEGMENTS.get(pkt.segment, str(pkt.segment)), pkt.security_id, pkt.ltp, ts_ns, ltt=pkt.ltt)
+        elif code == QUOTE:
+            self.append(SEGMENTS.get(pkt.segment, str(pkt.segment)), pkt.security_id, pkt.ltp, ts_ns,
+                        pkt.ltq, pkt.volume, pkt.ltt)
+        elif code == FULL:
+            self.append(SEGMENTS.get(pkt.segment, str(pkt.segment)), pkt.security_id, pkt.ltp, ts_ns,
+                        pkt.ltq, pkt.volume, pkt.ltt, pkt.oi)
+
+    def on_quotes(self, resp: dict, ts_ns: int | None = None):
+        # Dhan market quote response (REST polling)
+        ts_ns = ts_ns or time.time_ns()
+        for seg, by_id in ((resp or {}).get("data") or {}).items():
+            if not isinstance(by_id, dict):
+                continue
+            for sid, q in by_id.items():
+                if isinstance(q, dict) and q.get("last_price") is not None:
+                    self.append(seg, int(sid), float(q["last_price"]), ts_ns, int(q.get("last_quantity") or 0),
+                                int(q.get("volume") or 0), 0, int(q.get("oi") or 0))
+
+    def _commit(self) -> list[mmap.mmap]:
+        maps = []
+        for _, f in self._files.values():
+            if f.commit():
+                maps.append(f.mm)
+        return maps
+
+    @staticmethod
+    def _sync(maps: list[mmap.mmap], closing: list[_DayFile]):
+        for m in maps:
+            m.flush()
+        for f in closing:
+            f.close()
+
+    async def flush(self):
+        # publish counts on the loop, msync and close rolled-over days in a thread
+        maps = self._commit()
+        closing, self._closing = self._closing, []
+        if maps or closing:
+            # shielded: cancelling the flush (stop()) cannot stop the thread, stop() waits for it
+            self._inflight = asyncio.ensure_future(asyncio.to_thread(self._sync, maps, closing))
+            await asyncio.shield(self._inflight)
+            self.flushes += 1
+        for _, f in self._files.values():
+            for m in f.retired:
+                m.close()
+            f.retired = []
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"TickJournal: flush failed: {e!r}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight is not None:
+            # the maps may still be msync'ed in the thread; never close them under it
+            try:
+                await self._inflight
+            except Exception as e:
+                logger.warning(f"TickJournal: flush failed: {e!r}")
+            self._inflight = None
+        await self.flush()
+        self.close()
+
+    def close(self):
+        for _, f in self._files.values():
+            f.close()
+        for f in self._closing:
+            f.close()
+        self._files.clear()
+        self._closing = []
+
+    # --- read side ---
+    def days(self) -> list[date]:
+        if not self.root.is_dir():
+            return []
+        return sorted(date.fromisoformat(p.name) for p in self.root.iterdir() if p.is_dir())
+
+    def instruments(self, day: date) -> list[tuple[str, int]]:
+        d = self.root / day.isoformat()
+        if not d.is_dir():
+            return []
+        return sorted((seg.name, int(f.name[:-len(SUFFIX)])) for seg in d.iterdir() if seg.is_dir()
+                      for f in seg.iterdir() if f.name.endswith(SUFFIX))
+
+    def read(self, day: date, exchange_segment: str, security_id: int) -> np.ndarray:
+        p = self.path(day, exchange_segment, security_id)
+        return read_ticks(p) if p.exists() else np.empty(0, TICK_DTYPE)
+
+    def load_day(self, day: date) -> dict[tuple[str, int], np.ndarray]:
+        return {k: self.read(day, *k) for k in self.instruments(day)}
@@ -0,0 +1,232 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table, and_, create_engine, delete,
+                        event, func, insert, select, true, update)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..config import settings
+
+# Trade store on settings.DB_URL (SQLite in WAL mode by default). Every closed
+# trade is one row with indexed UTC timestamps (epoch microseconds); daily and
+# monthly PnL per (strategy, source) are maintained incrementally on insert, so
+# windows and breakdowns read a few aggregate rows instead of the trade history.
+# source: "backtest" | "paper" | "live".
+
+WINDOWS = {"1m": 30, "2m": 60, "3m": 90, "6m": 180, "12m": 360}
+
+metadata = MetaData()
+
+trades = Table(
+    "trades", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("strategy", String(64), nullable=False),
+    Column("source", String(16), nullable=False),
+    Column("ts_entry", Integer, nullable=False),
+    Column("ts_exit", Integer),
+    Column("day", String(10), nullable=False),          # local entry day
+    Column("symbol", String(64)),
+    Column("security_id", String(32)),
+    Column("side", String(16)),
+    Column("qty", Integer),
+    Column("entry_price", Float),
+    Column("exit_price", Float),
+    Column("pnl", Float),
+    Column("sl_hits_today", Integer),
+    Column("notes", String(64)),
+    Index("ix_trades_strategy_source_entry", "strategy", "source", "ts_entry"),
+    Index("ix_trades_entry", "ts_entry"),
+)
+
+def _agg_table(name: str, period: str, width: int) -> Table:
+    return Table(
+        name, metadata,
+        Column("strategy", String(64), primary_key=True),
+        Column("source", String(16), primary_key=True),
+        Column(period, String(width), primary_key=True),
+        Column("trades", Integer, nullable=False, default=0),
+        Column("wins", Integer, nullable=False, default=0),
+        Column("pnl", Float, nullable=False, default=0.0),
+    )
+
+daily_pnl = _agg_table("daily_pnl", "day", 10)
+monthly_pnl = _agg_table("monthly_pnl", "month", 7)
+
+def _enable_wal(dbapi_conn, _):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+def _us(ts) -> int | None:
+    if ts is None or (isinstance(ts, float) and np.isnan(ts)):
+        return None
+    t = pd.Timestamp(ts)
+    if t.tzinfo is None:
+        t = t.tz_localize(settings.peek("TIMEZONE"))
+    return t.value // 1000
+
+class TradeStore:
+    def __init__(self, url: str | None = None, tz: str | None = None):
+        self.url = url or settings.peek("DB_URL")
+        self.tz = tz or settings.peek("TIMEZONE")
+        self.engine = create_engine(self.url, future=True)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _enable_wal)
+        metadata.create_all(self.engine)
+
+    def close(self):
+        self.engine.dispose()
+
+    # --- writes ---
+    def _rows(self, items: Iterable, strategy: str, source: str) -> list[dict]:
+        recs = [t if isinstance(t, dict) else t.__dict__ for t in items]
+        if not recs:
+            return []
+        entry = [_us(d["ts_entry"]) for d in recs]
+        days = pd.to_datetime(entry, unit="us", utc=True).tz_convert(self.tz).strftime("%Y-%m-%d")
+        return [{
+            "strategy": strategy, "source": source, "ts_entry": e, "ts_exit": _us(d.get("ts_exit")), "day": day,
+            "symbol": d.get("symbol"), "security_id": None if d.get("security_id") is None else str(d["security_id"]),
+            "side": d.get("side"), "qty": d.get("qty"), "entry_price": d.get("entry_price"),
+            "exit_price": d.get("exit_price"), "pnl": float(d.get("pnl") or 0.0),
+            "sl_hits_today": d.get("sl_hits_today"), "notes": d.get("notes"),
+        } for d, e, day in zip(recs, entry, days)]
+
+    def _bump(self, conn, table: Table, period: str, deltas: dict[tuple, list]):
+        # add (trades, wins, pnl) deltas to aggregate rows, creating missing ones
+        rows = [{"strategy": st, "source": src, period: key, "trades": n, "wins": w, "pnl": p}
+                for (st, src, key), (n, w, p) in deltas.items()]
+        dialect = conn.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            ins = (sqlite_insert if dialect == "sqlite" else pg_insert)(table)
+            conn.execute(ins.on_conflict_do_update(
+                index_elements=["strategy", "source", period],
+                set_={c: table.c[c] + ins.excluded[c] for c in ("trades", "wins", "pnl")}), rows)
+            return
+        for r in rows:
+            cond = and_(table.c.strategy == r["strategy"], table.c.source == r["source"],
+                        table.c[period] == r[period])
+            res = conn.execute(update(table).where(cond).values(
+                trades=table.c.trades + r["trades"], wins=table.c.wins + r["wins"], pnl=table.c.pnl + r["pnl"]))
+            if res.rowcount == 0:
+                conn.execute(insert(table).values(**r))
+
+    def add(self, items: Iterable, strategy: str = "nifty_atm_option", source: str = "backtest") -> int:
+        rows = self._rows(items, strategy, source)
+        if not rows:
+            return 0
+        day: dict[tuple, list] = {}
+        month: dict[tuple, list] = {}
+        for r in rows:
+            win = 1 if r["pnl"] > 0 else 0
+            for acc, key in ((day, r["day"]), (month, r["day"][:7])):
+                a = acc.setdefault((strategy, source, key), [0, 0, 0.0])
+                a[0] += 1; a[1] += win; a[2] += r["pnl"]
+        with self.engine.begin() as conn:
+            conn.execute(insert(trades), rows)
+            self._bump(conn, daily_pnl, "day", day)
+            self._bump(conn, monthly_pnl, "month", month)
+        return len(rows)
+
+    def replace(self, items: Iterable, strategy: str = "nifty_atm_option", source: str = "backtest") -> int:
+        # e.g. a fresh backtest run supersedes the previous one
+        self.clear(strategy, source)
+        return self.add(items, strategy, source)
+
+    def import_csv(self, path: str, strategy: str = "nifty_atm_option", source: str = "backtest") -> int:
+        # one-off load of a trades CSV written by backtester.engine.save_results
+        df = pd.read_csv(path)
+        df = df.astype(object).where(df.notna(), None)
+        return self.replace(df.to_dict("records"), strategy, source)
+
+    def clear(self, strategy: str, source: str):
+        with self.engine.begin() as conn:
+            for t in (trades, daily_pnl, monthly_pnl):
+                conn.execute(delete(t).where(and_(t.c.strategy == strategy, t.c.source == source)))
+
+    # --- reads ---
+    @staticmethod
+    def _filter(table: Table, strategy: str | None, source: str | None):
+        conds = []
+        if strategy is not None:
+            conds.append(table.c.strategy == strategy)
+        if source is not None:
+            conds.append(table.c.source == source)
+        return and_(true(), *conds)
+
+    def last_entry(self, strategy: str | None = None, source: str | None = None) -> pd.Timestamp | None:
+        with self.engine.connect() as conn:
+            v = conn.execute(select(func.max(trades.c.ts_entry)).where(self._filter(trades, strategy, source))).scalar()
+        return None if v is None else pd.Timestamp(v * 1000, tz="UTC").tz_convert(self.tz)
+
+    def window_pnl(self, strategy: str | None = None, source: str | None = None, now=None,
+                   windows: dict[str, int] = WINDOWS) -> dict[str, float]:
+        # PnL of trades entered in [now - N days, now] (now defaults to the last entry).
+        # Whole local days come from daily_pnl; only the two boundary days touch trades.
+        now = pd.Timestamp(now) if now is not None else self.last_entry(strategy, source)
+        if now is None:
+            return {k: 0.0 for k in windows}
+        if now.tzinfo is None:
+            now = now.tz_localize("UTC")
+        now = now.tz_convert(self.tz)
+        last_day = now.normalize()
+        end = now.value // 1000
+        out = {}
+        with self.engine.connect() as conn:
+            def raw(lo: int, hi: int, inclusive: bool = False) -> float:
+                upper = trades.c.ts_entry <= hi if inclusive else trades.c.ts_entry < hi
+                return conn.execute(select(func.coalesce(func.sum(trades.c.pnl), 0.0)).where(
+                    self._filter(trades, strategy, source), trades.c.ts_entry >= lo, upper)).scalar()
+
+            for label, days in windows.items():
+                cutoff = now - timedelta(days=days)
+                first_full = cutoff.normalize() + timedelta(days=1)
+                if first_full >= last_day:
+                    out[label] = float(raw(cutoff.value // 1000, end, True))
+                    continue
+                full = conn.execute(select(func.coalesce(func.sum(daily_pnl.c.pnl), 0.0)).where(
+                    self._filter(daily_pnl, strategy, source), daily_pnl.c.day >= first_full.strftime("%Y-%m-%d"),
+                    daily_pnl.c.day < last_day.strftime("%Y-%m-%d"))).scalar()
+                out[label] = float(full + raw(cutoff.value // 1000, first_full.value // 1000)
+                                   + raw(last_day.value // 1000, end, True))
+        return out
+
+    def _periods(self, table: Table, period: str, strategy: str | None, source: str | None,
+                 since: str | None = None) -> pd.DataFrame:
+        q = select(table.c[period], func.sum(table.c.trades).label("trades"), func.sum(table.c.wins).label("wins"),
+                   func.sum(table.c.pnl).label("pnl")).where(self._filter(table, strategy, source))
+        if since is not None:
+            q = q.where(table.c[period] >= since)
+        q = q.group_by(table.c[period]).order_by(table.c[period])
+        with self.engine.connect() as conn:
+            return pd.DataFrame(conn.execute(q).all(), columns=[period, "trades", "wins", "pnl"])
+
+    def monthly(self, strategy: str | None = None, source: str | None = None, since: str | None = None) -> pd.DataFrame:
+        return self._periods(monthly_pnl, "month", strategy, source, since)
+
+    def daily(self, strategy: str | None = None, source: str | None = None, since: str | None = None) -> pd.DataFrame:
+        return self._periods(daily_pnl, "day", strategy, source, since)
+
+    def by_strategy(self, source: str | None = None, since_day: str | None = None) -> pd.DataFrame:
+        t = daily_pnl
+        q = select(t.c.strategy, t.c.source, func.sum(t.c.trades).label("trades"), func.sum(t.c.wins).label("wins"),
+                   func.sum(t.c.pnl).label("pnl")).where(self._filter(t, None, source))
+        if since_day is not None:
+            q = q.where(t.c.day >= since_day)
+        q = q.group_by(t.c.strategy, t.c.source).order_by(t.c.strategy, t.c.source)
+        with self.engine.connect() as conn:
+            return pd.DataFrame(conn.execute(q).all(), columns=["strategy", "source", "trades", "wins", "pnl"])
+
+    def trades_frame(self, strategy: str | None = None, source: str | None = None, since=None) -> pd.DataFrame:
+        q = select(trades).where(self._filter(trades, strategy, source)).order_by(trades.c.ts_entry)
+        if since is not None:
+            q = q.where(trades.c.ts_entry >= _us(since))
+        with self.engine.connect() as conn:
+            df = pd.DataFrame(conn.execute(q).mappings().all())
+        for c in ("ts_entry", "ts_exit"):
+            if c in df:
+                df[c] = pd.to_datetime(df[c], unit="us", utc=True).dt.tz_convert(self.tz)
+        return df
@@ -33,7 +33,11 @@ class NiftyATMOptionStrategy:
     def momentum_trigger(self, spot_candles: pd.DataFrame) -> StrategySignal:
         # Expect dataframe with columns: ['ts','open','high','low','close']
         last = spot_candles.iloc[-1]
-        body = last['close'] - last['open']
+        return self.momentum_from_bar(last['open'], last['close'])
+
+    def momentum_from_bar(self, open_: float, close: float) -> StrategySignal:
+        # Scalar form for streaming candles (no DataFrame on the hot path)
+        body = close - open_
         if abs(body) >= self.p.big_candle_points:
             direction = "CALL" if body > 0 else "PUT"
             return StrategySignal(enter=True, direction=direction, reason=f"Momentum {body:.1f}pts")
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import asyncio, time
+from typing import Any
+import httpx
+from loguru import logger
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from . import metrics
+
+# Pooled, rate-limited, instrumented HTTP transport for DhanClient.
+# Every call names an endpoint class; each class has its own token buckets
+# (per-second/minute/hour windows from Dhan's published limits) and its own
+# latency histogram ("dhan.<class>" in metrics). Only idempotent calls are
+# retried, with jittered exponential backoff, on 429/5xx and transport errors.
+
+# (max requests, window seconds)
+RATE_LIMITS: dict[str, list[tuple[int, float]]] = {
+    "orders": [(25, 1.0), (250, 60.0), (1000, 3600.0)],
+    "quotes": [(1, 1.0)],
+    "historical": [(5, 1.0)],
+    "option_chain": [(1, 3.0)],
+    "other": [(20, 1.0)],          # order/trade book and other non-trading reads
+}
+
+class TokenBucket:
+    def __init__(self, capacity: int, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def wait(self) -> float:
+        # refill; seconds until a token is available (0: now), nothing taken
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1.0
+
+class RateLimiter:
+    def __init__(self, limits: list[tuple[int, float]]):
+        self.buckets = [TokenBucket(n, p) for n, p in limits]
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self):
+        # a token from every window at once: none is taken while another window
+        # still holds the request back (or if the caller gives up waiting)
+        async with self._lock:
+            while (d := max(b.wait() for b in self.buckets)) > 0:
+                self.waited += d
+                await asyncio.sleep(d)
+            for b in self.buckets:
+                b.take()
+
+def _retryable(e: BaseException) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+class DhanTransport:
+    def __init__(self, base_url: str, timeout: float = 15.0, transport: httpx.AsyncBaseTransport | None = None,
+                 limits: dict[str, list[tuple[int, float]]] | None = None, max_attempts: int = 4,
+                 backoff_max: float = 4.0):
+        self.http = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout, transport=transport,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+        # limits override RATE_LIMITS per endpoint class; the others keep the defaults
+        self.limiters = {k: RateLimiter(v) for k, v in {**RATE_LIMITS, **(limits or {})}.items()}
+        self.max_attempts = max_attempts
+        self.backoff_max = backoff_max
+        self.retries = 0
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def _once(self, endpoint: str, method: str, url: str, **kw) -> httpx.Response:
+        await self.limiters.get(endpoint, self.limiters["other"]).acquire()
+        t0 = time.perf_counter()
+        try:
+            r = await self.http.request(method, url, **kw)
+        finally:
+            metrics.histogram(f"dhan.{endpoint}").observe(time.perf_counter() - t0)
+        r.raise_for_status()
+        return r
+
+    async def request(self, endpoint: str, method: str, url: str, *, idempotent: bool,
+                      headers: dict[str, str], json: Any = None) -> Any:
+        kw = {"headers": headers} if json is None else {"headers": headers, "json": json}
+        if not idempotent:
+            return (await self._once(endpoint, method, url, **kw)).json()
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(_retryable), stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=0.2, max=self.backoff_max), reraise=True,
+            before_sleep=self._log_retry,
+        ):
+            with attempt:
+                r = await self._once(endpoint, method, url, **kw)
+        return r.json()
+
+    def _log_retry(self, state):
+        self.retries += 1
+        logger.warning(f"Dhan retry #{state.attempt_number}: {state.outcome.exception()!r}")
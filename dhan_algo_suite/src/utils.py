@@ -1,18 +1,18 @@
-from datetime import datetime, time, timedelta
-import pytz
+from datetime import datetime, timezone
+from .session_calendar import get_calendar, tod_seconds
 
-def in_trading_window(now: datetime, tz: str = "Asia/Kolkata") -> bool:
-    z = pytz.timezone(tz)
-    n = now.astimezone(z)
-    start = z.localize(datetime(n.year, n.month, n.day, 9, 15)).timetz()
-    end   = z.localize(datetime(n.year, n.month, n.day, 15, 15)).timetz()
-    return start <= n.timetz() <= end
+# Session checks go through the precomputed session_calendar (holidays and
+# special sessions included); `now` may be any aware datetime.
 
-def after_cutoff(now: datetime, tz: str = "Asia/Kolkata") -> bool:
-    z = pytz.timezone(tz)
-    n = now.astimezone(z)
-    cutoff = z.localize(datetime(n.year, n.month, n.day, 15, 15)).timetz()
-    return n.timetz() >= cutoff
+def in_trading_window(now: datetime, tz: str = "Asia/Kolkata", start: str = "09:15", end: str = "15:15") -> bool:
+    return get_calendar(tz).in_window(now.timestamp(), tod_seconds(start), tod_seconds(end))
+
+def after_cutoff(now: datetime, tz: str = "Asia/Kolkata", cutoff: str = "15:15") -> bool:
+    return get_calendar(tz).split(now.timestamp())[1] >= tod_seconds(cutoff)
+
+def now_local(tz: str = "Asia/Kolkata") -> datetime:
+    # aware wall clock in the exchange zone (replaces naive datetime.utcnow())
+    return datetime.now(timezone.utc).astimezone(get_calendar(tz).zone)
 
 def floor_to_interval(ts: datetime, minutes: int = 5) -> datetime:
     return ts.replace(second=0, microsecond=0, minute=(ts.minute // minutes)*minutes)
@@ -1,59 +1,90 @@
-import os
-from fastapi import FastAPI, Request
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler
-
-# --- Environment Variables ---
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")  # Set in Railway variables
-WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # e.g., https://yourapp.railway.app
-
-if not TELEGRAM_TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN is not set in environment variables.")
-
-if not WEBHOOK_URL:
-    raise ValueError("WEBHOOK_URL is not set in environment variables.")
-
-# --- FastAPI app ---
-app = FastAPI()
-
-# --- Telegram bot app ---
-telegram_app = Application.builder().token(TELEGRAM_TOKEN).build()
-
-# --- Handlers ---
-async def start(update: Update, context):
-    keyboard = [
-        [InlineKeyboardButton("📈 Buy", callback_data="buy")],
-        [InlineKeyboardButton("📉 Sell", callback_data="sell")],
-        [InlineKeyboardButton("❌ Cancel", callback_data="cancel")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("Welcome! Choose an action:", reply_markup=reply_markup)
-
-async def button_handler(update: Update, context):
-    query = update.callback_query
-    await query.answer()
-
-    if query.data == "buy":
-        await query.edit_message_text("✅ Buy order placed!")
-    elif query.data == "sell":
-        await query.edit_message_text("✅ Sell order placed!")
-    elif query.data == "cancel":
-        await query.edit_message_text("❌ Order canceled!")
-
-telegram_app.add_handler(CommandHandler("start", start))
-telegram_app.add_handler(CallbackQueryHandler(button_handler))
+from fastapi import APIRouter, HTTPException, Request
+from loguru import logger
+from telegram import Update
+from telegram.ext import Application, CommandHandler, filters
+from .src.config import settings
+from .src.notify import status
+
+# Telegram manager. Commands are answered from the in-memory runtime.state
+# snapshots and latency histograms that the trading loop in this process
+# publishes; handlers never read files or call Dhan. Updates arrive by webhook
+# (WEBHOOK_URL set; app.py forwards them to telegram_webhook, other apps can
+# mount `router`) or long polling. TELEGRAM_API_URL can point at a local
+# stand-in for the Bot API.
+
+router = APIRouter()
+telegram_app: Application | None = None
+
+HELP = ("/pnl - today's realized and open PnL\n"
+        "/positions - open position, SL and unrealized PnL\n"
+        "/status - feed, session and SL counters\n"
+        "/latency - order and API latency percentiles")
+
+async def _reply(update: Update, text: str):
+    await update.effective_message.reply_text(text)
+
+async def cmd_start(update: Update, context):
+    await _reply(update, HELP)
+
+async def cmd_pnl(update: Update, context):
+    await _reply(update, status.pnl_text())
+
+async def cmd_positions(update: Update, context):
+    await _reply(update, status.positions_text())
+
+async def cmd_status(update: Update, context):
+    await _reply(update, status.status_text())
+
+async def cmd_latency(update: Update, context):
+    await _reply(update, status.latency_text())
+
+COMMANDS = {"start": cmd_start, "help": cmd_start, "pnl": cmd_pnl, "positions": cmd_positions,
+            "status": cmd_status, "latency": cmd_latency}
+
+def build_bot(token: str | None = None, api_url: str | None = None, chat_id: str | None = None) -> Application:
+    api_url = (api_url or settings.TELEGRAM_API_URL).rstrip("/")
+    bot_app = (Application.builder().token(token or settings.TELEGRAM_BOT_TOKEN)
+               .base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot").build())
+    # only answer the configured chat
+    chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+    only = filters.Chat(chat_id=int(chat_id)) if chat_id.lstrip("-").isdigit() else filters.Chat(username=chat_id)
+    for name, fn in COMMANDS.items():
+        bot_app.add_handler(CommandHandler(name, fn, filters=only))
+    return bot_app
 
 # --- Webhook endpoint for Telegram ---
-@app.post(f"/{TELEGRAM_TOKEN}")
-async def telegram_webhook(request: Request):
-    data = await request.json()
-    update = Update.de_json(data, telegram_app.bot)
-    await telegram_app.process_update(update)
+@router.post("/{token}")
+async def telegram_webhook(token: str, request: Request):
+    if telegram_app is None or token != telegram_app.bot.token:
+        raise HTTPException(status_code=404)
+    update = Update.de_json(await request.json(), telegram_app.bot)
+    # handled by the application's own update task; the webhook returns at once
+    await telegram_app.update_queue.put(update)
     return {"status": "ok"}
 
-# --- Function for app.py ---
-def build_and_start_bot():
-    """Called by app.py to set webhook when service starts."""
-    webhook_url = f"{WEBHOOK_URL}/{TELEGRAM_TOKEN}"
-    telegram_app.bot.set_webhook(webhook_url)
-    print(f"✅ Webhook set to: {webhook_url}")
+async def start_bot(webhook_url: str | None = None, **kw) -> Application:
+    """Build and start the bot; set the webhook, or start long polling without one."""
+    global telegram_app
+    telegram_app = build_bot(**kw)
+    await telegram_app.initialize()
+    await telegram_app.start()
+    webhook_url = webhook_url or settings.WEBHOOK_URL
+    if webhook_url:
+        url = f"{webhook_url.rstrip('/')}/{telegram_app.bot.token}"
+        await telegram_app.bot.set_webhook(url)
+        logger.info(f"Telegram webhook set to {webhook_url.rstrip('/')}/<token>")
+    else:
+        await telegram_app.bot.delete_webhook()
+        await telegram_app.updater.start_polling()
+        logger.info("Telegram long polling started")
+    return telegram_app
+
+async def stop_bot():
+    global telegram_app
+    if telegram_app is None:
+        return
+    if telegram_app.updater is not None and telegram_app.updater.running:
+        await telegram_app.updater.stop()
+    await telegram_app.stop()
+    await telegram_app.shutdown()
+    telegram_app = None
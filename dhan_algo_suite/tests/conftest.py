@@ -0,0 +1,13 @@
+import os, sys
+from pathlib import Path
+
+# Offline test setup: placeholder credentials (nothing leaves the machine; the
+# Dhan and Bot APIs are local stand-ins) and the directory holding the
+# dhan_algo_suite package on sys.path.
+for k, v in (("DHAN_ACCESS_TOKEN", "test"), ("DHAN_CLIENT_ID", "test"), ("TELEGRAM_BOT_TOKEN", "1:test"),
+             ("TELEGRAM_CHAT_ID", "1")):
+    os.environ.setdefault(k, v)
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
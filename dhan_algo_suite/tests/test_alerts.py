@@ -0,0 +1,86 @@
+import asyncio, json, time
+import httpx
+from dhan_algo_suite.src.notify.alerts import MAX_MESSAGE, AlertQueue
+
+# AlertQueue against a local Bot API stand-in (httpx.MockTransport): 429
+# retry_after is honoured, bursts are coalesced into messages within
+# Telegram's size limit, and stop() drains what is queued.
+
+FAST = [(100, 1.0)]
+
+class BotAPI:
+    def __init__(self, throttle: list[float] | None = None):
+        self.throttle = list(throttle or [])   # retry_after values to answer 429 with, in order
+        self.messages: list[str] = []
+        self.calls: list[float] = []
+
+    async def __call__(self, req: httpx.Request) -> httpx.Response:
+        self.calls.append(time.monotonic())
+        assert req.url.path == "/bot1:test/sendMessage"
+        if self.throttle:
+            return httpx.Response(429, json={"ok": False, "error_code": 429,
+                                             "parameters": {"retry_after": self.throttle.pop(0)}})
+        body = json.loads(req.content)
+        self.messages.append(body["text"])
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": len(self.messages)}})
+
+def run(api: BotAPI, scenario, **kw):
+    async def main():
+        q = AlertQueue("1:test", 42, "http://bot.local", transport=httpx.MockTransport(api), **kw)
+        q.start()
+        return await scenario(q)
+    return asyncio.run(main())
+
+def test_retry_after_is_honoured():
+    api = BotAPI(throttle=[0.2])
+
+    async def scenario(q):
+        q.send("SL hit")
+        await q.stop(drain=2.0)
+        return q.stats()
+
+    stats = run(api, scenario, batch_window=0.0, limits=FAST)
+    assert api.messages == ["SL hit"]
+    assert len(api.calls) == 2 and api.calls[1] - api.calls[0] >= 0.2
+    assert stats["sent"] == 1 and stats["failed"] == 0
+
+def test_gives_up_after_max_attempts():
+    api = BotAPI(throttle=[0.01] * 5)
+
+    async def scenario(q):
+        q.send("lost")
+        await q.stop(drain=2.0)
+        return q.stats()
+
+    stats = run(api, scenario, batch_window=0.0, limits=FAST, max_attempts=3)
+    assert api.messages == [] and len(api.calls) == 3
+    assert stats["failed"] == 1 and stats["queued"] == 0
+
+def test_stop_drains_a_burst_in_order():
+    api = BotAPI(throttle=[0.05])
+    alerts = [f"fill {i} " + "x" * 200 for i in range(120)]
+
+    async def scenario(q):
+        for a in alerts:
+            q.send(a)
+        await q.stop(drain=5.0)
+        return q.stats()
+
+    stats = run(api, scenario, batch_window=0.05, limits=FAST)
+    assert all(len(m) <= MAX_MESSAGE for m in api.messages)
+    assert "\n".join(api.messages).split("\n") == alerts
+    assert stats["alerts"] == len(alerts) and stats["sent"] == len(api.messages) > 1
+    assert stats["queued"] == 0 and stats["dropped"] == 0
+
+def test_full_queue_drops_oldest():
+    api = BotAPI()
+
+    async def scenario(q):
+        for i in range(10):
+            q.send(f"a{i}")
+        await q.stop(drain=2.0)
+        return q.stats()
+
+    stats = run(api, scenario, batch_window=0.05, limits=FAST, max_queue=4)
+    assert api.messages == ["a6\na7\na8\na9"]
+    assert stats["dropped"] == 6
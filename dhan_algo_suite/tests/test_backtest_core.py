@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.backtester.core import simulate_frame
+from dhan_algo_suite.src.backtester.engine import simulate_iterrows
+from dhan_algo_suite.src.strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
+
+# core.simulate must reproduce the reference per-bar loop trade for trade. The
+# synthetic sessions drop the 09:15 bar on some days: without a session-start
+# reset an open position carries into the next day, in both implementations.
+
+TZ = "Asia/Kolkata"
+PARAMS = {
+    "default": Params(),
+    "one_sl_a_day": Params(big_candle_points=8, max_daily_sls=1),
+    "late_window": Params(sl_per_unit=10, tsl_steps=[(13, 20), (5, 10)], start_time="09:30", end_time="15:00"),
+    "wide_stop": Params(sl_per_unit=60, big_candle_points=12),
+}
+
+def sessions(days: int, seed: int, freq: int = 5, drop_start: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = [pd.date_range(d + pd.Timedelta("09:00:00"), d + pd.Timedelta("15:30:00"), freq=f"{freq}min")
+           for d in pd.bdate_range("2024-02-01", periods=days, tz=TZ)]
+    idx = idx[0].append(idx[1:])
+    if drop_start:
+        opening = (idx.hour == 9) & (idx.minute == 15)
+        idx = idx[~(opening & (rng.random(len(idx)) < drop_start))]
+    close = 22000 + np.cumsum(rng.normal(0, 8, len(idx)))
+    open_ = close - rng.normal(0, 10, len(idx))
+    return pd.DataFrame({"open": open_, "high": np.maximum(open_, close) + 1,
+                         "low": np.minimum(open_, close) - 1, "close": close}, index=idx)
+
+@pytest.mark.parametrize("drop_start", [0.0, 0.4])
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("name", PARAMS)
+def test_simulate_matches_iterrows(name, seed, drop_start):
+    p = PARAMS[name]
+    df = sessions(30, seed, drop_start=drop_start)
+    ref = simulate_iterrows(df, NiftyATMOptionStrategy(p))
+    got = simulate_frame(df, p)
+    assert ref, "scenario produced no trades"
+    assert [t.__dict__ for t in got] == [t.__dict__ for t in ref]
+
+def test_position_carries_over_a_day_without_0915_bar():
+    p = PARAMS["wide_stop"]
+    carried = 0
+    for seed in range(5):
+        df = sessions(30, seed, drop_start=1.0)
+        got = simulate_frame(df, p)
+        assert [t.__dict__ for t in got] == [t.__dict__ for t in simulate_iterrows(df, NiftyATMOptionStrategy(p))]
+        carried += sum(t.ts_exit.date() != t.ts_entry.date() for t in got)
+    assert carried > 0
+
+def test_session_start_bar_discards_open_position():
+    # with every 09:15 bar present nothing is held overnight
+    df = sessions(30, 0)
+    for p in PARAMS.values():
+        assert all(t.ts_exit.date() == t.ts_entry.date() for t in simulate_frame(df, p))
@@ -0,0 +1,91 @@
+import asyncio, json
+from datetime import date
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.backtester.core import resample_session
+from dhan_algo_suite.src.dhan_client import DhanClient
+from dhan_algo_suite.src.storage.bar_pyramid import BarPyramid
+from dhan_algo_suite.src.storage.bar_store import DERIVED_MARKER, EMPTY_MARKER, BarKey, BarStore
+
+# BarPyramid over a stand-in for Dhan's intraday charts serving 1m bars only:
+# every higher level must equal core.resample_session on the same 1m base, be
+# derived once into the cache (DERIVED marker) and be read back from there
+# without the client. Exchange holidays are EMPTY base days and stay empty
+# at every level.
+
+TZ = "Asia/Kolkata"
+START, END = date(2024, 3, 4), date(2024, 3, 15)
+HOLIDAY = date(2024, 3, 8)
+LEVELS = (3, 5, 15)
+COLS = ["open", "high", "low", "close", "volume"]
+
+class Charts:
+    def __init__(self):
+        self.requests = 0
+
+    def __call__(self, req: httpx.Request) -> httpx.Response:
+        body = json.loads(req.content)
+        assert body["interval"] == "1"
+        self.requests += 1
+        lo, hi = pd.Timestamp(body["fromDate"], tz=TZ), pd.Timestamp(body["toDate"], tz=TZ)
+        idx = pd.date_range(lo, hi, freq="1min", inclusive="left")
+        tod = idx.hour * 60 + idx.minute
+        keep = (idx.dayofweek < 5) & (tod >= 555) & (tod < 930) & (idx.normalize().date != HOLIDAY)
+        ts = idx[keep].asi8 // 10**9
+        ts = ts[ts % 420 != 60]                      # a few missing minutes: partial buckets
+        rng = np.random.default_rng(int(ts[0]) if len(ts) else 0)
+        close = 22000 + np.cumsum(rng.normal(0, 3, len(ts)))
+        open_ = close - rng.normal(0, 2, len(ts))
+        return httpx.Response(200, json={
+            "timestamp": ts.tolist(), "open": open_.tolist(), "high": (np.maximum(open_, close) + 1).tolist(),
+            "low": (np.minimum(open_, close) - 1).tolist(), "close": close.tolist(),
+            "volume": rng.integers(1, 500, len(ts)).tolist()})
+
+def get_frame(root, charts: Charts | None, interval: int) -> pd.DataFrame:
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(charts)) if charts is not None else None
+        try:
+            return await BarPyramid(BarStore(root, tz=TZ), base=1).get_frame(client, 13, "IDX_I", interval, START, END)
+        finally:
+            if client is not None:
+                await client.close()
+    return asyncio.run(main())
+
+def test_levels_equal_resample_session_of_the_base(tmp_path):
+    charts = Charts()
+    frames = {tf: get_frame(tmp_path, charts, tf) for tf in LEVELS}
+    assert charts.requests == 1                      # only the base is ever fetched
+    base = BarStore(tmp_path, tz=TZ).load_frame(BarKey(13, "IDX_I", 1), START, END).set_index("ts")
+    assert len(base)
+    for tf, df in frames.items():
+        ref = resample_session(base, tf)
+        got = df.set_index("ts")[COLS]
+        np.testing.assert_array_equal(got.index.asi8, ref.index.asi8)
+        np.testing.assert_allclose(got.to_numpy(), ref[COLS].to_numpy())
+        assert (tmp_path / "IDX_I" / "13" / f"{tf}m" / "2024-03-05" / DERIVED_MARKER).exists()
+
+def test_second_read_uses_the_derived_cache(tmp_path, monkeypatch):
+    first = get_frame(tmp_path, Charts(), 15)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("level re-derived")
+
+    monkeypatch.setattr(BarPyramid, "_aggregate", fail)
+    charts = Charts()
+    pd.testing.assert_frame_equal(get_frame(tmp_path, charts, 15), first)
+    assert charts.requests == 0
+    pd.testing.assert_frame_equal(get_frame(tmp_path, None, 15), first)        # offline
+
+@pytest.mark.parametrize("tf", LEVELS)
+def test_holidays_stay_empty_at_every_level(tmp_path, tf):
+    df = get_frame(tmp_path, Charts(), tf)
+    for day in (HOLIDAY, date(2024, 3, 9), date(2024, 3, 10)):
+        for interval in (1, tf):
+            d = tmp_path / "IDX_I" / "13" / f"{interval}m" / day.isoformat()
+            assert (d / EMPTY_MARKER).exists()
+        assert (d / DERIVED_MARKER).exists()
+    days = set(df["ts"].dt.date)
+    assert HOLIDAY not in days and date(2024, 3, 7) in days and date(2024, 3, 11) in days
+    assert BarPyramid(BarStore(tmp_path, tz=TZ), base=1).derive(13, "IDX_I", tf, START, END) == 0
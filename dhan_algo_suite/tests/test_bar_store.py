@@ -0,0 +1,91 @@
+import asyncio, json, shutil
+from datetime import date, timedelta
+import httpx
+import numpy as np
+import pandas as pd
+from dhan_algo_suite.src.dhan_client import DhanClient
+from dhan_algo_suite.src.storage.bar_store import EMPTY_MARKER, MAX_DAYS_PER_REQUEST, BarKey, BarStore
+
+# BarStore against a stand-in for Dhan's intraday charts endpoint
+# (httpx.MockTransport): only missing days are requested, in runs of at most
+# MAX_DAYS_PER_REQUEST, and a second store over the same directory (the next
+# run) serves everything from disk.
+
+TZ = "Asia/Kolkata"
+KEY = BarKey(13, "IDX_I", 5)
+
+def bars(lo: pd.Timestamp, hi: pd.Timestamp) -> pd.DatetimeIndex:
+    idx = pd.date_range(lo, hi, freq="5min", inclusive="left")
+    tod = idx.hour * 60 + idx.minute
+    return idx[(idx.dayofweek < 5) & (tod >= 555) & (tod <= 930)]
+
+class Charts:
+    def __init__(self):
+        self.requests: list[tuple[date, date]] = []
+
+    def __call__(self, req: httpx.Request) -> httpx.Response:
+        body = json.loads(req.content)
+        lo, hi = pd.Timestamp(body["fromDate"], tz=TZ), pd.Timestamp(body["toDate"], tz=TZ)
+        self.requests.append((lo.date(), (hi - pd.Timedelta(days=1)).date()))
+        ts = bars(lo, hi).asi8 // 10**9
+        px = (ts % 100_000) / 10.0
+        return httpx.Response(200, json={"timestamp": ts.tolist(), "open": px.tolist(), "high": (px + 2).tolist(),
+                                         "low": (px - 2).tolist(), "close": (px + 1).tolist(),
+                                         "volume": [10] * len(ts)})
+
+def get_frame(root, charts: Charts | None, start: date, end: date) -> pd.DataFrame:
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(charts)) if charts is not None else None
+        try:
+            return await BarStore(root, tz=TZ).get_frame(client, KEY, start, end)
+        finally:
+            if client is not None:
+                await client.close()
+    return asyncio.run(main())
+
+def expected_ts(start: date, end: date) -> np.ndarray:
+    return bars(pd.Timestamp(start, tz=TZ), pd.Timestamp(end + timedelta(days=1), tz=TZ)).asi8 // 10**9
+
+def test_fills_once_and_reuses_the_cache_between_runs(tmp_path):
+    start, end = date(2024, 1, 1), date(2024, 6, 30)
+    charts = Charts()
+    first = get_frame(tmp_path, charts, start, end)
+    n_days = (end - start).days + 1
+    assert len(charts.requests) == -(-n_days // MAX_DAYS_PER_REQUEST)
+    assert all((hi - lo).days < MAX_DAYS_PER_REQUEST for lo, hi in charts.requests)
+    assert charts.requests[0][0] == start and charts.requests[-1][1] == end
+    np.testing.assert_array_equal(first["ts"].astype("int64") // 10**9, expected_ts(start, end))
+    assert (tmp_path / "IDX_I" / "13" / "5m" / "2024-01-06" / EMPTY_MARKER).exists()   # Saturday, never refetched
+
+    again = Charts()
+    second = get_frame(tmp_path, again, start, end)
+    assert again.requests == []
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(first, get_frame(tmp_path, None, start, end))   # offline
+
+def test_only_gaps_are_fetched(tmp_path):
+    start, end = date(2024, 3, 1), date(2024, 3, 31)
+    get_frame(tmp_path, Charts(), start, end)
+    for d in ("2024-03-12", "2024-03-13", "2024-03-14", "2024-03-27"):
+        shutil.rmtree(tmp_path / "IDX_I" / "13" / "5m" / d)
+    charts = Charts()
+    df = get_frame(tmp_path, charts, start, date(2024, 4, 5))
+    assert charts.requests == [(date(2024, 3, 12), date(2024, 3, 14)), (date(2024, 3, 27), date(2024, 3, 27)),
+                               (date(2024, 4, 1), date(2024, 4, 5))]
+    np.testing.assert_array_equal(df["ts"].astype("int64") // 10**9, expected_ts(start, date(2024, 4, 5)))
+
+def test_todays_session_is_returned_but_not_persisted(tmp_path):
+    today = date(2024, 3, 6)
+    store = BarStore(tmp_path, tz=TZ)
+
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(Charts()))
+        try:
+            return await store.fill(client, KEY, date(2024, 3, 4), today, today=today)
+        finally:
+            await client.close()
+
+    live = asyncio.run(main())
+    assert list(live) == [today] and len(live[today]["ts"]) == len(expected_ts(today, today))
+    assert store.has_day(KEY, date(2024, 3, 5)) and not store.has_day(KEY, today)
+    assert store.missing_days(KEY, date(2024, 3, 4), today, today) == [today]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.feed.candles import CandleAggregator
+from dhan_algo_suite.src.session_calendar import SessionCalendar
+
+# Live candles must match pandas resampling anchored at each day's session open
+# (09:15 on regular days, the special session's open otherwise).
+
+TZ = "Asia/Kolkata"
+TIMEFRAMES = [1, 3, 5, 15, 25, 75]
+DAYS = {"2024-07-01": "09:15", "2024-07-02": "09:15", "2024-11-01": "18:00"}   # 2024-11-01: Diwali muhurat
+
+def _ticks(seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    parts = []
+    for day, open_ in DAYS.items():
+        start = pd.Timestamp(f"{day} {open_}", tz=TZ) - pd.Timedelta(minutes=7)   # a few pre-open ticks
+        secs = np.sort(rng.choice(60 * 60 * 2, 3000, replace=False))
+        parts.append(pd.DataFrame({"ts": start + pd.to_timedelta(secs, unit="s"),
+                                   "price": 100 + np.cumsum(rng.normal(0, 0.2, len(secs))).round(2),
+                                   "qty": rng.integers(1, 50, len(secs)).astype(float)}))
+    return pd.concat(parts, ignore_index=True)
+
+def _expected(ticks: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    out = []
+    for day, open_ in DAYS.items():
+        t = ticks[ticks["ts"].dt.strftime("%Y-%m-%d") == day].set_index("ts")
+        r = t.resample(f"{minutes}min", origin=pd.Timestamp(f"{day} {open_}", tz=TZ), label="left", closed="left")
+        bars = r["price"].ohlc().join(r["qty"].sum().rename("volume")).dropna()
+        out.append(bars)
+    return pd.concat(out)
+
+@pytest.mark.parametrize("minutes", TIMEFRAMES)
+def test_matches_pandas_resample_from_session_open(minutes):
+    ticks = _ticks()
+    agg = CandleAggregator(TIMEFRAMES, TZ, capacity=10_000, calendar=SessionCalendar(TZ, years=(2024, 2025)))
+    for ts, px, q in zip(ticks["ts"].astype("int64") // 10**9, ticks["price"], ticks["qty"]):
+        agg.on_tick("NIFTY", float(px), int(ts), float(q))
+    agg.flush(ticks["ts"].iloc[-1].timestamp() + 86_400)
+    ts, ohlcv = agg.ring("NIFTY", minutes).last()
+    got = pd.DataFrame(ohlcv, columns=["open", "high", "low", "close", "volume"],
+                       index=pd.to_datetime(ts, unit="s", utc=True).tz_convert(TZ))
+    want = _expected(ticks, minutes)
+    pd.testing.assert_index_equal(got.index, want.index, check_names=False)
+    np.testing.assert_allclose(got.to_numpy(), want[got.columns].to_numpy())
+
+def test_buckets_start_at_0915_not_on_the_clock_hour():
+    agg = CandleAggregator([25], TZ, calendar=SessionCalendar(TZ, years=(2024, 2025)))
+    ts = pd.Timestamp("2024-07-01 10:00", tz=TZ).timestamp()
+    assert pd.Timestamp(agg.bucket_start(ts, 25), unit="s", tz="UTC").tz_convert(TZ) == \
+        pd.Timestamp("2024-07-01 09:40", tz=TZ)
@@ -0,0 +1,230 @@
+import asyncio, json
+import httpx
+from dhan_algo_suite.src.dhan_client import DhanClient
+from dhan_algo_suite.src.live.execution import ExecutionEngine, round_tick
+from dhan_algo_suite.src.strategy.nifty_atm_option import NiftyATMOptionStrategy, Params
+
+# ExecutionEngine against a local stand-in of Dhan's order API (POST/PUT/DELETE
+# /orders, GET /orders/{id}, GET /orders/external/{correlationId}). Every order
+# is acked TRANSIT without a price, as Dhan does; the test then moves orders on
+# the "exchange" side and checks what the engine sends back. Orders are picked
+# by role, the first part of their correlation id ("entry", "sl", "exit", "cover").
+
+LIMITS = {"orders": [(1000, 1.0)], "other": [(1000, 1.0)]}
+
+class MockOrderAPI:
+    def __init__(self):
+        self.orders: dict[str, dict] = {}
+        self.calls: list[tuple[str, str, dict]] = []
+        self.refuse_cancel: set[str] = set()   # already traded at the exchange: DELETE answers 400
+        self.reject: set[str] = set()          # roles the broker refuses outright (400)
+        self.lost: set[str] = set()            # roles placed at the exchange whose answer never arrives
+        self.dropped: set[str] = set()         # roles whose request never reaches the broker
+        self.preset: dict[str, dict] = {}      # role -> order fields right after placement
+        self._next = 100
+
+    def by_corr(self, tag: str) -> dict:
+        return next(o for o in self.orders.values() if role(o["correlationId"]) == tag)
+
+    def placed(self, tag: str) -> list[dict]:
+        return [b for m, _, b in self.calls if m == "POST" and role(b.get("correlationId", "")) == tag]
+
+    def modifies(self) -> list[dict]:
+        return [b for m, _, b in self.calls if m == "PUT"]
+
+    def fill(self, tag: str, qty: int, price: float, status: str = "TRADED"):
+        self.by_corr(tag).update(orderStatus=status, filledQty=qty, averageTradedPrice=price)
+
+    async def __call__(self, req: httpx.Request) -> httpx.Response:
+        body = json.loads(req.content) if req.content else {}
+        self.calls.append((req.method, req.url.path, body))
+        oid = req.url.path.rsplit("/", 1)[1]
+        if req.method == "POST":
+            r = role(body["correlationId"])
+            if r in self.reject:
+                return httpx.Response(400, json={"errorMessage": "insufficient margin"})
+            if r in self.dropped:
+                raise httpx.ConnectError("connection reset", request=req)
+            self._next += 1
+            oid = str(self._next)
+            self.orders[oid] = {**body, "orderId": oid, "orderStatus": "PENDING", "filledQty": 0,
+                                "averageTradedPrice": 0, **self.preset.get(r, {})}
+            if r in self.lost:
+                raise httpx.ReadTimeout("timed out", request=req)
+            return httpx.Response(200, json={"orderId": oid, "orderStatus": "TRANSIT"})
+        if "/external/" in req.url.path:
+            o = next((o for o in self.orders.values() if o["correlationId"] == oid), None)
+            return httpx.Response(200, json=o) if o else httpx.Response(404, json={"errorMessage": "no order"})
+        o = self.orders[oid]
+        if req.method == "PUT":
+            o.update(quantity=body["quantity"], triggerPrice=body["triggerPrice"])
+        elif req.method == "DELETE":
+            if oid in self.refuse_cancel or o["orderStatus"] == "TRADED":
+                return httpx.Response(400, json={"errorMessage": "order already traded"})
+            o["orderStatus"] = "CANCELLED"
+        return httpx.Response(200, json=o)
+
+def role(tag: str) -> str:
+    return tag.split("-", 1)[0]
+
+def run(api: MockOrderAPI, scenario):
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(api), limits=LIMITS)
+        ex = ExecutionEngine(client, NiftyATMOptionStrategy(Params()), modify_interval=0.0, poll_interval=0.01)
+        try:
+            return await scenario(ex)
+        finally:
+            await ex.close()
+            await client.close()
+    return asyncio.run(main())
+
+def test_entry_rejected_after_ack_cancels_sl():
+    api = MockOrderAPI()
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        assert pos is not None and not pos.closed
+        api.by_corr("entry")["orderStatus"] = "REJECTED"
+        await asyncio.sleep(0.1)
+        return pos
+
+    pos = run(api, scenario)
+    assert pos.closed and pos.qty == 0
+    assert api.by_corr("sl")["orderStatus"] == "CANCELLED"
+    assert not api.placed("cover")
+
+def test_sl_traded_before_cancel_is_covered():
+    api = MockOrderAPI()
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        api.fill("sl", 75, 79.0)
+        api.by_corr("entry")["orderStatus"] = "CANCELLED"
+        ex.on_order_update({"orderId": pos.entry.order_id, "orderStatus": "CANCELLED"})
+        await asyncio.sleep(0.1)
+        return pos
+
+    pos = run(api, scenario)
+    assert pos.closed and pos.qty == 0
+    assert [b["quantity"] for b in api.placed("cover")] == [75]
+    assert api.placed("cover")[0]["transactionType"] == "BUY"
+
+def test_partial_fill_resizes_and_rebases_sl():
+    api = MockOrderAPI()
+    sl_per_unit = Params().sl_per_unit
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        assert pos.sl_trigger == round_tick(100.0 - sl_per_unit)
+        api.fill("entry", 25, 103.0, "PART_TRADED")
+        await asyncio.sleep(0.1)
+        assert (pos.qty, pos.entry_price) == (25, 103.0)
+        api.fill("entry", 75, 103.4)
+        await asyncio.sleep(0.1)
+        return pos
+
+    pos = run(api, scenario)
+    sl = api.by_corr("sl")
+    assert (pos.qty, sl["quantity"]) == (75, 75)
+    assert pos.entry_price == 103.4
+    assert pos.sl_trigger == sl["triggerPrice"] == round_tick(103.4 - sl_per_unit)
+    assert [m["quantity"] for m in api.modifies()][0] == 25
+
+def test_flatten_skips_exit_when_sl_already_traded():
+    api = MockOrderAPI()
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        api.fill("entry", 75, 100.0)
+        await asyncio.sleep(0.05)
+        ex.poll_interval = 60.0          # the SL fill lands between polls
+        await asyncio.sleep(0.02)
+        api.fill("sl", 75, 80.0)
+        await ex.flatten()
+        return ex, pos
+
+    ex, pos = run(api, scenario)
+    assert not api.placed("exit")
+    assert pos.closed and pos.exit_price == 80.0
+    assert pos.sl.status == "TRADED" and ex.sl_hits == 1
+
+def test_flatten_takes_exit_price_from_order_status():
+    api = MockOrderAPI()
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        api.fill("entry", 75, 100.0)
+        await asyncio.sleep(0.05)
+
+        async def exchange():
+            # the market SELL fills shortly after its TRANSIT ack
+            while not api.placed("exit"):
+                await asyncio.sleep(0.001)
+            api.fill("exit", 75, 112.5)
+        filler = asyncio.create_task(exchange())
+        await ex.flatten()
+        await filler
+        return pos
+
+    pos = run(api, scenario)
+    assert [b["quantity"] for b in api.placed("exit")] == [75]
+    assert api.by_corr("sl")["orderStatus"] == "CANCELLED"
+    assert pos.closed and pos.exit_price == 112.5
+
+def test_entry_refused_with_sl_partly_filled_buys_it_back():
+    api = MockOrderAPI()
+    api.reject.add("entry")
+    api.preset["sl"] = {"orderStatus": "PART_TRADED", "filledQty": 25, "averageTradedPrice": 80.0}
+
+    pos = run(api, lambda ex: ex.enter(45000, "NSE_FNO", 75, 100.0))
+    assert pos is None
+    assert api.by_corr("sl")["orderStatus"] == "CANCELLED"
+    assert [(b["transactionType"], b["quantity"]) for b in api.placed("cover")] == [("BUY", 25)]
+
+def test_unanswered_entry_found_at_broker_keeps_sl():
+    api = MockOrderAPI()
+    api.lost.add("entry")
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        api.fill("entry", 75, 101.0)
+        await asyncio.sleep(0.1)
+        return pos
+
+    pos = run(api, scenario)
+    assert pos is not None and not pos.closed
+    assert pos.entry.order_id == api.by_corr("entry")["orderId"] and pos.entry.status == "TRADED"
+    assert api.by_corr("sl")["orderStatus"] == "PENDING"
+    assert not api.placed("cover")
+
+def test_unanswered_entry_missing_at_broker_is_rejected():
+    api = MockOrderAPI()
+    api.dropped.add("entry")
+
+    pos = run(api, lambda ex: ex.enter(45000, "NSE_FNO", 75, 100.0))
+    assert pos is None
+    assert len([c for c in api.calls if "/external/" in c[1]]) == 3
+    assert api.by_corr("sl")["orderStatus"] == "CANCELLED"
+
+def test_flatten_sells_only_what_a_partial_sl_left():
+    api = MockOrderAPI()
+
+    async def scenario(ex):
+        pos = await ex.enter(45000, "NSE_FNO", 75, 100.0)
+        api.fill("entry", 75, 100.0)
+        await asyncio.sleep(0.05)
+        api.fill("sl", 25, 80.0, "PART_TRADED")
+
+        async def exchange():
+            while not api.placed("exit"):
+                await asyncio.sleep(0.001)
+            api.fill("exit", 50, 86.0)
+        filler = asyncio.create_task(exchange())
+        await ex.flatten()
+        await filler
+        return pos
+
+    pos = run(api, scenario)
+    assert api.by_corr("sl")["orderStatus"] == "CANCELLED"
+    assert [(b["transactionType"], b["quantity"]) for b in api.placed("exit")] == [("SELL", 50)]
+    assert pos.closed and pos.exit_price == (25 * 80.0 + 50 * 86.0) / 75
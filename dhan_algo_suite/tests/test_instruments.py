@@ -0,0 +1,97 @@
+import os
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.instruments import InstrumentIndex, find_atm_option, load_instruments
+
+# InstrumentIndex over a small instrument master: ATM / ITM / neighbour lookups
+# agree with find_atm_option, and the pickle snapshot next to the CSV is reused
+# only while the CSV's size and mtime are unchanged.
+
+STRIKES = [21800.0, 21900.0, 22000.0, 22100.0, 22200.0]
+
+def master_rows() -> list[dict]:
+    rows, sid = [], 1000
+    for und, exps in (("NIFTY", ["2024-03-07 14:30:00", "2024-03-14 14:30:00"]), ("BANKNIFTY", ["2024-03-06 14:30:00"])):
+        for exp in exps:
+            for strike in STRIKES:
+                for opt in ("CE", "PE"):
+                    sid += 1
+                    rows.append({"securityId": sid, "tradingSymbol": f"{und}-Mar2024-{strike:g}-{opt}",
+                                 "exchangeSegment": "NSE_FNO", "instrument": "OPTIDX", "drvStrikePrice": strike,
+                                 "drvOptionType": opt if sid % 2 else {"CE": "CALL", "PE": "PUT"}[opt],
+                                 "drvExpiryDate": exp})
+    rows.append({"securityId": 9999, "tradingSymbol": "NIFTY-Mar2024-FUT", "exchangeSegment": "NSE_FNO",
+                 "instrument": "FUTIDX", "drvStrikePrice": -0.01, "drvOptionType": "XX",
+                 "drvExpiryDate": "2024-03-28 14:30:00"})
+    return rows
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "instruments.csv"
+    pd.DataFrame(master_rows()).to_csv(path, index=False)
+    return path
+
+def test_lookups(csv_path):
+    idx = InstrumentIndex.load(csv_path)
+    assert idx.expiries("NSE_FNO", "NIFTY") == ["2024-03-07", "2024-03-14"]
+    assert idx.expiries("NSE_FNO", "BANKNIFTY") == ["2024-03-06"]
+    assert idx.expiries("NSE_FNO") == ["2024-03-06", "2024-03-07", "2024-03-14"]
+
+    atm = idx.find_atm(22030.0, "2024-03-07", "CALL", "NSE_FNO", underlying="NIFTY")
+    assert (atm["drvStrikePrice"], atm["tradingSymbol"]) == (22000.0, "NIFTY-Mar2024-22000-CE")
+    assert idx.find_atm(22080.0, "2024-03-07", "PE", "NSE_FNO", underlying="NIFTY")["drvStrikePrice"] == 22100.0
+    # slightly ITM: one strike below ATM for a CALL, one above for a PUT
+    assert idx.find_atm(22030.0, "2024-03-07", "CALL", "NSE_FNO", itm_steps=1, underlying="NIFTY")["drvStrikePrice"] == 21900.0
+    assert idx.find_atm(22030.0, "2024-03-07", "PUT", "NSE_FNO", itm_steps=1, underlying="NIFTY")["drvStrikePrice"] == 22100.0
+    # clamped at the ends of the chain
+    assert idx.find_atm(25000.0, "2024-03-07", "PUT", "NSE_FNO", itm_steps=1, underlying="NIFTY")["drvStrikePrice"] == 22200.0
+
+    near = idx.neighbours(22030.0, "2024-03-14", "CALL", n=1, exchange_segment="NSE_FNO", underlying="NIFTY")
+    assert [r["drvStrikePrice"] for r in near] == [21900.0, 22000.0, 22100.0]
+    edge = idx.neighbours(21790.0, "2024-03-14", "CALL", n=2, exchange_segment="NSE_FNO", underlying="NIFTY")
+    assert [r["drvStrikePrice"] for r in edge] == [21800.0, 21900.0, 22000.0]
+
+    with pytest.raises(ValueError):
+        idx.find_atm(22000.0, "2024-03-21", "CALL", "NSE_FNO", underlying="NIFTY")
+
+    # the legacy scan only knows CALL/PUT spellings
+    df = load_instruments(csv_path)
+    df["drvOptionType"] = df["drvOptionType"].replace({"CE": "CALL", "PE": "PUT"})
+    for spot in (21810.0, 21949.0, 22030.0, 22151.0):
+        for opt in ("CALL", "PUT"):
+            chain = df[df["tradingSymbol"].str.startswith("NIFTY-") & (df["drvOptionType"] == opt)]
+            ref = find_atm_option(chain, spot, "2024-03-07 14:30:00", opt, "NSE_FNO", tick=100)
+            got = idx.find_atm(spot, "2024-03-07", opt, "NSE_FNO", tick=100, underlying="NIFTY")
+            assert got["securityId"] == ref["securityId"]
+
+def test_snapshot_is_rebuilt_when_the_csv_changes(csv_path, monkeypatch):
+    builds = []
+    build = InstrumentIndex.build.__func__
+    monkeypatch.setattr(InstrumentIndex, "build", classmethod(lambda cls, df: builds.append(len(df)) or build(cls, df)))
+
+    InstrumentIndex.load(csv_path)
+    assert InstrumentIndex.snapshot_path(csv_path).exists() and len(builds) == 1
+    InstrumentIndex.load(csv_path)
+    assert len(builds) == 1                                  # served from the snapshot
+
+    st = csv_path.stat()
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    InstrumentIndex.load(csv_path)
+    assert len(builds) == 2                                  # same size, new mtime
+
+    rows = master_rows()
+    rows.append({**rows[0], "securityId": 5000, "drvStrikePrice": 22300.0, "tradingSymbol": "NIFTY-Mar2024-22300-CE"})
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))   # same mtime, new size
+    idx = InstrumentIndex.load(csv_path)
+    assert len(builds) == 3
+    assert idx.find_atm(22400.0, "2024-03-07", "CALL", "NSE_FNO", underlying="NIFTY")["securityId"] == 5000
+
+def test_unwritable_snapshot_falls_back_to_memory(csv_path, monkeypatch):
+    def read_only(self, path, stamp):
+        raise PermissionError(13, "Read-only file system", str(path))
+
+    monkeypatch.setattr(InstrumentIndex, "save", read_only)
+    idx = InstrumentIndex.load(csv_path)
+    assert not InstrumentIndex.snapshot_path(csv_path).exists()
+    assert idx.find_atm(22030.0, "2024-03-07", "CALL", "NSE_FNO", underlying="NIFTY")["drvStrikePrice"] == 22000.0
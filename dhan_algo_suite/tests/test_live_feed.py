@@ -0,0 +1,73 @@
+import asyncio
+import numpy as np
+import pytest
+from dhan_algo_suite.src.feed import live_feed as lf
+
+websockets = pytest.importorskip("websockets")
+
+# Recorded quote and full frames (FrameRecorder file) replayed through the
+# local websocket stand-in (serve_replay) into LiveFeed; every decoded field
+# must come back as packed.
+
+T0 = 1_720_000_000
+QUOTES = [  # security_id, ltp, ltq, ltt, atp, volume, sell_qty, buy_qty, open, close, high, low
+    (13, 22011.5, 75, T0, 22005.25, 1_500_000, 1000, 1200, 21990.0, 21980.0, 22020.0, 21985.5),
+    (13, 22012.0, 50, T0 + 1, 22005.5, 1_500_050, 990, 1250, 21990.0, 21980.0, 22020.0, 21985.5),
+    (41, 112.35, 150, T0 + 1, 110.8, 2_000_000, 300_000, 250_000, 100.0, 98.5, 118.0, 97.25),
+]
+FULL = (41, 112.4, 75, T0 + 2, 110.9, 2_000_075, 300_100, 250_050, 1_000_000, 1_100_000, 900_000,
+        100.0, 98.5, 118.0, 97.25)
+
+def _quote(q) -> bytes:
+    return lf._QUOTE.pack(lf.QUOTE, lf._QUOTE.size, lf.SEGMENT_CODES["IDX_I" if q[0] == 13 else "NSE_FNO"], *q)
+
+def _full() -> bytes:
+    depth = np.zeros(lf.DEPTH_LEVELS, lf.DEPTH_DTYPE)
+    for k in range(lf.DEPTH_LEVELS):
+        depth[k] = (100 + k, 200 + k, 3 + k, 4 + k, 112.3 - 0.05 * k, 112.45 + 0.05 * k)
+    return lf._FULL.pack(lf.FULL, lf.FULL_SIZE, lf.SEGMENT_CODES["NSE_FNO"], *FULL) + depth.tobytes(), depth
+
+def _recorded(tmp_path) -> tuple[list[bytes], np.ndarray]:
+    full, depth = _full()
+    rec = lf.FrameRecorder(str(tmp_path / "feed.bin"))
+    rec.write(_quote(QUOTES[0]))
+    rec.write(_quote(QUOTES[1]) + _quote(QUOTES[2]))      # two packets in one frame
+    rec.write(full)
+    rec.close()
+    return lf.read_frames(str(tmp_path / "feed.bin")), depth
+
+async def _replay(frames: list[bytes], expect: int) -> tuple[list, dict]:
+    server = await lf.serve_replay(frames, port=0)
+    port = server.sockets[0].getsockname()[1]
+    feed = lf.LiveFeed(url=f"ws://127.0.0.1:{port}", queue_size=1000, backoff_max=0.2)
+    await feed.set_group("underlying", [("IDX_I", 13)])
+    task = asyncio.create_task(feed.run())
+    try:
+        pkts = [await asyncio.wait_for(feed.queue.get(), 5.0) for _ in range(expect)]
+    finally:
+        feed.stop()
+        task.cancel()
+        server.close()
+        await server.wait_closed()
+    return pkts, feed.stats
+
+def test_replayed_frames_decode_to_recorded_fields(tmp_path):
+    frames, depth = _recorded(tmp_path)
+    assert len(frames) == 3
+    pkts, stats = asyncio.run(_replay(frames, 4))
+    assert stats["frames"] == 3 and stats["packets"] == 4 and stats["decode_errors"] == 0
+    quotes, full = pkts[:3], pkts[3]
+    for got, want in zip(quotes, QUOTES):
+        assert isinstance(got, lf.Quote)
+        assert got.code == lf.QUOTE and got.length == lf._QUOTE.size
+        assert lf.SEGMENTS[got.segment] == ("IDX_I" if want[0] == 13 else "NSE_FNO")
+        assert got[3:] == pytest.approx(want)     # float32 prices
+    assert isinstance(full, lf.Full) and full.code == lf.FULL and lf.SEGMENTS[full.segment] == "NSE_FNO"
+    assert full[3:18] == pytest.approx(FULL)
+    for name in lf.DEPTH_DTYPE.names:
+        np.testing.assert_allclose(full.depth[name], depth[name])
+
+def test_truncated_packets_are_not_decoded(tmp_path):
+    frames, _ = _recorded(tmp_path)
+    assert list(lf.decode(frames[2][:-1])) == []
+    assert [p.security_id for p in lf.decode(frames[1][:-1])] == [13]   # first of two packets intact
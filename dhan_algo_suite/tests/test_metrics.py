@@ -0,0 +1,33 @@
+import asyncio, re
+from dhan_algo_suite.src import metrics
+
+def _families(text: str) -> dict[str, str]:
+    types = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert name not in types, f"{name} exported twice"
+            types[name] = kind
+    return types
+
+def test_loop_lag_exports_without_name_collisions():
+    async def main():
+        mon = metrics.LoopLagMonitor(interval=0.005)
+        mon.start()
+        await asyncio.sleep(0.05)
+        text = metrics.prometheus_text()
+        await mon.stop()
+        return text
+
+    text = asyncio.run(main())
+    types = _families(text)
+    assert types["dhan_algo_loop_lag_seconds"] == "histogram"
+    assert types["dhan_algo_loop_lag_last_seconds"] == "gauge"
+    assert types["dhan_algo_loop_lag_max_seconds"] == "gauge"
+    # no sample line may belong to two families (a gauge named like a histogram series)
+    hist = [n for n, k in types.items() if k == "histogram"]
+    for n, k in types.items():
+        if k == "gauge":
+            assert not any(re.fullmatch(rf"{h}(_bucket|_sum|_count)?", n) for h in hist), n
+    assert "loop.lag.last.seconds" not in metrics.gauges()
+    assert re.search(r"^dhan_algo_loop_lag_seconds_count [1-9]", text, re.M)
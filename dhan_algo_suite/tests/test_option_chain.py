@@ -0,0 +1,114 @@
+import asyncio, json, types
+from datetime import date
+import httpx
+import pytest
+from dhan_algo_suite.src import transport
+from dhan_algo_suite.src.dhan_client import DhanClient
+from dhan_algo_suite.src.feed import option_chain
+from dhan_algo_suite.src.feed.option_chain import OptionChainCache, parse_chain
+
+# ChainSnapshot strike selection on a parsed /optionchain response, and the
+# background refresh against a stand-in for the option chain endpoints. The
+# refresh loop and the transport's rate limiter run on a virtual clock, so the
+# 1-request-per-3s limit (shared by /optionchain and /optionchain/expirylist)
+# is checked in request timestamps without waiting for it.
+
+EXPIRIES = ["2024-03-07", "2024-03-14", "2024-03-21"]
+
+def chain_response(spot: float, expiry: str) -> dict:
+    oc = {}
+    for k, strike in enumerate((21900, 21950, 22000, 22050, 22100)):
+        legs = {"ce": {"last_price": 150.0 - 20 * k, "oi": 1000 + k, "security_id": 40000 + k}}
+        if strike != 22100:                              # no PE listed for the top strike
+            legs["pe"] = {"last_price": 60.0 + 20 * k, "oi": 2000 + k, "security_id": 50000 + k}
+        oc[f"{strike}.000000"] = legs
+    return {"data": {"last_price": spot, "oc": dict(reversed(list(oc.items())))}, "expiry": expiry}
+
+def test_snapshot_strike_selection():
+    snap = parse_chain(chain_response(22010.0, "2024-03-07"), "2024-03-07")
+    assert snap.strikes.tolist() == [21900.0, 21950.0, 22000.0, 22050.0, 22100.0]
+    assert snap.atm("CALL") == {"expiry": "2024-03-07", "strike": 22000.0, "option_type": "CALL", "ltp": 110.0,
+                                "oi": 1002.0, "security_id": 40002}
+    assert snap.atm("PE", spot=22025.0)["strike"] == 22000.0          # midway: the lower strike
+    assert snap.atm("CE", spot=22026.0)["strike"] == 22050.0
+    assert snap.atm("CALL", itm_steps=1)["strike"] == 21950.0
+    assert snap.atm("PUT", itm_steps=1)["strike"] == 22050.0
+    assert snap.atm("CALL", itm_steps=3)["strike"] == 21900.0          # clamped
+    top = snap.atm("PUT", spot=23000.0)
+    assert (top["strike"], top["security_id"], top["ltp"]) == (22100.0, -1, 0.0)
+    assert [l["strike"] for l in snap.neighbours("CALL", n=1)] == [21950.0, 22000.0, 22050.0]
+    assert [l["strike"] for l in snap.neighbours("PUT", n=2, spot=21800.0)] == [21900.0, 21950.0, 22000.0]
+
+class Clock:
+    # virtual monotonic time; sleeping advances it instead of waiting
+    def __init__(self):
+        self.t = 1000.0
+        self.sleep_ = asyncio.sleep
+
+    def monotonic(self) -> float:
+        return self.t
+
+    perf_counter = monotonic
+
+    async def sleep(self, d: float):
+        self.t += max(d, 0.0)
+        await self.sleep_(0)
+
+class ChainAPI:
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.calls: list[tuple[float, str, str | None]] = []
+
+    def __call__(self, req: httpx.Request) -> httpx.Response:
+        body = json.loads(req.content)
+        if req.url.path.endswith("/expirylist"):
+            self.calls.append((self.clock.t, "expirylist", None))
+            return httpx.Response(200, json={"data": EXPIRIES})
+        self.calls.append((self.clock.t, "chain", body["Expiry"]))
+        return httpx.Response(200, json=chain_response(22000.0, body["Expiry"]))
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(transport, "time", types.SimpleNamespace(monotonic=c.monotonic, perf_counter=c.perf_counter))
+    monkeypatch.setattr(transport, "asyncio", types.SimpleNamespace(**{**vars(asyncio), "sleep": c.sleep}))
+    monkeypatch.setattr(option_chain, "asyncio", types.SimpleNamespace(**{**vars(asyncio), "sleep": c.sleep}))
+    return c
+
+def run_cache(clock: Clock, days: dict[int, date], refreshes: int, **kw):
+    # days: refresh count from which today() returns that date
+    api = ChainAPI(clock)
+
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(api))
+        cache = OptionChainCache(client, 13, "IDX_I", **kw)
+        cache.today = lambda: days[max(k for k in days if k <= cache.refreshes)]
+        try:
+            await cache.start()
+            first = cache.nearest_expiry()
+            while cache.refreshes < refreshes:
+                await asyncio.sleep(0)
+            return cache, first
+        finally:
+            await cache.stop()
+            await client.close()
+
+    cache, first = asyncio.run(main())
+    return api, cache, first
+
+def test_background_refresh_respects_the_rate_limit(clock):
+    api, cache, _ = run_cache(clock, {0: date(2024, 3, 5)}, refreshes=6, refresh_sec=0.5, expiries_ahead=2)
+    assert cache.refresh_sec == 3.0
+    assert [c[1] for c in api.calls].count("expirylist") == 1         # once per day
+    assert [c[2] for c in api.calls if c[1] == "chain"] == ["2024-03-07", "2024-03-14"] * 3
+    gaps = [b[0] - a[0] for a, b in zip(api.calls, api.calls[1:])]
+    assert min(gaps) >= 3.0 - 1e-9
+    assert cache.atm("CALL")["expiry"] == "2024-03-07" and cache.errors == 0
+
+def test_expiry_list_rolls_over_after_the_daily_refresh(clock):
+    api, cache, first = run_cache(clock, {0: date(2024, 3, 7), 3: date(2024, 3, 8)}, refreshes=5)
+    assert first == "2024-03-07"
+    assert [c[1] for c in api.calls].count("expirylist") == 2
+    assert cache.expiries() == ["2024-03-14", "2024-03-21"]
+    assert cache.snapshot().expiry == "2024-03-14" and "2024-03-07" not in cache._chains
+    assert cache.atm("PUT")["expiry"] == "2024-03-14"
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date
+import numpy as np
+import pandas as pd
+from dhan_algo_suite.src.backtester.options import (LegResolver, needed_days, plan_legs, prefetch,
+                                                     simulate_options)
+from dhan_algo_suite.src.instruments import InstrumentIndex
+from dhan_algo_suite.src.storage.bar_store import BarKey, BarStore
+from dhan_algo_suite.src.strategy.nifty_atm_option import Params
+
+# Premium-mode backtest offline: legs resolved from a small instrument master,
+# contract bars served from a BarStore, trades checked against prices worked out
+# by hand. A master that lists only later contracts must not price old signals.
+
+TZ = "Asia/Kolkata"
+SEG = "NSE_FNO"
+DAY1, DAY2 = date(2024, 3, 5), date(2024, 3, 6)    # NIFTY weekly expiry that week: Thu 2024-03-07
+
+def master(expiries: list[str]) -> InstrumentIndex:
+    rows = []
+    for k, exp in enumerate(expiries):
+        for strike in (21900.0, 22000.0, 22100.0):
+            for j, opt in enumerate(("CALL", "PUT")):
+                sid = 1000 * (j + 1) + 100 * k + int(strike - 21900) // 100
+                rows.append({"securityId": sid, "tradingSymbol": f"NIFTY-{exp}-{strike:g}-{opt[0]}E",
+                             "exchangeSegment": "IDX_I", "drvExpiryDate": exp, "drvStrikePrice": strike,
+                             "drvOptionType": opt})
+    return InstrumentIndex.build(pd.DataFrame(rows))
+
+def resolver(expiries: list[str]) -> LegResolver:
+    return LegResolver(master(expiries), exchange_segment="IDX_I", underlying="NIFTY")
+
+def session(day: date) -> pd.DatetimeIndex:
+    return pd.date_range(pd.Timestamp(f"{day} 09:15", tz=TZ), pd.Timestamp(f"{day} 15:30", tz=TZ), freq="5min")
+
+def spot() -> pd.DataFrame:
+    idx = session(DAY1).append(session(DAY2))
+    df = pd.DataFrame({"open": 22000.0, "close": 22000.0}, index=idx)
+    df.loc[pd.Timestamp(f"{DAY1} 10:00", tz=TZ), ["open", "close"]] = [21990.0, 22010.0]   # CALL
+    df.loc[pd.Timestamp(f"{DAY2} 11:00", tz=TZ), ["open", "close"]] = [22030.0, 22005.0]   # PUT
+    return df
+
+def write_leg(store: BarStore, sid: int, day: date, prices: dict[str, float], first: float, drop: str | None = None):
+    idx = session(day)
+    px = pd.Series(first, index=idx)
+    for hhmm, v in prices.items():
+        px[pd.Timestamp(f"{day} {hhmm}", tz=TZ):] = v
+    if drop is not None:
+        px = px.drop(pd.Timestamp(f"{day} {drop}", tz=TZ))
+    v = px.to_numpy(np.float64)
+    store.write_day(BarKey(sid, SEG, 5), day, {"ts": px.index.asi8 // 10**9, "open": v, "high": v, "low": v,
+                                              "close": v, "volume": np.zeros(len(v))})
+
+def test_stale_master_yields_no_leg():
+    r = resolver(["2026-01-06", "2026-01-13"])
+    assert r.expiry_for(DAY1) is None
+    assert r.resolve(DAY1, 22010.0, "CALL") is None
+    assert plan_legs(spot(), Params(), r) == {}
+    assert r.unresolved == 3
+
+def test_expiry_gap_is_capped_by_the_calendar():
+    assert resolver(["2024-03-07", "2024-03-14"]).expiry_for(DAY1) == "2024-03-07"
+    assert resolver(["2024-03-14"]).expiry_for(DAY1) == "2024-03-14"      # next week's, 7 days out
+    assert resolver(["2024-03-21"]).expiry_for(DAY1) is None
+    assert resolver(["2024-03-21"]).expiry_for(date(2024, 3, 15)) == "2024-03-21"
+    r = LegResolver(master(["2024-03-28"]), exchange_segment="IDX_I", underlying="NIFTY", max_gap_days=None)
+    assert r.expiry_for(DAY1) == "2024-03-28"
+
+def test_premium_trades_match_hand_computed_leg_prices(tmp_path):
+    df, p = spot(), Params()
+    plan = plan_legs(df, p, resolver(["2024-03-07", "2024-03-14"]))
+    call, put = plan.values()
+    assert (call.security_id, call.strike, call.option_type, call.expiry) == (1001, 22000.0, "CALL", "2024-03-07")
+    assert (put.security_id, put.strike, put.option_type) == (2001, 22000.0, "PUT")
+    assert needed_days(df, plan) == {call: (DAY1, DAY1), put: (DAY2, DAY2)}
+
+    store = BarStore(tmp_path, tz=TZ)
+    # CALL: entry 100, +6 (stop 90), +15 (stop 100), 99 -> TSL exit at 10:15
+    write_leg(store, call.security_id, DAY1, {"10:05": 106.0, "10:10": 115.0, "10:15": 99.0}, first=100.0)
+    # PUT: entry 80, no print at 11:05 (held at 80), 70, 59 -> SL (stop 60) at 11:15
+    write_leg(store, put.security_id, DAY2, {"11:10": 70.0, "11:15": 59.0}, first=80.0, drop="11:05")
+    series = asyncio.run(prefetch(None, store, needed_days(df, plan), 5, exchange_segment=SEG))
+    trades = simulate_options(df, p, plan, series)
+
+    got = [(t.ts_entry.strftime("%m-%d %H:%M"), t.ts_exit.strftime("%m-%d %H:%M"), t.security_id, t.side,
+            t.entry_price, t.exit_price, t.pnl, t.sl_hits_today, t.symbol) for t in trades]
+    assert got == [
+        ("03-05 10:00", "03-05 10:15", "1001", "BUY_CALL", 100.0, 99.0, -75.0, 0, call.symbol),
+        ("03-06 11:00", "03-06 11:15", "2001", "BUY_PUT", 80.0, 59.0, -21.0 * 75, 0, put.symbol),
+    ]
+
+def test_signal_without_contract_bars_is_skipped(tmp_path):
+    df, p = spot(), Params()
+    plan = plan_legs(df, p, resolver(["2024-03-07"]))
+    store = BarStore(tmp_path, tz=TZ)
+    write_leg(store, 1001, DAY1, {"10:05": 106.0, "10:10": 115.0, "10:15": 99.0}, first=100.0)
+    series = asyncio.run(prefetch(None, store, needed_days(df, plan), 5, exchange_segment=SEG))
+    assert [t.security_id for t in simulate_options(df, p, plan, series)] == ["1001"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.backtester.core import parse_tod, session_tod, simulate, simulate_frame
+from dhan_algo_suite.src.backtester.parallel import shard_bounds, simulate_frame_sharded
+from test_backtest_core import PARAMS, sessions
+
+# The day-sharded backtest must return the serial run's trades. The bars end
+# each day with a big candle followed by a slow climb, so positions are still
+# open when the next session's start bar (a shard cut) discards them; missing
+# 09:15 bars make other days carry state across midnight where no cut is allowed.
+
+WORKERS = 2
+
+def late_entries(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    tod = (df.index - df.index.normalize()).asi8
+    late = tod >= parse_tod("14:30")
+    for day in np.unique(df.index.normalize()[late]):
+        sel = late & (df.index.normalize() == day)
+        base = df["close"][sel].iloc[0]
+        climb = base + 20 + np.arange(sel.sum()) * 0.5
+        df.loc[sel, "close"] = climb
+        df.loc[sel, "open"] = np.concatenate(([base], climb[:-1]))
+    return df
+
+def held_at_cut(df: pd.DataFrame, p) -> set[int]:
+    # start-bar positions at which the serial run still holds a position
+    tod = session_tod(df.index)
+    o, c = df["open"].to_numpy(np.float64), df["close"].to_numpy(np.float64)
+    entered = []
+    res = simulate(tod, o, c, p, lambda s, bars, d: entered.append(s) or (-1, c[s], c[bars]))
+    cuts = np.flatnonzero(tod == parse_tod(p.start_time))
+    held = set(entered) - set(res.entry_idx.tolist())
+    return {int(cuts[k]) for k in np.searchsorted(cuts, sorted(held), side="right") if k < len(cuts)}
+
+@pytest.mark.parametrize("drop_start", [0.0, 0.3])
+@pytest.mark.parametrize("name", PARAMS)
+def test_sharded_matches_serial(name, drop_start):
+    p = PARAMS[name]
+    df = late_entries(sessions(40, 7, drop_start=drop_start))
+    edges = {a for a, _ in shard_bounds(session_tod(df.index), p, WORKERS * 4)} - {0}
+    assert len(edges) >= 2
+    assert edges & held_at_cut(df, p), "no position open at a shard boundary"
+    ref = simulate_frame(df, p)
+    got = simulate_frame_sharded(df, p, workers=WORKERS)
+    assert ref
+    assert [t.__dict__ for t in got] == [t.__dict__ for t in ref]
+
+def test_daily_sl_cap_holds_across_shards():
+    p = PARAMS["one_sl_a_day"]
+    df = late_entries(sessions(40, 3))
+    ref = simulate_frame(df, p)
+    got = simulate_frame_sharded(df, p, workers=WORKERS)
+    assert [t.__dict__ for t in got] == [t.__dict__ for t in ref]
+    sl_days = {t.ts_entry.date() for t in got if t.exit_price - t.entry_price <= -p.sl_per_unit + 1e-6}
+    assert sl_days, "cap never reached"
+    for day in sl_days:
+        trades = [t for t in got if t.ts_entry.date() == day]
+        hit = next(k for k, t in enumerate(trades) if t.exit_price - t.entry_price <= -p.sl_per_unit + 1e-6)
+        assert hit == len(trades) - 1       # nothing after the day's SL
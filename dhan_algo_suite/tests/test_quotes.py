@@ -0,0 +1,44 @@
+import asyncio, gc
+import pytest
+from dhan_algo_suite.src.feed.quotes import QuoteBatcher
+
+# QuoteBatcher keeps its in-flight sends referenced (a bare create_task can be
+# garbage-collected mid-flight) and hands unexpected send errors to the callers.
+
+class Quotes:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls: list[list[int]] = []
+
+    async def market_quotes(self, security_ids: list[int], exchange_segment: str) -> dict:
+        self.calls.append(list(security_ids))
+        await asyncio.sleep(self.delay)
+        gc.collect()            # an unreferenced send task would be collected here
+        return {"status": "success",
+                "data": {exchange_segment: {str(s): {"last_price": float(s)} for s in security_ids}}}
+
+def test_concurrent_gets_share_one_referenced_send():
+    async def main():
+        qb = QuoteBatcher(Quotes(), window=0.01)
+        gets = asyncio.gather(*(qb.get(s, "NSE_FNO") for s in (41, 42, 43, 41)))
+        await asyncio.sleep(0.02)
+        assert len(qb._tasks) == 1            # held while in flight
+        out = await gets
+        return qb, out
+
+    qb, out = asyncio.run(main())
+    assert [q["last_price"] for q in out] == [41.0, 42.0, 43.0, 41.0]
+    assert qb.client.calls == [[41, 42, 43]] and qb._tasks == set()
+
+def test_unexpected_send_error_reaches_callers():
+    class BrokenJournal:
+        def on_quotes(self, resp):
+            raise RuntimeError("disk full")
+
+    async def main():
+        qb = QuoteBatcher(Quotes(delay=0.0), window=0.0, journal=BrokenJournal())
+        with pytest.raises(RuntimeError, match="disk full"):
+            await asyncio.wait_for(qb.get(41, "NSE_FNO"), 1.0)
+        return qb
+
+    assert asyncio.run(main())._tasks == set()
@@ -0,0 +1,58 @@
+import os
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.reporting.report import summarize, summarize_csv
+from dhan_algo_suite.src.storage.trade_store import TradeStore
+
+# summarize() reads the trade store; callers of the old summarize(trades_csv)
+# still get the report of that CSV rather than an empty store summary.
+
+def _trades_csv(path) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    entry = pd.Timestamp("2024-01-02 09:20", tz="Asia/Kolkata") + pd.to_timedelta(
+        np.sort(rng.integers(0, 300, 80)), unit="D") + pd.to_timedelta(rng.integers(0, 360, 80), unit="min")
+    df = pd.DataFrame({"ts_entry": entry, "ts_exit": entry + pd.Timedelta(minutes=20), "symbol": "NIFTY_OPTION_ATM",
+                       "security_id": "ATM_DERIVED", "side": "BUY_CALL", "qty": 75, "entry_price": 100.0,
+                       "exit_price": 100.0, "pnl": rng.normal(0, 500, 80).round(2), "sl_hits_today": 0,
+                       "notes": "SL/TSL exit"})
+    df.to_csv(path, index=False)
+    return df
+
+def _reference(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    # the CSV-only implementation summarize() replaced
+    df = df.assign(month=df["ts_entry"].dt.strftime("%Y-%m"))
+    by_month = df.groupby("month").agg(trades=("pnl", "count"), pnl=("pnl", "sum")).reset_index()
+    now = df["ts_entry"].max()
+    return by_month, {k: df[df["ts_entry"] >= now - timedelta(days=d)]["pnl"].sum()
+                      for k, d in {"1m": 30, "2m": 60, "3m": 90, "6m": 180, "12m": 360}.items()}
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # summarize writes report_*.csv to the cwd
+    return tmp_path
+
+@pytest.mark.parametrize("call", [summarize_csv, summarize, lambda p: summarize(os.fspath(p))])
+def test_csv_path_is_summarized(workdir, call):
+    df = _trades_csv(workdir / "backtest_trades.csv")
+    by_month, summary = call(workdir / "backtest_trades.csv")
+    ref_month, ref_summary = _reference(df)
+    assert by_month["month"].tolist() == ref_month["month"].tolist()
+    assert by_month["trades"].tolist() == ref_month["trades"].tolist()
+    np.testing.assert_allclose(by_month["pnl"], ref_month["pnl"])
+    assert summary == pytest.approx(ref_summary)
+    assert (workdir / "report_monthly.csv").exists()
+
+def test_missing_csv_raises(workdir):
+    with pytest.raises(FileNotFoundError):
+        summarize("backtest_trades.csv")
+
+def test_store_summary_unchanged(workdir):
+    df = _trades_csv(workdir / "t.csv")
+    store = TradeStore(f"sqlite:///{workdir / 'app.db'}")
+    store.import_csv(str(workdir / "t.csv"), "s1", "paper")
+    by_month, summary = summarize("s1", "paper", store)
+    store.close()
+    assert by_month["trades"].sum() == len(df)
+    assert summary == pytest.approx(_reference(df)[1])
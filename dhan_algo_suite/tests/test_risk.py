@@ -0,0 +1,60 @@
+from itertools import permutations
+import numpy as np
+import pytest
+from dhan_algo_suite.src.reporting.risk import _streaks, batch_size, max_drawdown, monte_carlo
+
+# Drawdown and streaks on sequences worked by hand, and the Monte Carlo
+# invariants: a shuffle keeps the final PnL of every path, each path's drawdown
+# is max_drawdown of that ordering, and splitting the simulations into
+# max_mb-sized batches does not change the draws for a given seed.
+
+@pytest.mark.parametrize("pnl, expected", [
+    ([], (0.0, 0)),
+    ([10, 20], (0.0, 0)),
+    # equity 100 50 -30 30 150 -50 -20: peak 150 after trade 5, trough -50 one trade later
+    ([100, -50, -80, 60, 120, -200, 30], (200.0, 1)),
+    # below the starting equity from the first trade: the peak is the start (0)
+    ([-30, -20, 40], (50.0, 2)),
+    # equity 50 0 50 -30: measured from the last time the peak was reached
+    ([50, -50, 50, -80], (80.0, 1)),
+])
+def test_max_drawdown(pnl, expected):
+    assert max_drawdown(np.array(pnl, dtype=np.float64)) == expected
+
+@pytest.mark.parametrize("mask, expected", [
+    ([], 0),
+    ([False, False], 0),
+    ([True], 1),
+    ([True, True, False, True, True, True, False], 3),
+    ([False, True, True], 2),
+    ([True, False, True, False, True], 1),
+])
+def test_streaks(mask, expected):
+    assert _streaks(np.array(mask, dtype=bool)) == expected
+
+def test_shuffle_keeps_the_final_pnl():
+    pnl = np.random.default_rng(4).normal(20, 300, 60)
+    mc = monte_carlo(pnl, 5000, "shuffle", seed=1)
+    np.testing.assert_allclose(mc.final, pnl.sum())
+    losses = pnl[pnl < 0]
+    # any ordering falls at least by its largest loss and at most by all losses together
+    assert mc.max_drawdown.min() >= -losses.min() - 1e-9
+    assert mc.max_drawdown.max() <= -losses.sum() + 1e-9
+    assert mc.max_drawdown.std() > 0
+
+def test_shuffle_paths_are_orderings_of_the_sequence():
+    pnl = np.array([100.0, -50.0, -80.0, 30.0])
+    mc = monte_carlo(pnl, 2000, "shuffle", seed=2)
+    every = {max_drawdown(np.array(p))[0] for p in permutations(pnl)}
+    assert set(mc.max_drawdown.tolist()) == every
+
+@pytest.mark.parametrize("method", ["bootstrap", "shuffle"])
+def test_batches_do_not_change_the_draws(method):
+    pnl = np.random.default_rng(5).normal(0, 100, 37)
+    ref = monte_carlo(pnl, 3001, method, seed=7)
+    for max_mb in (0.01, 0.002, 0.0001):
+        assert batch_size(len(pnl), max_mb) < 3001
+        got = monte_carlo(pnl, 3001, method, seed=7, max_mb=max_mb)
+        np.testing.assert_array_equal(got.final, ref.final)
+        np.testing.assert_array_equal(got.max_drawdown, ref.max_drawdown)
+    assert batch_size(len(pnl), 0.0001) == 1
@@ -0,0 +1,139 @@
+import asyncio
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.runtime import state
+from dhan_algo_suite.src.runtime.events import Bar, Heartbeat, Tick
+from dhan_algo_suite.src.runtime.runner import StrategyRunner, StrategySpec, build_runtimes
+from dhan_algo_suite.src.runtime.sources import frame_arrays
+from dhan_algo_suite.src.strategy.nifty_atm_option import Params
+from test_backtest_core import PARAMS, sessions
+
+# StrategyRunner hosting two strategies on NIFTY (different Params and
+# timeframes) and one on BANKNIFTY must trade exactly as the three would in
+# separate processes, from one source polling the union of their instruments.
+# Each strategy's option leg is its own instrument (LEG + underlying id, priced
+# like the underlying) that is only quoted while somebody holds it.
+
+LEG = 100_000
+SPECS = [
+    StrategySpec("nifty_5m", 13, params=PARAMS["default"]),
+    StrategySpec("nifty_15m", 13, params=Params(big_candle_points=8, max_daily_sls=1, timeframe_min=15)),
+    StrategySpec("banknifty_5m", 25, params=PARAMS["wide_stop"]),
+]
+SERIES = {13: sessions(20, 0), 25: sessions(20, 1)}
+
+class PollReplay:
+    # QuotePollSource stand-in over recorded 5m bars: each poll quotes every
+    # subscribed instrument once and yields their bars, held legs first
+    def __init__(self, series: dict[int, pd.DataFrame], instruments):
+        self.bars = {}
+        for sid, df in series.items():
+            a = frame_arrays(df)
+            for s in (sid, sid + LEG):
+                self.bars[s] = {t: (o, h, l, c) for t, o, h, l, c in zip(
+                    a["ts"].tolist(), a["open"].tolist(), a["high"].tolist(), a["low"].tolist(), a["close"].tolist())}
+        self.base = set(instruments)
+        self.subscribed = set(self.base)
+        self.stamps = sorted({t for _, sid in self.base for t in self.bars[sid]})
+        self.quote_calls = 0
+        self.subscriptions: list[tuple] = []
+
+    async def watch(self, exchange_segment, security_id):
+        key = (exchange_segment, int(security_id))
+        assert key not in self.subscribed, f"{key} subscribed twice"
+        self.subscribed.add(key)
+        self.subscriptions.append(("watch", key))
+
+    def unwatch(self, exchange_segment, security_id):
+        key = (exchange_segment, int(security_id))
+        assert key in self.subscribed and key not in self.base, f"{key} is not a held leg"
+        self.subscribed.discard(key)
+        self.subscriptions.append(("unwatch", key))
+
+    async def __aiter__(self):
+        for ts in self.stamps:
+            self.quote_calls += len(self.subscribed)
+            for seg, sid in sorted(self.subscribed, key=lambda k: (k in self.base, k)):
+                o, h, l, c = self.bars[sid][ts]
+                yield Bar(float(ts), sid, o, h, l, c, 0.0, 5)
+            yield Heartbeat(float(ts))
+
+def leg_of(spec: StrategySpec):
+    leg = {"security_id": spec.security_id + LEG, "exchange_segment": spec.option_segment}
+    return lambda direction, spot, ts: {**leg, "symbol": f"{spec.security_id + LEG} {direction}", "ltp": spot}
+
+def runtimes(specs):
+    return build_runtimes(specs, "replay", select_leg=leg_of)
+
+def run(runner: StrategyRunner) -> tuple[dict, PollReplay]:
+    src = PollReplay({sid: SERIES[sid] for _, sid in runner.instruments()}, runner.instruments())
+    return asyncio.run(runner.run(src)), src
+
+def alone(spec: StrategySpec):
+    rt = runtimes([spec])[0]
+    src = PollReplay({spec.security_id: SERIES[spec.security_id]}, [rt.underlying])
+    return rt, asyncio.run(rt.run(src)), src
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    yield
+    state.clear()
+
+def test_runner_matches_separate_runtimes():
+    runner = StrategyRunner(runtimes(SPECS))
+    assert runner.instruments() == [("IDX_I", 13), ("IDX_I", 25)]
+    assert {sid: agg.timeframes for sid, agg in runner.aggregators.items()} == {13: [5, 15], 25: [5]}
+    got, src = run(runner)
+
+    separate = {spec.name: alone(spec) for spec in SPECS}
+    for rt in runner.runtimes:
+        ref_rt, ref, ref_src = separate[rt.name]
+        assert ref and any(t.notes == "SL/TSL exit" for t in ref), rt.name
+        assert [t.__dict__ for t in got[rt.name]] == [t.__dict__ for t in ref]
+        assert rt.events == ref_rt.events                 # only its underlying, its legs and heartbeats
+        assert set(src.subscriptions) >= set(ref_src.subscriptions)
+    # per-strategy counters, as each would report on its own
+    assert runner.risk() == {name: StrategyRunner([rt]).risk()[name] for name, (rt, _, _) in separate.items()}
+    assert [r["max_sl_hits"] for r in runner.risk().values()] == [3, 1, 3]
+    assert src.subscribed == src.base
+    assert src.quote_calls < sum(s.quote_calls for _, _, s in separate.values())
+
+def test_another_strategy_on_a_traded_underlying_adds_no_api_calls():
+    twin = StrategySpec("nifty_5m_twin", 13, params=PARAMS["default"])
+    base, src = run(StrategyRunner(runtimes([SPECS[0], SPECS[2]])))
+    runner = StrategyRunner(runtimes([SPECS[0], twin, SPECS[2]]))
+    got, more = run(runner)
+    assert len(runner.aggregators) == 2 and runner.aggregators[13].timeframes == [5]
+    assert [t.__dict__ for t in got["nifty_5m_twin"]] == [t.__dict__ for t in base["nifty_5m"]]
+    assert got["nifty_5m"] == base["nifty_5m"] and got["banknifty_5m"] == base["banknifty_5m"]
+    assert more.quote_calls == src.quote_calls
+    assert more.subscriptions == src.subscriptions
+
+def test_leg_watch_is_refcounted_across_strategies():
+    runner = StrategyRunner(runtimes(SPECS))
+    nifty, _, bank = runner.runtimes
+    src = PollReplay(SERIES, runner.instruments())
+    runner.source = src
+    key = ("NSE_FNO", 7)
+    ts = float(frame_arrays(SERIES[13])["ts"][10])
+
+    async def main():
+        await runner.watch(bank, *key)
+        await runner.watch(nifty, *key)
+        assert src.subscriptions == [("watch", key)]
+        assert runner.routes[7] == (bank, nifty)
+        before = [rt.events for rt in runner.runtimes]
+        await runner.on_event(Tick(ts, 7, 101.0))
+        assert [rt.events - n for rt, n in zip(runner.runtimes, before)] == [1, 0, 1]
+
+        runner.unwatch(bank, *key)
+        assert src.subscriptions == [("watch", key)] and runner.routes[7] == (nifty,)
+        runner.unwatch(nifty, *key)
+        assert src.subscriptions == [("watch", key), ("unwatch", key)]
+        assert 7 not in runner.routes and runner._legs == {}
+        before = [rt.events for rt in runner.runtimes]
+        await runner.on_event(Tick(ts, 7, 102.0))
+        assert [rt.events for rt in runner.runtimes] == before
+        assert runner.routes[13] == (nifty, runner.runtimes[1]) and runner.routes[25] == (bank,)
+
+    asyncio.run(main())
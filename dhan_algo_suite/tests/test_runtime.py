@@ -0,0 +1,112 @@
+import asyncio
+import pandas as pd
+import pytest
+from dhan_algo_suite.src.backtester.core import parse_tod, simulate_frame
+from dhan_algo_suite.src.runtime.engine import StrategyRuntime, spot_leg
+from dhan_algo_suite.src.runtime.events import Heartbeat
+from dhan_algo_suite.src.runtime.sim import SimExecutor
+from dhan_algo_suite.src.runtime.sources import BarReplaySource, LiveFeedSource, QuotePollSource, frame_arrays
+from dhan_algo_suite.src.strategy.nifty_atm_option import NiftyATMOptionStrategy
+from test_backtest_core import PARAMS, TZ, sessions
+
+# StrategyRuntime + SimExecutor replaying bars must take core.simulate's trades.
+# The one intended difference: core drops a position still open at the next
+# session start, the runtime flattens it at the first bar past end_time (at the
+# last in-window price), as the live trader does at the cutoff.
+
+SID = 13
+
+def replay(df: pd.DataFrame, p) -> list:
+    strat = NiftyATMOptionStrategy(p)
+    rt = StrategyRuntime(strat, SimExecutor(strat, tick=None), spot_leg(SID, "IDX_I"), ("IDX_I", SID), tz=TZ)
+    return asyncio.run(rt.run(BarReplaySource({SID: frame_arrays(df)}, p.timeframe_min, SID)))
+
+def key(t) -> tuple:
+    return (t.ts_entry, t.ts_exit, t.side, t.qty, t.entry_price, t.exit_price, t.pnl, t.sl_hits_today)
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("name", PARAMS)
+def test_replay_matches_core(name, seed):
+    p = PARAMS[name]
+    df = sessions(30, seed)
+    ref = simulate_frame(df, p)
+    got = replay(df, p)
+    assert ref, "scenario produced no trades"
+    assert [key(t) for t in got if t.notes == "SL/TSL exit"] == [key(t) for t in ref]
+
+def test_open_position_is_flattened_past_end_time():
+    flattened = 0
+    for name, p in PARAMS.items():
+        end = parse_tod(p.end_time)
+        for seed in range(3):
+            df = sessions(30, seed)
+            ref_entries = {t.ts_entry for t in simulate_frame(df, p)}
+            for t in replay(df, p):
+                if t.notes == "SL/TSL exit":
+                    continue
+                flattened += 1
+                assert t.notes == "EOD flatten"
+                assert t.ts_entry not in ref_entries            # core drops this position
+                day = df[df.index.normalize() == t.ts_entry.normalize()]
+                tod = (day.index - day.index.normalize()).asi8
+                assert t.ts_exit == day.index[tod > end][0]     # first bar past end_time
+                assert t.exit_price == day["close"][tod <= end].iloc[-1]
+                assert t.pnl == pytest.approx((t.exit_price - t.entry_price) * p.lot_qty)
+    assert flattened > 0
+
+class FlakyQuotes:
+    # QuoteBatcher stand-in whose second poll fails after the transport gave up
+    def __init__(self):
+        self.calls = 0
+
+    async def quote(self, security_id, exchange_segment):
+        self.calls += 1
+        if self.calls == 2:
+            raise RuntimeError("quotes unavailable")
+        return {"status": "success", "data": {exchange_segment: {str(security_id): {
+            "last_price": 100.0 + self.calls, "volume": 10 * self.calls}}}}
+
+def test_quote_poll_failure_skips_the_interval():
+    src = QuotePollSource(FlakyQuotes(), [("IDX_I", SID)], interval=0.0)
+    src.calendar.is_open = lambda ts: True
+
+    async def main():
+        out = []
+        async for ev in src:
+            out.append(ev)
+            if sum(type(e) is Heartbeat for e in out) == 3:
+                src.stop()
+        return out
+
+    events = asyncio.run(main())
+    assert src.errors == 1
+    assert [e.ltp for e in events if type(e) is not Heartbeat] == [101.0, 103.0]
+
+class GroupFeed:
+    # LiveFeed stand-in recording subscription group changes; drop_group fails
+    def __init__(self):
+        self.groups: list[tuple] = []
+
+    async def set_group(self, name, instruments):
+        await asyncio.sleep(0)
+        self.groups.append((name, list(instruments)))
+
+    async def drop_group(self, name):
+        await asyncio.sleep(0)
+        raise ConnectionError("feed down")
+
+def test_unwatch_keeps_its_update_task():
+    feed = GroupFeed()
+    src = LiveFeedSource(feed)
+
+    async def main():
+        await src.watch("NSE_FNO", 1)
+        await src.watch("NSE_FNO", 2)
+        src.unwatch("NSE_FNO", 1)
+        src.unwatch("NSE_FNO", 2)
+        assert len(src._tasks) == 2
+        while src._tasks:
+            await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert feed.groups[-1] == ("position", [("NSE_FNO", 2)])
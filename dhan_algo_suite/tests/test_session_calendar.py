@@ -0,0 +1,56 @@
+import os, subprocess, sys
+from datetime import date
+from loguru import logger
+from dhan_algo_suite.src.session_calendar import SessionCalendar, day_id, get_calendar
+from conftest import ROOT
+
+# The calendar needs no API credentials, takes its holiday CSV as a parameter,
+# and warns (once per year) when asked about years its holiday table does not cover.
+
+def _warnings(fn) -> list[str]:
+    out: list[str] = []
+    sink = logger.add(lambda m: out.append(m.record["message"]), level="WARNING")
+    try:
+        fn()
+    finally:
+        logger.remove(sink)
+    return out
+
+def test_offline_tools_run_without_credentials():
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("DHAN_ACCESS_TOKEN", "DHAN_CLIENT_ID", "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID")}
+    code = ("import numpy as np, pandas as pd\n"
+            "from dhan_algo_suite.src.backtester.core import simulate_frame\n"
+            "from dhan_algo_suite.src.reporting.risk import risk_metrics, trade_arrays\n"
+            "from dhan_algo_suite.src.strategy.nifty_atm_option import Params\n"
+            "idx = pd.date_range('2024-03-04 09:15', '2024-03-04 15:30', freq='5min', tz='Asia/Kolkata')\n"
+            "c = 22000 + np.cumsum(np.r_[0, 40, -60, np.zeros(len(idx) - 3)])\n"
+            "df = pd.DataFrame({'open': c - np.r_[0, 40, -60, np.zeros(len(idx) - 3)], 'close': c}, index=idx)\n"
+            "print(risk_metrics(trade_arrays(simulate_frame(df, Params())))['trades'])\n")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT)
+    assert out.returncode == 0, out.stderr
+    assert int(out.stdout.split()[-1]) >= 1
+
+def test_holidays_csv_parameter(tmp_path):
+    csv = tmp_path / "holidays.csv"
+    csv.write_text("date,open,close,note\n2026-01-26,,,Republic Day\n2026-03-07,09:15,15:30,Saturday session\n")
+    cal = get_calendar("Asia/Kolkata", csv)
+    assert cal is get_calendar("Asia/Kolkata", str(csv))
+    assert cal.covered == (2024, 2026)
+    assert not cal.is_trading_day(day_id(date(2026, 1, 26)))
+    assert cal.is_trading_day(day_id(date(2026, 3, 7)))
+    assert _warnings(lambda: cal.trading_days_between(date(2026, 1, 1), date(2026, 2, 1))) == []
+
+def test_warns_once_per_uncovered_year():
+    cal = SessionCalendar("Asia/Kolkata")
+    assert cal.covered == (2024, 2025)
+    assert _warnings(lambda: cal.is_trading_day(day_id(date(2025, 6, 2)))) == []
+
+    def queries():
+        cal.is_trading_day(day_id(date(2027, 3, 1)))
+        cal.is_trading_day(day_id(date(2027, 3, 2)))
+        cal.session(day_id(date(2023, 5, 2)))
+
+    msgs = _warnings(queries)
+    assert len(msgs) == 2
+    assert "2027" in msgs[0] and "2023" in msgs[1] and "HOLIDAYS_CSV" in msgs[0]
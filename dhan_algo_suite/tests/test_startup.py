@@ -0,0 +1,75 @@
+import asyncio
+import httpx
+import pytest
+from dhan_algo_suite.src.startup import Subsystems
+
+# A subsystem whose loader returns a long-running task follows that task:
+# failed (with the exception) or stopped when it ends, unchanged when it is
+# cancelled at shutdown; /healthz reports it.
+
+async def _loaded(run) -> Subsystems:
+    subs = Subsystems()
+
+    async def load():
+        return asyncio.create_task(run())
+    subs.add("trading", load)
+    await subs.load_all()
+    assert subs.ready("trading")
+    return subs
+
+def test_task_failure_marks_subsystem_failed():
+    async def run():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("feed lost")
+
+    async def main():
+        subs = await _loaded(run)
+        await asyncio.sleep(0.05)
+        return subs
+
+    subs = asyncio.run(main())
+    s = subs.report()["subsystems"]["trading"]
+    assert s["state"] == "failed" and "feed lost" in s["error"]
+    assert not subs.ready("trading") and not subs.healthy()
+
+def test_task_exit_and_cancel():
+    async def main():
+        exited = await _loaded(lambda: asyncio.sleep(0.01))
+        cancelled = await _loaded(lambda: asyncio.sleep(10))
+        await asyncio.sleep(0.05)
+        cancelled.items["trading"].value.cancel()
+        await asyncio.sleep(0)
+        return exited, cancelled
+
+    exited, cancelled = asyncio.run(main())
+    assert exited.items["trading"].state == "stopped" and not exited.healthy()
+    assert cancelled.items["trading"].state == "ready" and cancelled.healthy()
+
+def test_healthz_reports_dead_trading_loop(monkeypatch):
+    import dhan_algo_suite.app as A
+
+    async def dying_engine(mode: str):
+        await asyncio.sleep(0.02)
+        raise RuntimeError("order stream closed")
+
+    subs = Subsystems()
+    subs.add("trading", A.load_trading)
+    monkeypatch.setattr(A, "subsystems", subs)
+    monkeypatch.setattr(A, "run_engine", dying_engine)
+    monkeypatch.setattr(A, "engine_module", lambda mode: "asyncio")
+    monkeypatch.setattr(A.settings, "RUN_MODE", "paper")
+
+    async def main():
+        await subs.load_all()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=A.app), base_url="http://test") as c:
+            before = (await c.get("/healthz")).json()
+            await asyncio.sleep(0.05)
+            after = (await c.get("/healthz")).json()
+        A.engine_task = None
+        return before, after
+
+    before, after = asyncio.run(main())
+    assert before["status"] == "ok" and before["subsystems"]["trading"]["state"] == "ready"
+    assert after["status"] == "degraded"
+    assert after["subsystems"]["trading"]["state"] == "failed"
+    assert "order stream closed" in after["subsystems"]["trading"]["error"]
@@ -0,0 +1,18 @@
+from dhan_algo_suite.src.backtester.sweep import build_grid, run_sweep
+from test_backtest_core import sessions
+
+def _sweep(tmp_path, rank_by):
+    grid = build_grid([10.0, 20.0, 40.0], [8.0, 15.0], [[(5, 10), (13, 20)]], [1, 3], [5], ["09:15"], ["15:15"])
+    return run_sweep(sessions(20, 1), grid, base_interval=5, workers=2,
+                     out_csv=str(tmp_path / "sweep.csv"), rank_by=rank_by)
+
+def test_rank_by_max_drawdown(tmp_path):
+    ranked = _sweep(tmp_path, "max_drawdown")
+    assert len(ranked) == 12
+    assert ranked["max_drawdown"].is_monotonic_increasing
+
+def test_rank_by_net_pnl_breaks_ties_on_drawdown(tmp_path):
+    ranked = _sweep(tmp_path, "net_pnl")
+    assert ranked["net_pnl"].is_monotonic_decreasing
+    for _, g in ranked.groupby("net_pnl", sort=False):
+        assert g["max_drawdown"].is_monotonic_increasing
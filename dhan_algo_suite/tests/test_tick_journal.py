@@ -0,0 +1,96 @@
+import asyncio, time
+from datetime import date
+import numpy as np
+import pandas as pd
+from dhan_algo_suite.src.storage.tick_journal import HEADER_SIZE, TICK_DTYPE, TickJournal, read_count, read_ticks
+
+# TickJournal with a tiny growth step, so a handful of ticks crosses several
+# segment remaps. Readers only see what a flush committed; stop() truncates the
+# preallocated tail; a second journal over the same directory appends to the
+# day file where the first one stopped.
+
+TZ = "Asia/Kolkata"
+STEP = 8
+DAY = date(2024, 3, 5)
+T0 = pd.Timestamp(f"{DAY} 09:15", tz=TZ).value
+
+def ticks(n: int, start: int = 0) -> list[dict]:
+    return [dict(ts_ns=T0 + (start + k) * 1_000_000, ltp=22000.0 + (start + k) * 0.5, qty=k % 7 + 1,
+                 volume=1000 + start + k, ltt=int(T0 // 10**9) + start + k, oi=k) for k in range(n)]
+
+def expected(rows: list[dict]) -> np.ndarray:
+    return np.array([(r["ts_ns"], r["volume"], r["ltp"], r["qty"], r["ltt"], r["oi"]) for r in rows], TICK_DTYPE)
+
+def write(j: TickJournal, rows: list[dict], sid: int = 13):
+    for r in rows:
+        j.append("IDX_I", sid, **r)
+
+def test_segments_commit_and_reopen(tmp_path):
+    first, second = ticks(3 * STEP + 5), ticks(STEP + 2, start=3 * STEP + 5)
+
+    async def main():
+        j = TickJournal(tmp_path, tz=TZ, segment_records=STEP)
+        write(j, first)
+        path = j.path(DAY, "IDX_I", 13)
+        assert read_count(path) == 0                   # nothing committed before the flush
+        assert j._files[("IDX_I", 13)][1].capacity == 4 * STEP
+        await j.flush()
+        live = read_ticks(path)
+        assert isinstance(live, np.memmap) and not live.flags.writeable
+        np.testing.assert_array_equal(live, expected(first))
+        await j.stop()
+        assert path.stat().st_size == HEADER_SIZE + len(first) * TICK_DTYPE.itemsize
+
+        again = TickJournal(tmp_path, tz=TZ, segment_records=STEP)
+        write(again, second)
+        await again.stop()
+        return path
+
+    path = asyncio.run(main())
+    np.testing.assert_array_equal(read_ticks(path), expected(first + second))
+    assert path.stat().st_size == HEADER_SIZE + len(first + second) * TICK_DTYPE.itemsize
+    j = TickJournal(tmp_path, tz=TZ)
+    assert j.days() == [DAY] and j.instruments(DAY) == [("IDX_I", 13)]
+
+def test_day_rollover_closes_the_previous_file(tmp_path):
+    next_day = [dict(r, ts_ns=r["ts_ns"] + 86_400 * 10**9) for r in ticks(3)]
+
+    async def main():
+        j = TickJournal(tmp_path, tz=TZ, segment_records=STEP)
+        write(j, ticks(5))
+        write(j, next_day)
+        await j.stop()
+        return j
+
+    j = asyncio.run(main())
+    assert j.days() == [DAY, date(2024, 3, 6)]
+    np.testing.assert_array_equal(j.read(DAY, "IDX_I", 13), expected(ticks(5)))
+    np.testing.assert_array_equal(j.read(date(2024, 3, 6), "IDX_I", 13), expected(next_day))
+
+def test_stop_waits_for_the_flush_in_flight(tmp_path, monkeypatch):
+    order = []
+    sync = TickJournal._sync
+
+    def slow_sync(maps, closing):
+        order.append("sync")
+        time.sleep(0.2)
+        sync(maps, closing)
+        order.append("synced")
+
+    monkeypatch.setattr(TickJournal, "_sync", staticmethod(slow_sync))
+    rows = ticks(2 * STEP + 3)
+
+    async def main():
+        j = TickJournal(tmp_path, tz=TZ, segment_records=STEP, flush_interval=0.01)
+        close = j.close
+        j.close = lambda: (order.append("close"), close())
+        write(j, rows)
+        j.start()
+        while not order:
+            await asyncio.sleep(0.005)
+        await j.stop()                      # cancels _run mid-msync
+        return j
+
+    j = asyncio.run(main())
+    assert order.index("synced") < order.index("close")
+    np.testing.assert_array_equal(j.read(DAY, "IDX_I", 13), expected(rows))
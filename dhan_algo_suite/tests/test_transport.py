@@ -0,0 +1,113 @@
+import asyncio, time
+import httpx
+import pytest
+from dhan_algo_suite.src.dhan_client import DhanClient
+from dhan_algo_suite.src.transport import RateLimiter
+
+# DhanClient/DhanTransport against a local Dhan stand-in that adds latency and
+# answers 429/5xx on demand: retries only for idempotent calls, bounded
+# backoff, and request timestamps that respect every token-bucket window.
+
+LATENCY = 0.02
+
+class MockDhan:
+    def __init__(self, fail: list[int] | None = None):
+        self.fail = list(fail or [])       # status codes to answer before succeeding
+        self.sent: list[float] = []        # arrival times (monotonic)
+
+    async def __call__(self, req: httpx.Request) -> httpx.Response:
+        self.sent.append(time.monotonic())
+        await asyncio.sleep(LATENCY)
+        if self.fail:
+            return httpx.Response(self.fail.pop(0), json={"errorMessage": "stand-in"})
+        return httpx.Response(200, json={"data": {}} if req.method == "POST" else [])
+
+def run(server: MockDhan, scenario, **kw):
+    async def main():
+        client = DhanClient(transport=httpx.MockTransport(server), **kw)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+def conforms(sent: list[float], capacity: int, period: float, slack: float = 0.005) -> bool:
+    # replay the arrivals through a fresh bucket: every request must have found a token
+    rate, tokens, last = capacity / period, float(capacity), sent[0] if sent else 0.0
+    for t in sent:
+        tokens = min(capacity, tokens + (t - last + slack) * rate)
+        last = t
+        if tokens < 1.0:
+            return False
+        tokens -= 1.0
+    return True
+
+def test_idempotent_call_retries_429_then_succeeds():
+    server = MockDhan(fail=[429, 429, 503])
+    client_box = {}
+
+    async def scenario(c):
+        client_box["c"] = c
+        return await c.market_quotes([13], "IDX_I")
+
+    t = time.monotonic()
+    assert run(server, scenario, backoff_max=0.05, limits={"quotes": [(100, 1.0)]}) == {"data": {}}
+    assert len(server.sent) == 4 and client_box["c"].t.retries == 3
+    assert time.monotonic() - t < 1.0          # backoff capped at backoff_max
+
+def test_retries_stop_after_max_attempts():
+    server = MockDhan(fail=[500] * 10)
+
+    async def scenario(c):
+        with pytest.raises(httpx.HTTPStatusError) as e:
+            await c.order_book()
+        return e.value.response.status_code
+
+    assert run(server, scenario, backoff_max=0.01, max_attempts=3) == 500
+    assert len(server.sent) == 3
+
+def test_orders_are_never_retried():
+    server = MockDhan(fail=[429])
+
+    async def scenario(c):
+        with pytest.raises(httpx.HTTPStatusError):
+            await c.place_order({"transactionType": "BUY"})
+
+    run(server, scenario, backoff_max=0.01)
+    assert len(server.sent) == 1
+
+def test_concurrent_calls_respect_every_window():
+    windows = [(4, 0.2), (8, 1.0)]
+    server = MockDhan()
+
+    async def scenario(c):
+        await asyncio.gather(*(c.order_book() for _ in range(14)))
+
+    t = time.monotonic()
+    run(server, scenario, limits={"other": windows})
+    assert len(server.sent) == 14
+    for capacity, period in windows:
+        assert conforms(server.sent, capacity, period), (capacity, period)
+    # 8 from the full buckets, the other 6 at the slower window's 8/s
+    assert time.monotonic() - t >= 6 / 8 - 0.05
+
+def test_rate_limit_shared_with_retries():
+    # a 429 retry takes a token like any other request
+    server = MockDhan(fail=[429] * 3)
+
+    async def scenario(c):
+        await asyncio.gather(*(c.market_quotes([13], "IDX_I") for _ in range(3)))
+
+    run(server, scenario, backoff_max=0.01, limits={"quotes": [(2, 0.2)]})
+    assert len(server.sent) == 6
+    assert conforms(server.sent, 2, 0.2)
+
+def test_waiting_on_one_window_takes_no_token_from_another():
+    async def main():
+        lim = RateLimiter([(5, 1.0), (1, 10.0)])
+        await lim.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(lim.acquire(), 0.05)   # held back by the 1-per-10s window
+        return lim.buckets[0].tokens
+
+    assert asyncio.run(main()) >= 3.99